@@ -1,50 +1,108 @@
-import stanza
 from collections import defaultdict
-import pandas as pd
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
-import matplotlib.pyplot as plt
-import seaborn as sns
-import json 
-import scipy.stats as stats
-import traceback
+import logging
+from corpus_routing import PipelineRegistry, route_texts
+from corpus_reader import CorpusReader, open_corpus
+from info_complexity import InformationComplexityEngine
+from feature_index import feature_query
+from construction_patterns import ConstructionMatcher
+from lexical_rules import LexicalClassifier
+from window_metrics import SentenceProfile, summarize
+from dependency_metrics import DependencyArrays, DependencyDistanceEngine
+from random_trees import RandomTreeBaseline
+from token_table import TokenTable
+from scheduler import ResourceScheduler, count_tokens
+from quantization import PipelineQuantizer
+from sentence_sampling import AdaptiveSampler, split_sentences
+from dedup import NearDuplicateFilter
+from parse_cache import PER_SENTENCE_NOTE, SentenceCache
+from alignment import PassageAligner, sentence_tokens, transformation_counts
+from parsed_docs import ParsedDocument
+# Period statistics live in period_stats, which loads without Stanza; re-exported here
+from period_stats import SHIFT_CONSTRUCTIONS, StatisticalAnalysis, aggregate_results, text_aggregate
+
+logger = logging.getLogger(__name__)
+
+# Morphological rules as feature queries (see feature_index). Values match
+# exactly and each rule is evaluated once per distinct feats string.
+# Latin synthetic forms are checked in order; the first match counts.
+LATIN_SYNTHETIC_FORMS = {
+    'future_tense': feature_query('VERB', Tense='Fut'),
+    # Perfect system: legacy Tense=Perf, pluperfect, and UD v2's finite
+    # Aspect=Perf|Tense=Past (participles are excluded)
+    'perfect_tense': (feature_query('VERB', Tense=('Perf', 'Pqp'))
+                      | feature_query('VERB', Aspect='Perf', Tense='Past', VerbForm='Fin')),
+    'passive_voice': feature_query('VERB', Voice='Pass')
+}
+PARTICIPLE = feature_query(VerbForm='Part')
+GERUND = feature_query(VerbForm='Ger')
+INFINITIVE = feature_query(VerbForm='Inf')
 
 class EnhancedComplexityTracker:
-    def __init__(self):
-        self.latin_nlp = stanza.Pipeline('la')
-        self.spanish_nlp = stanza.Pipeline('es')
-        self.corpus_dir = Path("corpus")
+    def __init__(self, corpus_dir: str = "corpus", packages: Optional[Dict[str, str]] = None,
+                 batch_size: int = 8, quantize: bool = False,
+                 sentence_cache: Optional[SentenceCache] = None,
+                 random_tree_cache: Optional[str] = None):
+        """
+        packages: optional per-period Stanza packages, keyed by corpus
+        directory (e.g. {'medieval_latin': 'ittb'}); see corpus_routing
+        corpus_dir: a corpus directory or a packed archive; see corpus_reader
+        quantize: run the POS and dependency models as int8 on CPU; see quantization
+        sentence_cache: reuse parses of sentences seen before; see parse_cache
+        random_tree_cache: JSON file of random-tree expectations per sentence
+        length, shared across runs and worker processes; setting it adds the
+        random-tree comparison to analyze_dependency_distance (see random_trees)
+        """
+        self.quantize = quantize
+        self.sentence_cache = sentence_cache
+        self.pipelines = PipelineRegistry(quantizer=PipelineQuantizer() if quantize else None,
+                                          cache=sentence_cache)
+        self.packages = packages or {}
+        self.batch_size = batch_size
+        self.corpus_dir = Path(corpus_dir)
+        self.info_engine = InformationComplexityEngine()
+        self.constructions = ConstructionMatcher()
+        self.lexicon = LexicalClassifier()
+        self.random_tree_cache = random_tree_cache
+        self.dependency_engine = DependencyDistanceEngine(
+            tree_baseline=RandomTreeBaseline(cache_path=random_tree_cache) if random_tree_cache else None)
+        self._table_cache = (None, None)
+        self.deduplication: Dict[str, Dict] = {}
+
+    @property
+    def latin_nlp(self):
+        return self.pipelines.get('la', self.packages.get('classical_latin'))
+
+    @property
+    def spanish_nlp(self):
+        return self.pipelines.get('es', self.packages.get('early_spanish'))
+
+    def open_corpus(self) -> CorpusReader:
+        """Open a lazy reader over the corpus; texts are read on demand"""
+        return open_corpus(self.corpus_dir)
 
     def load_corpus(self) -> Dict[str, str]:
         """Load all texts from the corpus directory"""
-        corpus = {}
-    
-    # Load Classical Latin
-        latin_dir = self.corpus_dir / "classical_latin"
-        for text_file in latin_dir.glob("*.txt"):
-            with open(text_file, 'r', encoding='utf-8') as f:
-                corpus[f"latin_{text_file.stem}"] = f.read()
-    
-    # Load Medieval Latin
-        medieval_dir = self.corpus_dir / "medieval_latin"
-        for text_file in medieval_dir.glob("*.txt"):
-            with open(text_file, 'r', encoding='utf-8') as f:
-                corpus[f"medieval_{text_file.stem}"] = f.read()
-    
-    # Load Early Spanish
-        spanish_dir = self.corpus_dir / "early_spanish"
-        for text_file in spanish_dir.glob("*.txt"):
-            with open(text_file, 'r', encoding='utf-8') as f:
-                corpus[f"spanish_{text_file.stem}"] = f.read()
-    
-        return corpus
+        return dict(self.open_corpus().items())
+
+    def _parse(self, text, language: str):
+        """Parse raw text, passing already-parsed documents through unchanged"""
+        if hasattr(text, 'sentences'):
+            return text
+        nlp = self.latin_nlp if language == 'la' else self.spanish_nlp
+        return nlp(text)
 
+    def _token_table(self, doc) -> TokenTable:
+        """Columnar view of a parsed document, reused while the same document is analyzed"""
+        if self._table_cache[0] is not doc:
+            self._table_cache = (doc, TokenTable.from_document(doc))
+        return self._table_cache[1]
 
     def analyze_analytical_constructions(self, text: str, language: str) -> Dict:
         """Track multi-word expressions that replace single morphological markers"""
-        nlp = self.latin_nlp if language == 'la' else self.spanish_nlp
-        doc = nlp(text)
+        doc = self._parse(text, language)
         
         analytical_forms = {
             'future_tense': {
@@ -70,102 +128,45 @@ class EnhancedComplexityTracker:
         }
         
         for sent in doc.sentences:
-            for word in sent.words:
-                # Check for synthetic forms in Latin
-                if language == 'la' and word.upos == 'VERB':
-                    if 'Tense=Fut' in (word.feats or ''):
-                        analytical_forms['future_tense']['synthetic'] += 1
-                    elif 'Tense=Perf' in (word.feats or ''):
-                        analytical_forms['perfect_tense']['synthetic'] += 1
-                    elif 'Voice=Pass' in (word.feats or ''):
-                        analytical_forms['passive_voice']['synthetic'] += 1
-                
-                # Check for analytical forms in Spanish
-                if language == 'es':
-                    if word.upos == 'AUX':
-                        next_verb = self._find_next_verb(sent, word)
-                        if next_verb:
-                            construction = self._identify_analytical_construction(word, next_verb)
-                            if construction:
-                                analytical_forms[construction]['analytic'] += 1
-                                analytical_forms[construction]['components'][word.text.lower()] += 1
-                                analytical_forms[construction]['components'][next_verb.text.lower()] += 1
-        
+            # Check for synthetic forms in Latin
+            if language == 'la':
+                for word in sent.words:
+                    if word.upos == 'VERB':
+                        for construction, query in LATIN_SYNTHETIC_FORMS.items():
+                            if query(word):
+                                analytical_forms[construction]['synthetic'] += 1
+                                break
+
+            # Check for analytical forms in Spanish (construction_patterns)
+            if language == 'es':
+                for construction, nodes in self.constructions.match_sentence(sent):
+                    if construction in analytical_forms:
+                        analytical_forms[construction]['analytic'] += 1
+                        analytical_forms[construction]['components'][nodes['aux'].text.lower()] += 1
+                        analytical_forms[construction]['components'][nodes['verb'].text.lower()] += 1
+
         return analytical_forms
 
-    def _classify_preposition(self, prep_word, sentence) -> str:
+    def _classify_preposition(self, prep_word, sentence, language: Optional[str] = None) -> str:
         """
-        Classify preposition usage type
+        Classify preposition usage type (rules and cache in lexical_rules)
         """
         try:
-            # For Spanish
-            if prep_word.text.lower() == 'de':
-                # Check if it's replacing genitive
-                for word in sentence.words:
-                    if word.head == prep_word.id and word.deprel == 'nmod':
-                        return 'case_replacement'
-            elif prep_word.text.lower() in ['en', 'sobre', 'bajo']:
-                return 'semantic'  # Spatial prepositions
-            elif prep_word.text.lower() in ['a', 'para', 'por']:
-                # Check for grammaticalized uses
-                if any(w.deprel == 'iobj' and w.head == prep_word.id for w in sentence.words):
-                    return 'case_replacement'
-                return 'semantic'
-            
-            # For Latin (mostly semantic since it has case system)
-            if prep_word.text.lower() in ['in', 'ad', 'ex', 'ab', 'cum']:
-                return 'semantic'
-                
-            return 'other'  # Default case
+            return self.lexicon.classify_preposition(prep_word, sentence, language)
         except Exception as e:
-            print(f"Error in _classify_preposition: {e}")
+            logger.error("Error in _classify_preposition: %s", e)
             return 'other'
         
     def _classify_article(self, det_word, sentence, language: str) -> str:
         """
         Classify article usage type - only applies to Spanish as Latin has no articles
         """
-        # Latin has no articles - all DET tags should be ignored for article analysis
-        if language == 'la':
-            return 'not_article'
-        
-        # Spanish articles only
-        if language == 'es':
-            if det_word.text.lower() in ['el', 'la', 'los', 'las']:
-                # Check if it's marking case role
-                if any(w.deprel in ['nsubj', 'obj'] and w.head == det_word.head for w in sentence.words):
-                    return 'case_marking'
-                return 'definiteness'
-            elif det_word.text.lower() in ['un', 'una', 'unos', 'unas']:
-                return 'definiteness'
-    
-        return 'other'
-
-
-    def _find_next_verb(self, sentence, aux_word) -> Optional[stanza.models.common.doc.Word]:
-        """Find the main verb that follows an auxiliary"""
-        for word in sentence.words[aux_word.id:]:  # Start from auxiliary position
-            if word.upos == 'VERB':
-                return word
-        return None
+        return self.lexicon.classify_article(det_word, sentence, language)
 
-    def _identify_analytical_construction(self, aux_word, main_verb) -> Optional[str]:
-        """Identify the type of analytical construction"""
-        aux_text = aux_word.text.lower()
-        verb_feats = main_verb.feats or ''
-        
-        if aux_text in ['ir', 'voy', 'vas', 'va'] and 'a' in [w.text.lower() for w in aux_word.sent.words]:
-            return 'future_tense'
-        elif aux_text in ['he', 'has', 'ha', 'hemos'] and 'VerbForm=Part' in verb_feats:
-            return 'perfect_tense'
-        elif aux_text in ['ser', 'es', 'son'] and 'VerbForm=Part' in verb_feats:
-            return 'passive_voice'
-        return None
 
     def analyze_function_words(self, text: str, language: str) -> Dict:
         """Detailed function word analysis"""
-        nlp = self.latin_nlp if language == 'la' else self.spanish_nlp
-        doc = nlp(text)
+        doc = self._parse(text, language)
         
         metrics = {
             'prepositions': {
@@ -187,6 +188,7 @@ class EnhancedComplexityTracker:
             'word_count': 0  # Add total word count for proper normalization
         }
         
+        lexicon = self.lexicon
         try:
             for sent in doc.sentences:
                 for word in sent.words:
@@ -194,29 +196,28 @@ class EnhancedComplexityTracker:
                     metrics['word_count'] += 1
                     
                     if word.upos == 'ADP':  # Prepositions
-                        prep_type = self._classify_preposition(word, sent)
-                        metrics['prepositions'][prep_type][word.text.lower()] += 1
+                        prep_type = lexicon.classify_preposition(word, sent, language)
+                        metrics['prepositions'][prep_type][lexicon.form(word.text)] += 1
                         metrics['total_by_type']['prepositions'] += 1
                     
                     elif word.upos == 'DET':  # Articles
-                        art_type = self._classify_article(word, sent, language)
+                        art_type = lexicon.classify_article(word, sent, language)
                         # Only count actual articles, not Latin determiners
                         if art_type != 'not_article':
-                            metrics['articles'][art_type][word.text.lower()] += 1
+                            metrics['articles'][art_type][lexicon.form(word.text)] += 1
                             metrics['total_by_type']['articles'] += 1
                     
                     elif word.upos == 'CCONJ' or word.upos == 'SCONJ':
                         conj_type = 'coordination' if word.upos == 'CCONJ' else 'subordination'
-                        metrics['conjunctions'][conj_type][word.text.lower()] += 1
+                        metrics['conjunctions'][conj_type][lexicon.form(word.text)] += 1
                         metrics['total_by_type']['conjunctions'] += 1
         except Exception as e:
-            print(f"Error in analyze_function_words: {e}")
+            logger.error("Error in analyze_function_words: %s", e)
             
         return metrics  
     def analyze_dependency_complexity(self, text: str, language: str) -> Dict:
         """More sophisticated dependency analysis"""
-        nlp = self.latin_nlp if language == 'la' else self.spanish_nlp
-        doc = nlp(text)
+        doc = self._parse(text, language)
         
         metrics = {
             'path_lengths': [],
@@ -232,12 +233,8 @@ class EnhancedComplexityTracker:
         }
         
         for sent in doc.sentences:
-            # Track path lengths and distances
             for word in sent.words:
                 if word.head != 0:  # Not root
-                    distance = abs(word.id - word.head)
-                    metrics['dependency_distances'][distance] += 1
-                    
                     # Classify dependency types
                     if word.deprel in ['nsubj', 'obj', 'iobj', 'ccomp']:
                         metrics['dependency_types']['argument_structure'][word.deprel] += 1
@@ -245,11 +242,14 @@ class EnhancedComplexityTracker:
                         metrics['dependency_types']['modification'][word.deprel] += 1
                     elif word.deprel in ['conj', 'cc']:
                         metrics['dependency_types']['coordination'][word.deprel] += 1
-            
-            # Calculate embedding depth
-            depth = self._calculate_dependency_depth(sent)
-            metrics['embedding_depth'].append(depth)
-            metrics['max_depth'] = max(metrics['max_depth'], depth)
+
+        # Distances and embedding depths come from the array engine
+        arrays = DependencyArrays(self._token_table(doc))
+        for distance, count in enumerate(np.bincount(arrays.distance).tolist()):
+            if count:
+                metrics['dependency_distances'][distance] = count
+        metrics['embedding_depth'] = arrays.sentence_depth.tolist()
+        metrics['max_depth'] = max(metrics['embedding_depth'], default=0)
         
         if metrics['embedding_depth']:
             metrics['average_depth'] = sum(metrics['embedding_depth']) / len(metrics['embedding_depth'])
@@ -274,8 +274,7 @@ class EnhancedComplexityTracker:
 
     def track_clause_transformations(self, text: str, language: str) -> Dict:
         """Track how Latin constructions transform in Spanish"""
-        nlp = self.latin_nlp if language == 'la' else self.spanish_nlp
-        doc = nlp(text)
+        doc = self._parse(text, language)
         
         transformations = {
             'ablative_absolute': {
@@ -305,44 +304,123 @@ class EnhancedComplexityTracker:
         
         return transformations
 
+    def _latin_constructions(self, sentence) -> List[Tuple[str, object]]:
+        """(construction, participle) for each ablative absolute and other participle"""
+        absolutes = {id(nodes['participle'])
+                     for construction, nodes in self.constructions.match_sentence(sentence)
+                     if construction == 'ablative_absolute'}
+        found = []
+        for word in sentence.words:
+            # Ablative absolute: participle with an ablative subject
+            if id(word) in absolutes:
+                found.append(('ablative_absolute', word))
+            elif PARTICIPLE(word):
+                found.append(('participial_constructions', word))
+        return found
+
     def _analyze_latin_constructions(self, sentence, metrics: Dict):
         """Analyze Latin-specific constructions"""
-        for word in sentence.words:
-            # Check for ablative absolute
-            if ('Case=Abl' in (word.feats or '') and 
-                'VerbForm=Part' in (word.feats or '')):
-                metrics['ablative_absolute']['other']['found'] += 1
-            
-            # Check for participial constructions
-            elif 'VerbForm=Part' in (word.feats or ''):
-                metrics['participial_constructions']['other']['found'] += 1
+        for construction, _ in self._latin_constructions(sentence):
+            metrics[construction]['other']['found'] += 1
+
+    def align_transformations(self, latin_text, spanish_text, aligner: Optional[PassageAligner] = None) -> Dict:
+        """
+        Align a Latin text with its Spanish rendering (raw text or parsed
+        documents) and count what each Latin ablative absolute and
+        participle became (see alignment)
+
+        Returns the sentence beads, the aligned construction pairs and
+        their counts in the layout of track_clause_transformations.
+        """
+        latin_doc, spanish_doc = self._parse(latin_text, 'la'), self._parse(spanish_text, 'es')
+        aligner = aligner or PassageAligner()
+        beads = aligner.align(sentence_tokens(latin_doc), sentence_tokens(spanish_doc))
+        pairs = aligner.construction_pairs(latin_doc, spanish_doc, beads, self._latin_constructions)
+        return {
+            'beads': [{'latin': source, 'spanish': target, 'cost': cost} for source, target, cost in beads],
+            'pairs': pairs,
+            'transformations': transformation_counts(pairs)
+        }
 
     def _analyze_spanish_constructions(self, sentence, metrics: Dict):
         """Analyze Spanish-specific constructions"""
         for word in sentence.words:
             # Track different types of subordination
-            if word.text.lower() == 'que' and word.upos == 'SCONJ':
+            if word.upos == 'SCONJ' and self.lexicon.form(word.text) == 'que':
                 metrics['subordination_strategies']['que_clauses'] += 1
-            elif 'VerbForm=Ger' in (word.feats or ''):
+            elif GERUND(word):
                 metrics['subordination_strategies']['gerund_clauses'] += 1
-            elif 'VerbForm=Inf' in (word.feats or ''):
+            elif INFINITIVE(word):
                 metrics['subordination_strategies']['infinitive_clauses'] += 1
             elif word.deprel == 'acl:relcl':
                 metrics['subordination_strategies']['relative_clauses'] += 1
 
+    def analyze_information_complexity(self, text: str, language: str) -> Dict:
+        """Entropy, paradigm-size and compression-based complexity measures"""
+        doc = self._parse(text, language)
+        return self.info_engine.analyze(self._token_table(doc))
+
+    def analyze_dependency_distance(self, text: str, language: str) -> Dict:
+        """Distance, crossing-arc and head-direction measures with a random baseline"""
+        doc = self._parse(text, language)
+        return self.dependency_engine.analyze(DependencyArrays(self._token_table(doc)))
+
+    def sentence_profile(self, text, language: str) -> SentenceProfile:
+        """Per-sentence counts behind the windowed metrics (see window_metrics)"""
+        doc = self._parse(text, language)
+        counts = {name: [] for name in ('tokens', 'articles', 'arcs', 'distance', 'depth',
+                                        'analytic', 'synthetic')}
+        for sent in doc.sentences:
+            arcs = [abs(word.id - word.head) for word in sent.words if word.head != 0]
+            # Both sides are counted in every language, so the ratio can move
+            # within a text (e.g. Spanish synthetic futures vs ir a + infinitive)
+            synthetic = sum(1 for word in sent.words
+                            if any(query(word) for query in LATIN_SYNTHETIC_FORMS.values()))
+            analytic = sum(1 for construction, _ in self.constructions.match_sentence(sent)
+                           if construction != 'ablative_absolute')
+            counts['tokens'].append(len(sent.words))
+            # As in analyze_function_words: Latin DET tags are not articles
+            counts['articles'].append(0 if language == 'la' else
+                                      sum(1 for word in sent.words if word.upos == 'DET'))
+            counts['arcs'].append(len(arcs))
+            counts['distance'].append(sum(arcs))
+            counts['depth'].append(self._calculate_dependency_depth(sent))
+            counts['analytic'].append(analytic)
+            counts['synthetic'].append(synthetic)
+        return SentenceProfile(counts)
+
+    def windowed_analysis(self, text, language: str, sizes=(10, 50), unit: str = 'sentences',
+                          step: int = 1) -> Dict:
+        """
+        Article rate, dependency distance, embedding depth and analytic ratio
+        over sliding windows of each size (in sentences or tokens), with a
+        summary of their spread
+        """
+        profile = self.sentence_profile(text, language)
+        results = {}
+        for size, windows in profile.profiles(sizes, unit, step).items():
+            results[size] = {'windows': windows, 'summary': summarize(windows)}
+        return results
+
     def integrated_analysis(self, text: str, language: str) -> Dict:
         """
         Perform comprehensive analysis combining all metrics
+
+        `text` may be raw text or a parsed document; it is parsed once and
+        the same document is shared by every analyzer.
         """
+        doc = self._parse(text, language)
         results = {
-            'analytical_constructions': self.analyze_analytical_constructions(text, language),
-            'function_words': self.analyze_function_words(text, language),
-            'dependency_complexity': self.analyze_dependency_complexity(text, language),
-            'clause_transformations': self.track_clause_transformations(text, language)
+            'analytical_constructions': self.analyze_analytical_constructions(doc, language),
+            'function_words': self.analyze_function_words(doc, language),
+            'dependency_complexity': self.analyze_dependency_complexity(doc, language),
+            'clause_transformations': self.track_clause_transformations(doc, language),
+            'information_complexity': self.analyze_information_complexity(doc, language),
+            'dependency_distance': self.analyze_dependency_distance(doc, language)
         }
         
         # Add normalized metrics
-        word_count = len(text.split())
+        word_count = len((text if isinstance(text, str) else doc.text).split())
         results['normalized_metrics'] = self._calculate_normalized_metrics(results, word_count)
         
         return results
@@ -372,6 +450,22 @@ class EnhancedComplexityTracker:
             'clause_complexity': len(results['clause_transformations']['subordination_strategies']) / word_count
         }
         
+        info = results.get('information_complexity', {})
+        if info.get('token_count'):
+            normalized['complexity_scores']['inflectional_entropy'] = info['inflectional_entropy']
+            normalized['complexity_scores']['feature_entropy'] = info['feature_entropy_given_upos']
+            normalized['complexity_scores']['morphological_compression'] = info['compression']['zlib']['morphological_complexity']
+
+        distance = results.get('dependency_distance', {})
+        if distance.get('arcs'):
+            normalized['complexity_scores']['mean_dependency_distance'] = distance['mean_distance']
+            normalized['complexity_scores']['normalized_dependency_distance'] = \
+                distance['baseline']['random_arrangement']['normalized_distance']
+            trees = distance['baseline'].get('random_trees')
+            if trees:
+                normalized['complexity_scores']['projective_distance_ratio'] = trees['projective']['distance_ratio']
+                normalized['complexity_scores']['random_tree_depth_ratio'] = trees['projective']['depth_ratio']
+
         return normalized
 
     def generate_enhanced_report(self, results: Dict):
@@ -397,7 +491,7 @@ class EnhancedComplexityTracker:
             # Function Words
             report.append("\nFunction Word Analysis:")
             for category, subcounts in analysis['function_words'].items():
-                if category != 'total_by_type':
+                if category != 'total_by_type' and isinstance(subcounts, dict):
                     report.append(f"  {category}:")
                     for subcat, counts in subcounts.items():
                         if isinstance(counts, dict):
@@ -420,6 +514,32 @@ class EnhancedComplexityTracker:
                 for strategy, count in clause_trans['subordination_strategies'].items():
                     report.append(f"    {strategy}: {count}")
             
+            # Information Complexity
+            info = analysis.get('information_complexity', {})
+            if info.get('token_count'):
+                report.append("\nInformation Complexity:")
+                report.append(f"  Word Entropy: {info['word_entropy']:.4f} bits")
+                report.append(f"  Lemma Entropy: {info['lemma_entropy']:.4f} bits")
+                report.append(f"  Inflectional Entropy: {info['inflectional_entropy']:.4f} bits")
+                report.append(f"  Mean Paradigm Size: {info['paradigm_size']['mean']:.2f}")
+                for name, ratios in info['compression'].items():
+                    report.append(f"  {name} Morphological/Syntactic: "
+                                  f"{ratios['morphological_complexity']:.4f} / {ratios['syntactic_complexity']:.4f}")
+
+            # Dependency Distance
+            distance = analysis.get('dependency_distance', {})
+            if distance.get('arcs'):
+                baseline = distance['baseline']['random_arrangement']
+                report.append("\nDependency Distance:")
+                report.append(f"  Mean Distance: {distance['mean_distance']:.4f} "
+                              f"(random arrangement {baseline['expected_mean_distance']:.4f})")
+                report.append(f"  Normalized Distance: {baseline['normalized_distance']:.4f}")
+                for order, ratios in distance['baseline'].get('random_trees', {}).items():
+                    report.append(f"  Distance/Depth vs random {order} trees: "
+                                  f"{ratios['distance_ratio']:.4f} / {ratios['depth_ratio']:.4f}")
+                report.append(f"  Crossing Arcs per Arc: {distance['crossings_per_arc']:.4f}")
+                report.append(f"  Head-final Ratio: {distance['head_final_ratio']:.4f}")
+            
             # Normalized Metrics
             report.append("\nNormalized Metrics:")
             norm = analysis['normalized_metrics']
@@ -434,479 +554,158 @@ class EnhancedComplexityTracker:
         
         return "\n".join(report)
 
-    def analyze_full_corpus(self):
+    def _sentence_measures(self, doc, language: str) -> Dict[str, Tuple[float, float]]:
+        """Numerator and denominator of each sampled per-text metric in one parsed sentence"""
+        depths = DependencyArrays(TokenTable.from_document(doc)).sentence_depth
+        function_words = self.analyze_function_words(doc, language)
+        return {
+            'average_depth': (float(depths.sum()), float(depths.size)),
+            'article_rate': (1000.0 * function_words['total_by_type']['articles'],
+                             float(function_words['word_count']))
+        }
+
+    def sampled_analysis(self, text: str, language: str, sampler: AdaptiveSampler,
+                         text_id: str = '', nlp=None) -> Dict:
         """
-        Analyze entire corpus with enhanced metrics
+        integrated_analysis of a random sample of the text's sentences, drawn
+        until average_depth and article_rate are estimated to the sampler's
+        precision (see sentence_sampling). The sample's estimates, the
+        fraction of sentences parsed and its inverse weight are recorded
+        under 'sampling'; count fields are sample totals, which
+        text_aggregate scales by the weight.
         """
-        corpus = self.load_corpus()
-        results = {}
-        
-        print("Starting enhanced corpus analysis...")
-        
-        for text_name, text_content in corpus.items():
-            print(f"Analyzing {text_name}...")
-            language = 'la' if 'latin' in text_name else 'es'
-            
-            try:
-                results[text_name] = self.integrated_analysis(text_content, language)
-            except Exception as e:
-                print(f"Error analyzing {text_name}: {e}")
-                continue
-        
+        nlp = nlp or (self.latin_nlp if language == 'la' else self.spanish_nlp)
+        units = split_sentences(text)
+        docs, report = sampler.sample(text_id or text[:64], units, nlp.bulk_process,
+                                      lambda doc: self._sentence_measures(doc, language))
+        sample = ParsedDocument([sent for doc in docs for sent in doc.sentences],
+                                ' '.join(doc.text for doc in docs))
+        results = self.integrated_analysis(sample, language)
+        results['sampling'] = report
         return results
 
-class StatisticalAnalysis:
-    def __init__(self, results):
-        self.results = results
-        self.period_data = self._organize_by_period()
-
-    def _organize_by_period(self):
-        period_data = {
-            'Classical': [],
-            'Medieval': [],
-            'Spanish': []
-        }
-        
-        for text_name, data in self.results.items():
-            if text_name.startswith('latin_'):
-                period_data['Classical'].append(data)
-            elif text_name.startswith('medieval_'):
-                period_data['Medieval'].append(data)
-            elif text_name.startswith('spanish_'):
-                period_data['Spanish'].append(data)
-        return period_data
-
-    def analyze_dependency_evolution(self):
-        """Analyze dependency complexity evolution"""
-        depths = {
-            period: [text['dependency_complexity']['average_depth'] 
-                    for text in texts]
-            for period, texts in self.period_data.items()
-        }
-        
-        # Parametric test (ANOVA)
-        f_stat, anova_p = stats.f_oneway(*depths.values())
-        
-        # Non-parametric test (Kruskal-Wallis)
-        h_stat, kw_p = stats.kruskal(*depths.values())
-        
-        # Mann-Whitney tests
-        mw_tests = {}
-        for p1, p2 in [('Classical', 'Medieval'), ('Medieval', 'Spanish'), ('Classical', 'Spanish')]:
-            stat, p_val = stats.mannwhitneyu(depths[p1], depths[p2], alternative='two-sided')
-            mw_tests[f'{p1}_vs_{p2}'] = {'statistic': stat, 'p_value': p_val}
-        
-        # Effect sizes
-        effect_sizes = {
-            'Classical_vs_Medieval': self.cohens_d(depths['Classical'], depths['Medieval']),
-            'Medieval_vs_Spanish': self.cohens_d(depths['Medieval'], depths['Spanish']),
-            'Classical_vs_Spanish': self.cohens_d(depths['Classical'], depths['Spanish'])
-        }
-        
-        # Period stats with confidence intervals
-        period_stats = {
-            period: {
-                'mean': np.mean(values),
-                'std': np.std(values),
-                'n': len(values),
-                'ci': self.bootstrap_ci(values)
-            }
-            for period, values in depths.items()
-        }
-        
-        return {
-            'name': 'Dependency Evolution Analysis',
-            'parametric': {'f_stat': f_stat, 'p_value': anova_p},
-            'non_parametric': {
-                'kruskal_wallis': {'h_stat': h_stat, 'p_value': kw_p},
-                'mann_whitney': mw_tests
-            },
-            'effect_sizes': effect_sizes,
-            'period_stats': period_stats,
-            'raw_data': depths
-        }
+    def _deduplicate(self, corpus: CorpusReader, deduplicator: Optional[NearDuplicateFilter]) -> List[str]:
+        """Scan the corpus for near-duplicate sentences; returns the texts left to analyze"""
+        self.deduplication = deduplicator.scan(corpus.items()) if deduplicator is not None else {}
+        excluded = [name for name, decision in self.deduplication.items() if decision['action'] == 'exclude']
+        if excluded:
+            logger.info("Excluding %d near-duplicate texts: %s", len(excluded), ', '.join(excluded))
+        return [name for name in corpus if name not in excluded]
+
+    def _corpus_text(self, corpus: CorpusReader, text_name: str) -> str:
+        """A corpus text without the sentences deduplication excluded"""
+        return NearDuplicateFilter.apply(corpus.read(text_name), self.deduplication.get(text_name))
+
+    def analyze_full_corpus(self, scheduler: Optional[ResourceScheduler] = None,
+                            sampler: Optional[AdaptiveSampler] = None,
+                            deduplicator: Optional[NearDuplicateFilter] = None):
+        """
+        Analyze entire corpus with enhanced metrics
 
-    def analyze_article_development(self):
-        """Analyze article system development with robust error handling"""
-        def get_article_rates(texts):
-            rates = []
-            for text in texts:
-                try:
-                    # Debug print to help identify structure
-                    print(f"Text structure: {text.keys()}")
-                    
-                    # Get articles with error handling
-                    articles_dict = text['function_words']['articles']
-                    print(f"Articles dict: {articles_dict}")
-                    
-                    # Sum all article types safely
-                    total_articles = (
-                        sum(articles_dict['definiteness'].values() if isinstance(articles_dict['definiteness'], dict) else articles_dict['definiteness']) +
-                        sum(articles_dict['case_marking'].values() if isinstance(articles_dict['case_marking'], dict) else articles_dict['case_marking']) +
-                        sum(articles_dict['other'].values() if isinstance(articles_dict['other'], dict) else articles_dict['other'])
-                    )
-                    
-                    # Get text length from word count (proper normalization)
-                    text_length = None
-                    if 'function_words' in text and 'word_count' in text['function_words']:
-                        text_length = text['function_words']['word_count']
-                    
-                    # Ensure we have a valid text length
-                    if text_length and text_length > 0:
-                        print(f"Total articles: {total_articles}, Text length (words): {text_length}")
-                        # Calculate articles per 1000 words (standard linguistic normalization)
-                        article_rate = (total_articles / text_length) * 1000
-                        rates.append(article_rate)
-                    else:
-                        print(f"Warning: Invalid text length for text. Articles: {total_articles}")
-                        
-                except (KeyError, TypeError, AttributeError) as e:
-                    print(f"Error processing text: {e}")
-                    print(f"Text structure was: {text.keys() if isinstance(text, dict) else 'Not a dict'}")
-                    continue
-            return rates
+        scheduler: run texts in worker processes admitted under its CPU and
+        memory budget (see scheduler) instead of in batches in this process
+        sampler: parse random sentence batches of each text until its
+        metrics reach the sampler's precision (see sampled_analysis)
+        deduplicator: drop sentences (or whole texts) that near-duplicate an
+        earlier text before parsing (see dedup); each text's decision is
+        recorded under 'deduplication' and all of them in self.deduplication
+        """
+        corpus = self.open_corpus()
+        text_names = self._deduplicate(corpus, deduplicator)
+        if self.sentence_cache is not None:
+            logger.warning(PER_SENTENCE_NOTE)
+        if scheduler is not None:
+            results = self._analyze_scheduled(corpus, text_names, scheduler, sampler)
+        else:
+            results = self._analyze_batched(corpus, text_names, sampler)
+        for name, data in results.items():
+            if name in self.deduplication:
+                data['deduplication'] = self.deduplication[name]
+        if self.sentence_cache is not None and scheduler is None:
+            cache = self.sentence_cache
+            logger.info("Sentence cache: %d of %d sentences reused (%.1f%%)",
+                        cache.hits, cache.lookups, 100 * cache.hit_rate)
+        return results
 
-        try:
-            # Get rates for each period
-            article_rates = {
-                period: get_article_rates(texts)
-                for period, texts in self.period_data.items()
-            }
-            
-            print(f"Article rates by period: {article_rates}")
-            
-            # Only proceed if we have valid data
-            valid_periods = {k: v for k, v in article_rates.items() if len(v) > 0}
-            if not valid_periods:
-                print("No valid periods found with article data")
-                print("Period data available:", self.period_data.keys())
-                print("Article rates found:", article_rates)
-                return {
-                    'name': 'Article Development Analysis',
-                    'error': 'No valid data found',
-                    'raw_data': article_rates
-                }
-            
-            if len(valid_periods) >= 2:
-                # Run statistical tests
-                f_stat, anova_p = stats.f_oneway(*valid_periods.values())
-                h_stat, kw_p = stats.kruskal(*valid_periods.values())
-                
-                # Calculate pairwise tests and effect sizes
-                mw_tests = {}
-                effect_sizes = {}
-                for p1, p2 in [('Classical', 'Medieval'), ('Medieval', 'Spanish'), ('Classical', 'Spanish')]:
-                    if p1 in valid_periods and p2 in valid_periods:
-                        stat, p_val = stats.mannwhitneyu(valid_periods[p1], valid_periods[p2], 
-                                                    alternative='two-sided')
-                        mw_tests[f'{p1}_vs_{p2}'] = {'statistic': stat, 'p_value': p_val}
-                        effect_sizes[f'{p1}_vs_{p2}'] = self.cohens_d(valid_periods[p1], 
-                                                                    valid_periods[p2])
-                
-                # Calculate period statistics
-                period_stats = {
-                    period: {
-                        'mean': np.mean(rates),
-                        'std': np.std(rates),
-                        'n': len(rates),
-                        'ci': self.bootstrap_ci(rates)
-                    }
-                    for period, rates in valid_periods.items()
-                }
-                
-                return {
-                    'name': 'Article Development Analysis',
-                    'parametric': {'f_stat': f_stat, 'p_value': anova_p},
-                    'non_parametric': {
-                        'kruskal_wallis': {'h_stat': h_stat, 'p_value': kw_p},
-                        'mann_whitney': mw_tests
-                    },
-                    'effect_sizes': effect_sizes,
-                    'period_stats': period_stats,
-                    'raw_data': article_rates
-                }
-            else:
-                return {
-                    'name': 'Article Development Analysis',
-                    'error': 'Insufficient data for analysis',
-                    'raw_data': article_rates,
-                    'valid_periods': len(valid_periods)
-                }
-                
-        except Exception as e:
-            print(f"Error in article analysis: {str(e)}")
-            return {
-                'name': 'Article Development Analysis',
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            }
-        
-    def format_analytical_shift(self, result):
-        """Format analytical shift results with complete detail"""
-        output = []
-        output.append("\nAnalytical Construction Analysis")
-        output.append("-" * 40)
-        
-        # Construction counts by period
-        output.append("\nConstruction Counts by Period:")
-        for period, (syn, ana) in result['construction_counts'].items():
-            output.append(f"  {period}:")
-            output.append(f"    Synthetic: {syn:,}")
-            output.append(f"    Analytic: {ana:,}")
-            total = syn + ana
-            if total > 0:
-                output.append(f"    Synthetic Ratio: {syn/total:.4f}")
-                output.append(f"    Analytic Ratio: {ana/total:.4f}")
-        
-        # Total counts
-        if 'total_counts' in result:
-            output.append("\nTotal Counts:")
-            output.append(f"  Total Synthetic: {result['total_counts']['synthetic']:,}")
-            output.append(f"  Total Analytic: {result['total_counts']['analytic']:,}")
-        
-        # Statistical test results
-        if 'fishers_exact' in result:
-            output.append("\nStatistical Tests:")
-            output.append("Fisher's Exact Test:")
-            output.append(f"  Odds Ratio: {result['fishers_exact']['oddsratio']:.4f}")
-            output.append(f"  p-value: {result['fishers_exact']['p_value']:.4g}")
-        
-        # Effect size if available
-        if 'effect_size' in result:
-            output.append("\nEffect Size:")
-            output.append(f"  Cramer's V: {result['effect_size']['cramers_v']:.4f}")
-        
-        # Proportional change
-        if 'proportions' in result:
-            output.append("\nProportional Change:")
-            for period, stats in result['proportions'].items():
-                output.append(f"  {period}:")
-                output.append(f"    Synthetic: {stats['synthetic_ratio']:.4f}")
-                output.append(f"    Analytic: {stats['analytic_ratio']:.4f}")
-        
-        # Any error messages
-        if 'error' in result:
-            output.append(f"\nNote: {result['error']}")
-        
-        return "\n".join(output)
+    def _analyze_batched(self, corpus: CorpusReader, selected: List[str],
+                         sampler: Optional[AdaptiveSampler] = None) -> Dict:
+        results = {}
         
-    def analyze_analytical_shift(self):
-        """Analyze the shift from synthetic to analytical constructions with robust debug"""
-        print("Starting analytical shift analysis...")
+        logger.info("Starting enhanced corpus analysis...")
         
-        try:
-            # Get counts for each period
-            construction_counts = {}
-            total_synthetic = 0
-            total_analytic = 0
+        # Texts are grouped by pipeline so each model is loaded once and
+        # fed its texts in batches; only the current batch is held in memory
+        for (language, package), text_names in route_texts(selected, self.packages).items():
+            logger.info("Parsing %d texts with Stanza '%s' (%s)...", len(text_names), language, package)
+            nlp = self.pipelines.get(language, package)
             
-            for period, texts in self.period_data.items():
-                synthetic = 0
-                analytic = 0
-                
-                for text in texts:
-                    constructions = text.get('analytical_constructions', {})
-                    for const_type in ['passive_voice', 'perfect_tense', 'future_tense']:
-                        const_data = constructions.get(const_type, {})
-                        synthetic += const_data.get('synthetic', 0)
-                        analytic += const_data.get('analytic', 0)
-                
-                print(f"DEBUG: {period} total - synthetic: {synthetic}, analytic: {analytic}")
-                construction_counts[period] = (synthetic, analytic)
-                total_synthetic += synthetic
-                total_analytic += analytic
-
-            print(f"DEBUG: Total counts - synthetic: {total_synthetic}, analytic: {total_analytic}")
-            print(f"DEBUG: Construction counts: {construction_counts}")
-
-            # Create contingency table
-            contingency = np.array([[syn, ana] for period, (syn, ana) in construction_counts.items()])
-            print(f"DEBUG: Contingency table shape: {contingency.shape}")
-            print(f"DEBUG: Contingency table:\n{contingency}")
-
-            result = {
-                'name': 'Analytical Construction Shift',
-                'construction_counts': construction_counts,
-                'total_counts': {
-                    'synthetic': total_synthetic,
-                    'analytic': total_analytic
-                }
-            }
-
-            # Check if we have data for Fisher's exact test
-            if contingency.sum() > 0:
+            if sampler is not None:
+                for text_name in text_names:
+                    logger.info("Sampling %s...", text_name)
+                    try:
+                        results[text_name] = self.sampled_analysis(self._corpus_text(corpus, text_name), language,
+                                                                   sampler, text_name, nlp)
+                    except Exception as e:
+                        logger.error("Error analyzing %s: %s", text_name, e)
+                continue
+            
+            for start in range(0, len(text_names), self.batch_size):
+                batch = text_names[start:start + self.batch_size]
                 try:
-                    print("DEBUG: Attempting Fisher's exact test...")
-                    oddsratio, p_value = stats.fisher_exact(contingency)
-                    result['fishers_exact'] = {
-                        'oddsratio': float(oddsratio),
-                        'p_value': float(p_value)
-                    }
-                    print(f"DEBUG: Fisher's test results - OR: {oddsratio:.4f}, p: {p_value:.4f}")
+                    docs = nlp.bulk_process([self._corpus_text(corpus, name) for name in batch])
                 except Exception as e:
-                    print(f"DEBUG: Fisher's test failed: {str(e)}")
-                    result['error'] = f'Statistical test failed: {str(e)}'
-            else:
-                result['error'] = 'No data for statistical testing'
-
-            # Add proportions
-            proportions = {}
-            for period, (syn, ana) in construction_counts.items():
-                total = syn + ana
-                if total > 0:
-                    proportions[period] = {
-                        'synthetic_ratio': syn/total,
-                        'analytic_ratio': ana/total,
-                        'total_constructions': total
-                    }
-                else:
-                    proportions[period] = {
-                        'synthetic_ratio': 0,
-                        'analytic_ratio': 0,
-                        'total_constructions': 0
-                    }
-            result['proportions'] = proportions
-
-            print("DEBUG: Analysis complete.")
-            return result
-                    
-        except Exception as e:
-            print(f"DEBUG: Fatal error in analysis: {str(e)}")
-            print(f"DEBUG: Error traceback: {traceback.format_exc()}")
-            return {
-                'name': 'Analytical Construction Shift',
-                'error': str(e),
-                'construction_counts': construction_counts if 'construction_counts' in locals() else None
-            }
+                    logger.error("Error parsing batch %s: %s", batch, e)
+                    continue
                 
-    def cohens_d(self, group1, group2):
-        """Calculate Cohen's d effect size"""
-        n1, n2 = len(group1), len(group2)
-        var1, var2 = np.var(group1, ddof=1), np.var(group2, ddof=1)
-        pooled_se = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
-        return (np.mean(group1) - np.mean(group2)) / pooled_se
-
-    def bootstrap_ci(self, data, n_bootstrap=1000):
-        """Calculate 95% confidence intervals"""
-        bootstrap_samples = []
-        for _ in range(n_bootstrap):
-            sample = np.random.choice(data, size=len(data), replace=True)
-            bootstrap_samples.append(np.mean(sample))
-        return np.percentile(bootstrap_samples, [2.5, 97.5])
-
-    def format_results(self, result):
-        """Format a single analysis result with robust error handling"""
-        output = []
-        output.append(f"\n{result.get('name', 'Analysis Results')}")
-        output.append("-" * 40)
-        
-        # Always show construction counts if available
-        if 'construction_counts' in result:
-            output.append("\nConstruction Counts:")
-            for period, (syn, ana) in result['construction_counts'].items():
-                output.append(f"  {period}:")
-                output.append(f"    Synthetic: {syn:,}")
-                output.append(f"    Analytic: {ana:,}")
-        
-        if 'total_counts' in result:
-            totals = result['total_counts']
-            output.append("\nTotal Counts:")
-            output.append(f"  Synthetic: {totals['synthetic']:,}")
-            output.append(f"  Analytic: {totals['analytic']:,}")
-        
-        # Show proportions
-        if 'proportions' in result:
-            output.append("\nProportions:")
-            for period, stats in result['proportions'].items():
-                output.append(f"  {period}:")
-                output.append(f"    Synthetic Ratio: {stats['synthetic_ratio']:.4f}")
-                output.append(f"    Analytic Ratio: {stats['analytic_ratio']:.4f}")
-                output.append(f"    Total Constructions: {stats['total_constructions']:,}")
-
-        # Show statistical test results
-        if 'fishers_exact' in result:
-            output.append("\nFisher's Exact Test:")
-            fisher = result['fishers_exact']
-            output.append(f"  Odds ratio: {fisher['oddsratio']:.4f}")
-            output.append(f"  p-value: {fisher['p_value']:.4g}")
-
-        # Show any errors
-        if 'error' in result:
-            output.append(f"\nAnalysis Note: {result['error']}")
-            
-        return "\n".join(output)
+                for text_name, doc in zip(batch, docs):
+                    logger.info("Analyzing %s...", text_name)
+                    try:
+                        results[text_name] = self.integrated_analysis(doc, language)
+                    except Exception as e:
+                        logger.error("Error analyzing %s: %s", text_name, e)
+                        continue
+        
+        # Report results in corpus order rather than pipeline order
+        return {name: results[name] for name in corpus if name in results}
+
+    def _analyze_scheduled(self, corpus: CorpusReader, selected: List[str], scheduler: ResourceScheduler,
+                           sampler: Optional[AdaptiveSampler] = None) -> Dict:
+        # Worker entry points must live in an importable module
+        import run_analysis
+        costs = {name: count_tokens(corpus.read(name)) for name in selected}
+        init_args = (str(self.corpus_dir), self.packages, logging.getLogger().level, self.quantize,
+                     str(self.sentence_cache.path) if self.sentence_cache is not None else None,
+                     str(self.random_tree_cache) if self.random_tree_cache else None)
+        # Workers drop the same sentences; only filtered texts' decisions are sent
+        filtered = {name: decision for name, decision in self.deduplication.items()
+                    if decision['action'] == 'filter'}
+        results = {}
+        for text_name, result, error in scheduler.run(run_analysis._analyze_corpus_text, costs,
+                                                       (sampler, filtered),
+                                                       initializer=run_analysis._init_worker,
+                                                       initargs=init_args):
+            if error is not None:
+                logger.error("Error analyzing %s: %s", text_name, error)
+                continue
+            logger.info("Analyzed %s", text_name)
+            results[text_name] = result
+        return {name: results[name] for name in corpus if name in results}
 
-    def run_all_analyses(self):
-        """Run all analyses and format results properly"""
-        formatted_output = ["Enhanced Statistical Analysis Results", "=" * 50]
-        
-        # Run analyses
-        dependency_results = self.analyze_dependency_evolution()
-        analytical_results = self.analyze_analytical_shift()
-        article_results = self.analyze_article_development()
-
-        # Format dependency evolution
-        formatted_output.extend(["\ndependency_evolution:", self.format_results(dependency_results)])
-        formatted_output.append("=" * 50)
-
-        # Format analytical shift - Special handling
-        formatted_output.append("\nanalytical_shift:")
-        analytical_output = []
-        analytical_output.append("\nConstruction Counts by Period:")
-        for period, (syn, ana) in analytical_results['construction_counts'].items():
-            analytical_output.append(f"  {period}:")
-            analytical_output.append(f"    Synthetic: {syn:,}")
-            analytical_output.append(f"    Analytic: {ana:,}")
-            total = syn + ana
-            if total > 0:
-                analytical_output.append(f"    Synthetic Ratio: {syn/total:.4f}")
-                analytical_output.append(f"    Analytic Ratio: {ana/total:.4f}")
-
-        analytical_output.append("\nStatistical Tests:")
-        if 'fishers_exact' in analytical_results:
-            analytical_output.append("Fisher's Exact Test:")
-            fisher = analytical_results['fishers_exact']
-            analytical_output.append(f"  Odds Ratio: {fisher['oddsratio']:.4f}")
-            analytical_output.append(f"  p-value: {fisher['p_value']:.4g}")
-
-        if 'proportions' in analytical_results:
-            analytical_output.append("\nProportional Changes:")
-            for period, stats in analytical_results['proportions'].items():
-                analytical_output.append(f"  {period}:")
-                analytical_output.append(f"    Synthetic: {stats['synthetic_ratio']:.4f}")
-                analytical_output.append(f"    Analytic: {stats['analytic_ratio']:.4f}")
-
-        formatted_output.append("\n".join(analytical_output))
-        formatted_output.append("=" * 50)
-
-        # Format article development
-        formatted_output.extend(["\narticle_development:", self.format_results(article_results)])
-        formatted_output.append("=" * 50)
-
-        formatted_output = "\n".join(formatted_output)
 
-        return {
-            'raw_results': {
-                'dependency_evolution': dependency_results,
-                'analytical_shift': analytical_results,
-                'article_development': article_results
-            },
-            'formatted_output': formatted_output
-        }
-    
 if __name__ == "__main__":
+    # Staged, resumable runs are available through run_analysis.py
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    
     # Initialize and run corpus analysis
     tracker = EnhancedComplexityTracker()
-    print("Starting enhanced analysis of complete corpus...")
+    logger.info("Starting enhanced analysis of complete corpus...")
     results = tracker.analyze_full_corpus()
 
-        # Debug print - check what's in results
     for text_name, text_data in results.items():
-        print(f"\nAnalyzing {text_name}:")
         if 'analytical_constructions' in text_data:
-            print(f"Analytical constructions found: {text_data['analytical_constructions']}")
+            logger.debug("Analytical constructions found in %s: %s", text_name, text_data['analytical_constructions'])
         else:
-            print("No analytical constructions found")
+            logger.debug("No analytical constructions found in %s", text_name)
     
     # Run statistical analyses
     stats_analyzer = StatisticalAnalysis(results)
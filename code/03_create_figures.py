@@ -7,21 +7,77 @@ This script generates the two main figures:
 2. Analytical vs synthetic construction shift
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
+import logging
+from pathlib import Path
 
-# Set style for academic publication
-plt.style.use('seaborn-v0_8-whitegrid')
-sns.set_palette("husl")
+logger = logging.getLogger(__name__)
 
-def create_article_development_figure():
+RESULTS_DIR = Path(__file__).resolve().parent.parent / "results"
+
+# Published values (data/processed/stanza_output.json); used when the
+# figure functions are called without data
+PUBLISHED_ARTICLE_DATA = {
+    'means': [0.000, 0.000, 107.018],
+    'errors': [0.000, 0.000, 22.970],
+    'p_value': 0.0007,
+    'ci': (85.8, 122.4)
+}
+PUBLISHED_CONSTRUCTION_DATA = {
+    'synthetic_counts': [6182, 0],
+    'analytical_counts': [0, 22],
+    'p_value': 0.0001
+}
+
+def figure_data_from_analysis(raw_results):
+    """
+    Build figure inputs from StatisticalAnalysis.run_all_analyses()['raw_results'],
+    e.g. for results computed on new or synthetic corpora
+    """
+    articles = raw_results['article_development']
+    period_stats = articles['period_stats']
+    article_data = {
+        'means': [float(period_stats[p]['mean']) for p in ['Classical', 'Medieval', 'Spanish']],
+        'errors': [float(period_stats[p]['std']) for p in ['Classical', 'Medieval', 'Spanish']],
+        'p_value': float(articles['non_parametric']['kruskal_wallis']['p_value']),
+        'ci': tuple(float(v) for v in period_stats['Spanish']['ci'])
+    }
+    
+    shift = raw_results['analytical_shift']
+    counts = shift['construction_counts']
+    construction_data = {
+        'synthetic_counts': [counts['Classical'][0], counts['Spanish'][0]],
+        'analytical_counts': [counts['Classical'][1], counts['Spanish'][1]],
+        'p_value': shift.get('fishers_exact', {}).get('p_value')
+    }
+    return article_data, construction_data
+
+def _pyplot():
+    """
+    matplotlib.pyplot in the publication style, imported when a figure is
+    drawn so that loading this module (e.g. for figure_data_from_analysis)
+    stays cheap. Every bar sets its own color, so no seaborn palette is needed.
+    """
+    import matplotlib.pyplot as plt
+    plt.style.use('seaborn-v0_8-whitegrid')
+    return plt
+
+def _significance_stars(p_value):
+    if p_value is None:
+        return ''
+    return '***' if p_value < 0.001 else '**' if p_value < 0.01 else '*' if p_value < 0.05 else 'ns'
+
+def create_article_development_figure(data=None, output_dir=None, show=True):
     """Create Figure 1: Article Development Across Periods"""
+    plt = _pyplot()
+    
+    data = data or PUBLISHED_ARTICLE_DATA
+    output_dir = Path(output_dir) if output_dir else RESULTS_DIR / "figures"
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Data from corrected analysis
     periods = ['Classical\nLatin', 'Medieval\nLatin', 'Early\nSpanish']
-    means = [0.000, 0.000, 107.018]
-    errors = [0.000, 0.000, 22.970]
+    means = data['means']
+    errors = data['errors']
     
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 8))
@@ -35,15 +91,18 @@ def create_article_development_figure():
     ax.set_ylabel('Articles per 1000 words', fontsize=14, fontweight='bold')
     ax.set_title('Development of Article System from Latin to Spanish', 
                  fontsize=16, fontweight='bold', pad=20)
-    ax.set_ylim(0, 140)
+    # Annotation positions are fractions of the axis height so they scale
+    # with the data; the published figure uses a 0-140 axis
+    y_max = max(140, max(m + e for m, e in zip(means, errors)) + 10)
+    ax.set_ylim(0, y_max)
     ax.grid(axis='y', alpha=0.3)
     
     # Add significance annotation
-    ax.text(2, 120, '***', fontsize=20, ha='center', fontweight='bold')
-    ax.text(2, 115, 'p = 0.0007', fontsize=12, ha='center', style='italic')
+    ax.text(2, y_max * 120 / 140, _significance_stars(data['p_value']), fontsize=20, ha='center', fontweight='bold')
+    ax.text(2, y_max * 115 / 140, f"p = {data['p_value']:.4f}", fontsize=12, ha='center', style='italic')
     
     # Add confidence interval text
-    ax.text(2, 95, '95% CI: [85.8, 122.4]', fontsize=10, ha='center')
+    ax.text(2, y_max * 95 / 140, f"95% CI: [{data['ci'][0]:.1f}, {data['ci'][1]:.1f}]", fontsize=10, ha='center')
     
     # Improve x-axis labels
     ax.set_xlabel('Historical Period', fontsize=14, fontweight='bold')
@@ -61,21 +120,29 @@ def create_article_development_figure():
     plt.tight_layout()
     
     # Save as PDF for publication
-    plt.savefig('/Users/znielsen/projects/python/linguistics/computation-complexity/display/latin-spanish-complexity/results/figures/figure1_articles.pdf', 
+    plt.savefig(output_dir / 'figure1_articles.pdf', 
                 dpi=300, bbox_inches='tight')
-    plt.savefig('/Users/znielsen/projects/python/linguistics/computation-complexity/display/latin-spanish-complexity/results/figures/figure1_articles.png', 
+    plt.savefig(output_dir / 'figure1_articles.png', 
                 dpi=300, bbox_inches='tight')
     
-    print("Figure 1 saved: Article Development Across Periods")
-    plt.show()
+    logger.info("Figure 1 saved: Article Development Across Periods")
+    if show:
+        plt.show()
+    plt.close(fig)
 
-def create_construction_shift_figure():
+def create_construction_shift_figure(data=None, output_dir=None, show=True):
     """Create Figure 2: Analytical vs Synthetic Constructions"""
+    plt = _pyplot()
+    
+    data = data or PUBLISHED_CONSTRUCTION_DATA
+    output_dir = Path(output_dir) if output_dir else RESULTS_DIR / "figures"
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Data from analysis
     periods = ['Classical Latin', 'Early Spanish']
-    synthetic_counts = [6182, 0]
-    analytical_counts = [0, 22]
+    synthetic_counts = data['synthetic_counts']
+    analytical_counts = data['analytical_counts']
+    # The published figure uses a 0-6800 axis for a maximum count of 6182
+    y_max = max(max(synthetic_counts + analytical_counts) * 1.1, 1)
     
     # Create figure with side-by-side bars
     fig, ax = plt.subplots(figsize=(12, 8))
@@ -106,33 +173,37 @@ def create_construction_shift_figure():
         for bar in bars:
             height = bar.get_height()
             if height > 0:
-                ax.text(bar.get_x() + bar.get_width()/2., height + 50,
+                ax.text(bar.get_x() + bar.get_width()/2., height + y_max * 50 / 6800,
                        f'{int(height)}', ha='center', va='bottom', 
                        fontsize=11, fontweight='bold')
     
     # Add significance annotation
-    ax.text(0.5, 6500, "Fisher's Exact Test", ha='center', 
-            fontsize=12, style='italic')
-    ax.text(0.5, 6200, 'p = 0.0001', ha='center', 
-            fontsize=12, fontweight='bold')
-    ax.text(0.5, 5900, 'Complete Structural Transition', ha='center', 
-            fontsize=11)
+    if data['p_value'] is not None:
+        ax.text(0.5, y_max * 6500 / 6800, "Fisher's Exact Test", ha='center', 
+                fontsize=12, style='italic')
+        ax.text(0.5, y_max * 6200 / 6800, f"p = {data['p_value']:.4f}", ha='center', 
+                fontsize=12, fontweight='bold')
+    if not (synthetic_counts[1] or analytical_counts[0]):
+        ax.text(0.5, y_max * 5900 / 6800, 'Complete Structural Transition', ha='center', 
+                fontsize=11)
     
     # Set y-axis to accommodate both scales
-    ax.set_ylim(0, 6800)
+    ax.set_ylim(0, y_max)
     
     plt.tight_layout()
     
     # Save as PDF for publication
-    plt.savefig('/Users/znielsen/projects/python/linguistics/computation-complexity/display/latin-spanish-complexity/results/figures/figure2_constructions.pdf', 
+    plt.savefig(output_dir / 'figure2_constructions.pdf', 
                 dpi=300, bbox_inches='tight')
-    plt.savefig('/Users/znielsen/projects/python/linguistics/computation-complexity/display/latin-spanish-complexity/results/figures/figure2_constructions.png', 
+    plt.savefig(output_dir / 'figure2_constructions.png', 
                 dpi=300, bbox_inches='tight')
     
-    print("Figure 2 saved: Analytical vs Synthetic Constructions")
-    plt.show()
+    logger.info("Figure 2 saved: Analytical vs Synthetic Constructions")
+    if show:
+        plt.show()
+    plt.close(fig)
 
-def create_summary_stats_table():
+def create_summary_stats_table(output_dir=None):
     """Create a summary table of key statistical results"""
     
     import pandas as pd
@@ -186,13 +257,16 @@ def create_summary_stats_table():
     df = pd.DataFrame(results_data)
     
     # Save as CSV
-    df.to_csv('/Users/znielsen/projects/python/linguistics/computation-complexity/display/latin-spanish-complexity/results/tables/statistical_summary.csv', 
+    output_dir = Path(output_dir) if output_dir else RESULTS_DIR / "tables"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output_dir / 'statistical_summary.csv', 
               index=False)
     
-    print("Statistical summary table saved")
+    logger.info("Statistical summary table saved")
     return df
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("Creating figures for Latin-Spanish complexity conservation paper...")
     print("=" * 60)
     
@@ -0,0 +1,314 @@
+"""
+Mergeable aggregates for corpus statistics.
+
+Each analyzed text is reduced to a small PeriodAggregate holding its
+contributions, and aggregates merge associatively (merge order does not
+change the result), so period statistics fold texts one at a time in
+memory bounded per metric rather than per text. Aggregates from separate
+runs, over disjoint sets of texts, combine the same way.
+
+    CountVector  named counts (e.g. synthetic/analytic constructions)
+    Histogram    counts over non-negative integer bins
+    Moments      count, mean, sum of squared deviations (Welford), min, max
+    Sample       bottom-k sample of per-text values for rank tests and
+                 bootstrap intervals; exact while it holds every value
+
+    aggregates = CorpusAggregates(['Classical', 'Medieval', 'Spanish'])
+    aggregates.add('Classical', text_aggregate)
+    aggregates.merge(CorpusAggregates.load('other_run/aggregates.json'))
+    aggregates.periods['Classical'].metrics['average_depth'].moments.mean
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from frequency_index import string_key
+
+# Per-text values kept per metric and period for rank tests and bootstraps
+SAMPLE_SIZE = 5000
+
+
+class CountVector:
+    """Named counts; merging adds them"""
+
+    def __init__(self, counts: Optional[Dict[str, float]] = None):
+        self.counts: Dict[str, float] = dict(counts or {})
+
+    def add(self, name: str, value: float = 1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def merge(self, other: 'CountVector') -> 'CountVector':
+        for name, value in other.counts.items():
+            self.add(name, value)
+        return self
+
+    def __getitem__(self, name: str) -> float:
+        return self.counts.get(name, 0)
+
+    def total(self) -> float:
+        return sum(self.counts.values())
+
+    def to_dict(self) -> Dict:
+        return dict(self.counts)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CountVector':
+        return cls(data)
+
+
+class Histogram:
+    """Counts over bins 0..k; merging adds them bin by bin"""
+
+    def __init__(self, counts: Optional[Iterable[int]] = None):
+        self.counts = np.asarray(list(counts) if counts is not None else [], dtype=np.int64)
+
+    def add_counts(self, counts: Dict[int, int]):
+        """Add {bin: count}"""
+        if not counts:
+            return
+        bins = np.fromiter((int(b) for b in counts), dtype=np.int64, count=len(counts))
+        values = np.fromiter((int(v) for v in counts.values()), dtype=np.int64, count=len(counts))
+        self._grow(int(bins.max()) + 1)
+        np.add.at(self.counts, bins, values)
+
+    def _grow(self, size: int):
+        if size > self.counts.size:
+            self.counts = np.concatenate([self.counts, np.zeros(size - self.counts.size, dtype=np.int64)])
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        self._grow(other.counts.size)
+        self.counts[:other.counts.size] += other.counts
+        return self
+
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def mean(self) -> float:
+        total = self.total()
+        return float(np.dot(np.arange(self.counts.size), self.counts) / total) if total else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Smallest bin whose cumulative share reaches q"""
+        total = self.total()
+        if not total:
+            return math.nan
+        return float(np.searchsorted(np.cumsum(self.counts), q * total, side='left'))
+
+    def to_dict(self) -> Dict:
+        return {'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Histogram':
+        return cls(data['counts'])
+
+
+class Moments:
+    """Running count, mean and sum of squared deviations (m2), with min and max"""
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 min: float = math.inf, max: float = -math.inf):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    def add(self, value: float):
+        """Welford's update"""
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'Moments') -> 'Moments':
+        """Chan et al.'s pairwise combination"""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+        else:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 0) -> float:
+        return self.m2 / (self.n - ddof) if self.n > ddof else math.nan
+
+    def std(self, ddof: int = 0) -> float:
+        return math.sqrt(self.variance(ddof))
+
+    def to_dict(self) -> Dict:
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Moments':
+        return cls(**data)
+
+
+class Sample:
+    """
+    Bottom-k sample: the `size` values with the smallest keys (hashes of
+    their text ids), in arrival order. Merging keeps the smallest keys of
+    the union, so the result does not depend on how texts were split
+    across workers or runs.
+    """
+
+    def __init__(self, size: int = SAMPLE_SIZE, keys: Iterable[int] = (),
+                 values: Iterable[float] = (), seen: int = 0):
+        self.size = size
+        self.keys = np.asarray(list(keys), dtype=np.uint64)
+        self.values = np.asarray(list(values), dtype=np.float64)
+        self.seen = seen
+
+    def add(self, text_id: str, value: float):
+        self.keys = np.append(self.keys, np.uint64(string_key(text_id)))
+        self.values = np.append(self.values, value)
+        self.seen += 1
+        self._truncate()
+
+    def merge(self, other: 'Sample') -> 'Sample':
+        self.keys = np.concatenate([self.keys, other.keys])
+        self.values = np.concatenate([self.values, other.values])
+        self.seen += other.seen
+        self._truncate()
+        return self
+
+    def _truncate(self):
+        if self.keys.size > self.size:
+            keep = np.sort(np.argsort(self.keys, kind='stable')[:self.size])
+            self.keys, self.values = self.keys[keep], self.values[keep]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every value seen is still held"""
+        return self.values.size == self.seen
+
+    def to_dict(self) -> Dict:
+        return {'size': self.size, 'keys': [int(k) for k in self.keys],
+                'values': self.values.tolist(), 'seen': self.seen}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Sample':
+        return cls(**data)
+
+
+class MetricAggregate:
+    """Moments and a value sample of one per-text metric"""
+
+    def __init__(self, moments: Optional[Moments] = None, sample: Optional[Sample] = None):
+        self.moments = moments or Moments()
+        self.sample = sample or Sample()
+
+    def add(self, text_id: str, value: float):
+        self.moments.add(value)
+        self.sample.add(text_id, value)
+
+    def merge(self, other: 'MetricAggregate') -> 'MetricAggregate':
+        self.moments.merge(other.moments)
+        self.sample.merge(other.sample)
+        return self
+
+    def to_dict(self) -> Dict:
+        return {'moments': self.moments.to_dict(), 'sample': self.sample.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetricAggregate':
+        return cls(Moments.from_dict(data['moments']), Sample.from_dict(data['sample']))
+
+
+class PeriodAggregate:
+    """Per-text metrics, count vectors and histograms of one text or period"""
+
+    def __init__(self):
+        self.texts = 0
+        self.metrics: Dict[str, MetricAggregate] = {}
+        self.counts: Dict[str, CountVector] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def metric(self, name: str) -> MetricAggregate:
+        return self.metrics.setdefault(name, MetricAggregate())
+
+    def count(self, name: str) -> CountVector:
+        return self.counts.setdefault(name, CountVector())
+
+    def histogram(self, name: str) -> Histogram:
+        return self.histograms.setdefault(name, Histogram())
+
+    def merge(self, other: 'PeriodAggregate') -> 'PeriodAggregate':
+        self.texts += other.texts
+        for name, value in other.metrics.items():
+            self.metric(name).merge(value)
+        for name, value in other.counts.items():
+            self.count(name).merge(value)
+        for name, value in other.histograms.items():
+            self.histogram(name).merge(value)
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            'texts': self.texts,
+            'metrics': {name: value.to_dict() for name, value in self.metrics.items()},
+            'counts': {name: value.to_dict() for name, value in self.counts.items()},
+            'histograms': {name: value.to_dict() for name, value in self.histograms.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PeriodAggregate':
+        aggregate = cls()
+        aggregate.texts = data['texts']
+        aggregate.metrics = {name: MetricAggregate.from_dict(v) for name, v in data['metrics'].items()}
+        aggregate.counts = {name: CountVector.from_dict(v) for name, v in data['counts'].items()}
+        aggregate.histograms = {name: Histogram.from_dict(v) for name, v in data['histograms'].items()}
+        return aggregate
+
+
+class CorpusAggregates:
+    """PeriodAggregates keyed by period, in a fixed period order"""
+
+    def __init__(self, periods: Iterable[str] = ()):
+        self.periods: Dict[str, PeriodAggregate] = {period: PeriodAggregate() for period in periods}
+
+    def add(self, period: str, aggregate: PeriodAggregate):
+        self.periods.setdefault(period, PeriodAggregate()).merge(aggregate)
+
+    def merge(self, other: 'CorpusAggregates') -> 'CorpusAggregates':
+        for period, aggregate in other.periods.items():
+            self.add(period, aggregate)
+        return self
+
+    @property
+    def texts(self) -> int:
+        return sum(aggregate.texts for aggregate in self.periods.values())
+
+    def to_dict(self) -> Dict:
+        return {period: aggregate.to_dict() for period, aggregate in self.periods.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CorpusAggregates':
+        aggregates = cls()
+        aggregates.periods = {period: PeriodAggregate.from_dict(v) for period, v in data.items()}
+        return aggregates
+
+    def save(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CorpusAggregates':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,365 @@
+"""
+Latin-Spanish parallel passage alignment.
+
+track_clause_transformations counts constructions in each language on its
+own. To see what an ablative absolute or a participle *becomes*, a Latin
+source has to be paired with its Spanish (or other Romance) rendering.
+PassageAligner does this in two steps:
+
+Sentence level. A dynamic program over the two sentence sequences chooses
+1-1, 1-0, 0-1, 2-1 and 1-2 beads. Bead cost is a length term (the
+rendering's character length against the source length scaled by the
+texts' overall ratio, as in Gale and Church) plus a lexical term (1 -
+Dice overlap of normalized cognate stems). Stems are hashed into
+bit sets packed in uint64 words, so overlaps are AND + popcount on NumPy
+arrays.
+The program only visits a band of cells around the diagonal (`band`
+sentences either side of the length-proportional path), one row at a
+time: the moves into a row are gathered from the previous two rows as
+vectors, and runs of 0-1 skips within the row are resolved with a
+running minimum. The work is linear in text length times band width.
+
+Phrase level. Within each aligned bead, every Latin construction (given
+as (construction, head word) anchors) is paired with the Spanish clause
+whose subtree shares the most stems with the Latin subtree, with a small
+preference for the same relative position. Spanish clauses are typed as
+temporal_clause, causal_clause, gerund, relative_clause, participle,
+infinitive or finite_verb, and each pair records the rendering:
+
+    aligner = PassageAligner()
+    beads = aligner.align(sentence_tokens(latin_doc), sentence_tokens(spanish_doc))
+    pairs = aligner.construction_pairs(latin_doc, spanish_doc, beads, anchors)
+    transformation_counts(pairs)['ablative_absolute']['temporal_clause']
+
+EnhancedComplexityTracker.align_transformations wraps these with the
+tracker's own Latin construction matcher.
+"""
+
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from feature_index import feature_query
+from frequency_index import string_key
+
+# Bead moves: (source sentences, target sentences)
+MOVES = {1: (1, 1), 2: (1, 0), 3: (0, 1), 4: (1, 2), 5: (2, 1)}
+# Old and modern Spanish subordinators by the relation they mark
+TEMPORAL_MARKERS = frozenset({'cuando', 'quando', 'mientras', 'después', 'despues', 'luego', 'desque',
+                              'antes', 'hasta', 'tanto'})
+CAUSAL_MARKERS = frozenset({'porque', 'pues', 'ca', 'como', 'ya', 'puesto'})
+CLAUSE_RELATIONS = ('advcl', 'acl', 'ccomp', 'xcomp', 'csubj', 'conj', 'parataxis', 'root')
+STEM_LENGTH = 4
+# Band cells whose bead costs are computed at once
+BAND_BLOCK = 1 << 15
+
+_GERUND = feature_query(VerbForm='Ger')
+_PARTICIPLE = feature_query(VerbForm='Part')
+_INFINITIVE = feature_query(VerbForm='Inf')
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a uint64 array, summed over its last axis"""
+    words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((words * np.uint64(0x0101010101010101)) >> np.uint64(56)).sum(axis=-1)
+
+
+@lru_cache(maxsize=1 << 16)
+def stem(token: str) -> Optional[str]:
+    """
+    Cognate stem of a token: casefolded, unaccented, with Latin spellings
+    merged into their Romance outcomes (ae/oe -> e, j -> i, v -> u, y -> i,
+    ph -> f) and cut to STEM_LENGTH characters. Short tokens (mostly
+    function words) have no stem, except numbers.
+    """
+    token = ''.join(c for c in unicodedata.normalize('NFD', token.casefold())
+                    if unicodedata.category(c) != 'Mn')
+    if token.isdigit():
+        return token
+    if len(token) < STEM_LENGTH:
+        return None
+    for old, new in (('ae', 'e'), ('oe', 'e'), ('ph', 'f'), ('j', 'i'), ('v', 'u'), ('y', 'i')):
+        token = token.replace(old, new)
+    return token[:STEM_LENGTH]
+
+
+def stems(tokens: Iterable[str]) -> set:
+    return {s for s in map(stem, tokens) if s}
+
+
+def sentence_tokens(doc) -> List[List[str]]:
+    """Word forms per sentence of a parsed document"""
+    return [[word.text for word in sentence.words] for sentence in doc.sentences]
+
+
+def subtree(sentence, head) -> List:
+    """The head word and its descendants, in sentence order"""
+    children = defaultdict(list)
+    for word in sentence.words:
+        children[word.head].append(word)
+    nodes, stack = [], [head]
+    while stack:
+        word = stack.pop()
+        nodes.append(word)
+        stack.extend(children[word.id])
+    return sorted(nodes, key=lambda word: word.id)
+
+
+def rendering_type(word, sentence) -> str:
+    """How a Spanish clause headed by `word` is built"""
+    if word.deprel == 'acl:relcl':
+        return 'relative_clause'
+    if _GERUND(word):
+        return 'gerund'
+    if _PARTICIPLE(word):
+        return 'participle'
+    if _INFINITIVE(word):
+        return 'infinitive'
+    markers = {w.text.casefold() for w in sentence.words
+               if w.head == word.id and (w.deprel or '').startswith('mark')}
+    if markers & TEMPORAL_MARKERS:
+        return 'temporal_clause'
+    if markers & CAUSAL_MARKERS:
+        return 'causal_clause'
+    return 'finite_verb'
+
+
+def spanish_clauses(sentence) -> List:
+    """Clause heads of a Spanish sentence: verbs heading a clause relation"""
+    return [word for word in sentence.words
+            if word.upos in ('VERB', 'AUX') and (word.deprel or '').split(':')[0] in CLAUSE_RELATIONS
+            or word.deprel == 'acl:relcl']
+
+
+def _union(bits: np.ndarray, indices: List[np.ndarray]) -> np.ndarray:
+    union = bits[indices[0]]
+    for index in indices[1:]:
+        union = union | bits[index]
+    return union
+
+
+class PassageAligner:
+    """
+    band: sentences either side of the diagonal the program may visit
+    (default: 2% of the longer text, at least 25)
+    lexical_weight: weight of the stem-overlap cost against the length cost
+    skip_cost: cost of leaving a sentence unaligned (1-0 or 0-1)
+    merge_cost: extra cost of a 2-1 or 1-2 bead
+    feature_bits: size of the hashed stem sets (a multiple of 64)
+    """
+
+    def __init__(self, band: Optional[int] = None, lexical_weight: float = 4.0, skip_cost: float = 4.5,
+                 merge_cost: float = 1.0, length_variance: float = 6.8, feature_bits: int = 256):
+        self.band = band
+        self.lexical_weight = lexical_weight
+        self.skip_cost = skip_cost
+        self.merge_cost = merge_cost
+        self.length_variance = length_variance
+        self.feature_bits = feature_bits
+
+    def _features(self, sentences: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Character lengths and hashed stem sets packed into uint64 words, one row per sentence"""
+        lengths = np.array([sum(len(t) for t in tokens) + max(len(tokens) - 1, 0) for tokens in sentences],
+                           dtype=np.float64)
+        bits = np.zeros((len(sentences), self.feature_bits), dtype=bool)
+        for row, tokens in enumerate(sentences):
+            for s in stems(tokens):
+                bits[row, string_key(s) % self.feature_bits] = True
+        return lengths, np.packbits(bits, axis=1).view(np.uint64)
+
+    def _bead_costs(self, source_length: np.ndarray, target_length: np.ndarray,
+                    source_bits: np.ndarray, target_bits: np.ndarray, ratio: float) -> np.ndarray:
+        """Length plus lexical cost of pairing source rows with target rows"""
+        expected = source_length * ratio
+        delta = (target_length - expected) / np.sqrt(self.length_variance * (expected + target_length) / 2 + 1)
+        overlap = popcount(source_bits & target_bits)
+        sizes = popcount(source_bits) + popcount(target_bits)
+        dice = np.divide(2 * overlap, sizes, out=np.zeros(overlap.shape), where=sizes > 0)
+        return delta * delta / 2 + self.lexical_weight * (1 - dice)
+
+    def _band_costs(self, sources: List[np.ndarray], targets: List[np.ndarray],
+                    source_length: np.ndarray, source_bits: np.ndarray, target_length: np.ndarray,
+                    target_bits: np.ndarray, ratio: float) -> np.ndarray:
+        """
+        Cost of the bead joining source sentences `sources` (row vectors)
+        with target sentences `targets` (band arrays) at every band cell;
+        inf where a sentence index is out of range. Computed in blocks of
+        rows to bound the gathered stem sets.
+        """
+        shape = targets[0].shape
+        result = np.full(shape, np.inf)
+        step = max(1, BAND_BLOCK // shape[1])
+        for start in range(0, shape[0], step):
+            block = slice(start, start + step)
+            source_index = [np.broadcast_to(index[block], targets[0][block].shape) for index in sources]
+            target_index = [index[block] for index in targets]
+            valid = np.all([(index >= 0) & (index < len(source_length)) for index in source_index]
+                           + [(index >= 0) & (index < len(target_length)) for index in target_index], axis=0)
+            if not valid.any():
+                continue
+            source_index = [index[valid] for index in source_index]
+            target_index = [index[valid] for index in target_index]
+            costs = self._bead_costs(
+                sum(source_length[index] for index in source_index) + len(source_index) - 1,
+                sum(target_length[index] for index in target_index) + len(target_index) - 1,
+                _union(source_bits, source_index), _union(target_bits, target_index), ratio)
+            result[block][valid] = costs
+        return result
+
+    def align(self, source: Sequence[Sequence[str]],
+              target: Sequence[Sequence[str]]) -> List[Tuple[List[int], List[int], float]]:
+        """
+        Align two sentence sequences (token lists); returns beads
+        (source indices, target indices, cost) in order, covering both
+        """
+        n, m = len(source), len(target)
+        if not n or not m:
+            return ([([i], [], self.skip_cost) for i in range(n)]
+                    + [([], [j], self.skip_cost) for j in range(m)])
+        source_length, source_bits = self._features(source)
+        target_length, target_bits = self._features(target)
+        ratio = target_length.sum() / source_length.sum() if source_length.sum() else 1.0
+        band = self.band or max(25, int(0.02 * max(n, m)))
+        width = min(2 * band + 1, m + 1)
+        centers = np.rint(np.arange(n + 1) * (m / n)).astype(np.int64)
+        low = np.clip(centers - band, 0, m + 1 - width)
+
+        offsets = np.arange(width)
+        # Target sentence boundary of every band cell, and source boundary per row
+        columns = low[:, None] + offsets
+        rows = np.arange(n + 1)[:, None]
+        features = (source_length, source_bits, target_length, target_bits, ratio)
+        pair_11 = self._band_costs([rows - 1], [columns - 1], *features)
+        pair_12 = self._band_costs([rows - 1], [columns - 2, columns - 1], *features) + self.merge_cost
+        pair_21 = self._band_costs([rows - 2, rows - 1], [columns - 1], *features) + self.merge_cost
+
+        cost = np.full((n + 1, width), np.inf)
+        moves = np.zeros((n + 1, width), dtype=np.int8)
+        skip = self.skip_cost
+        ramp = offsets * skip
+        unreachable = np.full(width, np.inf)
+
+        def previous(row: int, targets: np.ndarray) -> np.ndarray:
+            """cost[row] at target boundaries `targets`, inf outside its band"""
+            index = targets - low[row]
+            valid = (index >= 0) & (index < width)
+            values = np.full(width, np.inf)
+            values[valid] = cost[row, index[valid]]
+            return values
+
+        for row in range(n + 1):
+            if row == 0:
+                candidates = np.where(columns[0] == 0, 0.0, np.inf)
+                codes = np.zeros(width, dtype=np.int8)
+            else:
+                # Moves in MOVES order; 0-1 runs are resolved below
+                stacked = np.vstack([
+                    previous(row - 1, columns[row] - 1) + pair_11[row],
+                    previous(row - 1, columns[row]) + skip,
+                    unreachable,
+                    previous(row - 1, columns[row] - 2) + pair_12[row],
+                    previous(row - 2, columns[row] - 1) + pair_21[row] if row >= 2 else unreachable,
+                ])
+                codes = (np.argmin(stacked, axis=0) + 1).astype(np.int8)
+                candidates = stacked.min(axis=0)
+            # 0-1 runs within the row: cost[j] = min(candidates[j], cost[j - 1] + skip)
+            best = np.minimum.accumulate(candidates - ramp) + ramp
+            codes[best < candidates - 1e-9] = 3
+            cost[row], moves[row] = best, codes
+
+        if not np.isfinite(cost[n, m - low[n]]):
+            raise RuntimeError(f"no alignment within a band of {band} sentences; raise `band`")
+        beads = []
+        row, column = n, m
+        while row > 0 or column > 0:
+            code = int(moves[row, column - low[row]])
+            taken, given = MOVES[code]
+            previous_row, previous_column = row - taken, column - given
+            bead_cost = cost[row, column - low[row]] - cost[previous_row, previous_column - low[previous_row]]
+            beads.append((list(range(previous_row, row)), list(range(previous_column, column)), float(bead_cost)))
+            row, column = previous_row, previous_column
+        beads.reverse()
+        return beads
+
+    def construction_pairs(self, source_doc, target_doc, beads,
+                           anchors: Callable[[object], List[Tuple[str, object]]],
+                           min_overlap: float = 0.0) -> List[Dict]:
+        """
+        Pair each Latin construction anchor in an aligned bead with the
+        best-matching Spanish clause; anchors without a rendering (in 1-0
+        beads, or with no clause left) are recorded as 'unaligned'
+        """
+        pairs = []
+        for source_rows, target_rows, _ in beads:
+            clauses = []
+            target_words = [w for row in target_rows for w in target_doc.sentences[row].words]
+            position = {id(w): i / max(len(target_words) - 1, 1) for i, w in enumerate(target_words)}
+            for row in target_rows:
+                sentence = target_doc.sentences[row]
+                for head in spanish_clauses(sentence):
+                    words = subtree(sentence, head)
+                    clauses.append((row, head, words, stems(w.text for w in words),
+                                    rendering_type(head, sentence)))
+
+            source_words = [w for row in source_rows for w in source_doc.sentences[row].words]
+            source_position = {id(w): i / max(len(source_words) - 1, 1) for i, w in enumerate(source_words)}
+            candidates = []
+            found = []
+            for row in source_rows:
+                sentence = source_doc.sentences[row]
+                for construction, head in anchors(sentence):
+                    words = subtree(sentence, head)
+                    anchor = (row, construction, head, words)
+                    found.append(anchor)
+                    anchor_stems = stems(w.text for w in words)
+                    for clause in clauses:
+                        shared = len(anchor_stems & clause[3])
+                        overlap = 2 * shared / (len(anchor_stems) + len(clause[3])) if shared else 0.0
+                        closeness = 1 - abs(source_position[id(head)] - position[id(clause[1])])
+                        candidates.append((overlap + 0.25 * closeness, overlap, len(found) - 1, clause))
+
+            # Greedy one-to-one matching, best-scoring pairs first
+            matched, used = {}, set()
+            for score, overlap, index, clause in sorted(candidates, key=lambda c: -c[0]):
+                if index in matched or id(clause[1]) in used or overlap < min_overlap:
+                    continue
+                matched[index] = (score, clause)
+                used.add(id(clause[1]))
+
+            for index, (row, construction, head, words) in enumerate(found):
+                pair = {'construction': construction, 'source_sentence': row,
+                        'source': ' '.join(w.text for w in words)}
+                if index in matched:
+                    score, (target_row, _, target_words, _, rendering) = matched[index]
+                    pair.update(target_sentence=target_row, rendering=rendering, score=score,
+                                target=' '.join(w.text for w in target_words))
+                else:
+                    pair.update(target_sentence=None, rendering='unaligned', score=0.0, target='')
+                pairs.append(pair)
+        return pairs
+
+
+def transformation_counts(pairs: Iterable[Dict]) -> Dict:
+    """
+    Count renderings per Latin construction, in the layout of
+    track_clause_transformations (named renderings, the rest under 'other')
+    """
+    counts = {
+        'ablative_absolute': {'temporal_clause': 0, 'causal_clause': 0, 'gerund': 0,
+                              'other': defaultdict(int)},
+        'participial_constructions': {'relative_clause': 0, 'finite_verb': 0, 'other': defaultdict(int)}
+    }
+    for pair in pairs:
+        construction = counts.get(pair['construction'])
+        if construction is None:
+            continue
+        if pair['rendering'] in construction and pair['rendering'] != 'other':
+            construction[pair['rendering']] += 1
+        else:
+            construction['other'][pair['rendering']] += 1
+    return counts
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Local analysis server with warm Stanza pipelines.
+
+One EnhancedComplexityTracker stays loaded, so a request pays for parsing
+and analysis but not for building pipelines. Each pipeline (language,
+package) has a queue and one worker thread: the worker takes the oldest
+request, collects whatever else arrives for the same pipeline within
+--max-wait seconds (up to --max-batch texts), parses them with one
+bulk_process call and runs integrated_analysis on each document.
+
+Requests name a corpus text by id (routed like run_analysis) or send a
+passage with its language, and optionally the period whose package
+should parse it:
+
+    POST /analyze  {"text": "Gallia est omnis divisa...", "language": "la"}
+    POST /analyze  {"text_id": "latin_caesar_gallic_war_1"}
+    POST /analyze  {"texts": [{"text": ...}, {"text_id": ...}]}   (a list of results)
+    GET  /analyze?text_id=latin_caesar_gallic_war_1
+    GET  /stats    loaded pipelines, request and batch counts
+
+Usage:
+    python code/analysis_server.py serve --corpus data/raw_texts --warm la es
+    python code/analysis_server.py analyze --language la "Gallia est omnis divisa in partes tres."
+"""
+
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+from corpus_reader import open_corpus
+from corpus_routing import CORPUS_PERIODS, PipelineKey, period_for_text, pipeline_key
+from parse_cache import PER_SENTENCE_NOTE, SentenceCache
+from run_analysis import REPO_DIR, load_script, to_json
+from scheduler import count_tokens
+from sentence_sampling import split_sentences
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8766
+# Period whose package parses passages sent with only a language
+LANGUAGE_PERIODS = {'la': 'classical_latin', 'es': 'early_spanish'}
+
+
+class _Request:
+    __slots__ = ('text', 'language', 'future', 'received')
+
+    def __init__(self, text: str, language: str):
+        self.text = text
+        self.language = language
+        self.future = Future()
+        self.received = time.monotonic()
+
+
+class AnalysisService:
+    """
+    Queues analysis requests per pipeline and runs them in micro-batches.
+
+    max_batch: most texts parsed in one bulk_process call
+    max_wait: seconds a batch waits for more requests after its first
+    """
+
+    def __init__(self, tracker, corpus=None, max_batch: int = 16, max_wait: float = 0.01):
+        self.tracker = tracker
+        self.corpus = corpus
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queues: Dict[PipelineKey, queue.Queue] = {}
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # The tracker's caches are not thread-safe; analyses run one at a time
+        self._analysis_lock = threading.Lock()
+        self.counts = {'requests': 0, 'batches': 0, 'errors': 0}
+
+    def route(self, language: Optional[str] = None, period: Optional[str] = None,
+              text_id: Optional[str] = None) -> PipelineKey:
+        """Pipeline for a corpus text, a period, or a language's default period"""
+        if text_id is not None:
+            period = period_for_text(text_id)
+            if period is None:
+                raise ValueError(f"No corpus routing for text '{text_id}'")
+        if period is None:
+            if language not in LANGUAGE_PERIODS:
+                raise ValueError(f"language must be one of {sorted(LANGUAGE_PERIODS)}, got {language!r}")
+            period = LANGUAGE_PERIODS[language]
+        if period not in CORPUS_PERIODS:
+            raise ValueError(f"unknown period '{period}'")
+        return pipeline_key(period, self.tracker.packages)
+
+    def warm(self, languages: List[str]):
+        """
+        Build pipelines, and random-tree expectations for every sentence
+        length up to the corpus's longest sentence, before the first
+        request needs them
+        """
+        for language in languages:
+            key = self.route(language)
+            logger.info("Loading Stanza '%s' (%s)...", *key)
+            self.tracker.pipelines.get(*key)
+        baseline = self.tracker.dependency_engine.tree_baseline
+        if baseline is not None and self.corpus is not None:
+            # Whitespace tokens of the longest sentence unit; Stanza's tokens
+            # (punctuation, split clitics) run a little longer, hence the margin
+            longest = max((count_tokens(unit) for _, text in self.corpus.items()
+                           for unit in split_sentences(text)), default=0)
+            max_length = int(longest * 1.25) + 1
+            logger.info("Random-tree expectations for sentences of up to %d tokens...", max_length)
+            baseline.table(range(1, max_length + 1))
+
+    def submit(self, text: Optional[str] = None, language: Optional[str] = None,
+               period: Optional[str] = None, text_id: Optional[str] = None) -> Future:
+        """Queue one text; the future resolves to its integrated_analysis result"""
+        if text_id is not None:
+            if self.corpus is None or text_id not in self.corpus:
+                raise KeyError(f"unknown text id '{text_id}'")
+            text = self.corpus.read(text_id)
+        elif not isinstance(text, str) or not text.strip():
+            raise ValueError("request needs a non-empty 'text' or a 'text_id'")
+        key = self.route(language, period, text_id)
+        request = _Request(text, key[0])
+        with self._lock:
+            self.counts['requests'] += 1
+            if key not in self._queues:
+                self._queues[key] = queue.Queue()
+                worker = threading.Thread(target=self._work, args=(key, self._queues[key]),
+                                          name=f"analysis-{key[0]}-{key[1]}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        self._queues[key].put(request)
+        return request.future
+
+    def analyze(self, timeout: Optional[float] = None, **request) -> Dict:
+        return self.submit(**request).result(timeout)
+
+    def _work(self, key: PipelineKey, requests: queue.Queue):
+        while True:
+            batch = [requests.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    request = requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    requests.put(None)
+                    break
+                batch.append(request)
+            self._run_batch(key, batch)
+
+    def _run_batch(self, key: PipelineKey, batch: List[_Request]):
+        with self._lock:
+            self.counts['batches'] += 1
+        try:
+            docs = self.tracker.pipelines.get(*key).bulk_process([r.text for r in batch])
+        except Exception as e:
+            logger.error("Error parsing a batch of %d with '%s' (%s): %s", len(batch), *key, e)
+            for request in batch:
+                self._fail(request, e)
+            return
+        for request, doc in zip(batch, docs):
+            try:
+                with self._analysis_lock:
+                    result = to_json(self.tracker.integrated_analysis(doc, request.language))
+            except Exception as e:
+                logger.error("Error analyzing a %s text: %s", request.language, e)
+                self._fail(request, e)
+                continue
+            request.future.set_result(result)
+            logger.debug("Answered a %s request in %.3fs (batch of %d)",
+                         request.language, time.monotonic() - request.received, len(batch))
+
+    def _fail(self, request: _Request, error: Exception):
+        with self._lock:
+            self.counts['errors'] += 1
+        request.future.set_exception(error)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pipelines': [list(key) for key in self.tracker.pipelines.loaded()],
+                'queued': {f"{language}/{package}": q.qsize() for (language, package), q in self._queues.items()},
+                **self.counts,
+                **({'sentence_cache': self.tracker.sentence_cache.stats()}
+                   if self.tracker.sentence_cache is not None else {})
+            }
+
+    def close(self):
+        """Let the workers finish queued requests and stop"""
+        for q in self._queues.values():
+            q.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+class _AnalysisHandler(BaseHTTPRequestHandler):
+    service: AnalysisService = None
+    timeout_seconds: float = 300.0
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _answer(self, requests: List[Dict], single: bool):
+        try:
+            futures = [self.service.submit(**{k: r.get(k) for k in ('text', 'language', 'period', 'text_id')})
+                       for r in requests]
+            results = [future.result(self.timeout_seconds) for future in futures]
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            self._send(400, {'error': str(e.args[0]) if e.args else str(e)})
+            return
+        except Exception as e:
+            self._send(500, {'error': str(e)})
+            return
+        self._send(200, results[0] if single else results)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/stats':
+            self._send(200, self.service.stats())
+        elif url.path == '/analyze' and ('text_id' in params or 'text' in params):
+            self._answer([params], single=True)
+        else:
+            self._send(404, {'error': 'use POST /analyze, GET /analyze?text_id=<id> or /stats'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/analyze':
+            self._send(404, {'error': 'use POST /analyze'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send(400, {'error': f'invalid JSON: {e}'})
+            return
+        if isinstance(payload, dict) and isinstance(payload.get('texts'), list):
+            self._answer(payload['texts'], single=False)
+        elif isinstance(payload, dict):
+            self._answer([payload], single=True)
+        else:
+            self._send(400, {'error': 'expected a JSON object'})
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(service: AnalysisService, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+          timeout: float = 300.0):
+    """Answer /analyze and /stats over HTTP until interrupted"""
+    handler = type('AnalysisHandler', (_AnalysisHandler,), {'service': service, 'timeout_seconds': timeout})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info("Serving integrated_analysis on http://%s:%d/analyze", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def request_analysis(payload: Dict, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                     timeout: float = 300.0):
+    """POST one request (or {'texts': [...]}) to a running server"""
+    request = Request(f"http://{host}:{port}/analyze", data=json.dumps(payload).encode('utf-8'),
+                      headers={'Content-Type': 'application/json'})
+    with urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="integrated_analysis server with warm pipelines")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='keep pipelines loaded and answer requests')
+    serve_parser.add_argument('--corpus', type=Path, default=REPO_DIR / "data" / "raw_texts",
+                              help='corpus directory or packed archive, for text ids')
+    serve_parser.add_argument('--warm', nargs='*', choices=sorted(LANGUAGE_PERIODS), default=['la', 'es'],
+                              help='languages whose pipelines load at startup')
+    serve_parser.add_argument('--max-batch', type=int, default=16)
+    serve_parser.add_argument('--max-wait', type=float, default=0.01,
+                              help='seconds a batch waits for more requests')
+    serve_parser.add_argument('--timeout', type=float, default=300.0)
+    serve_parser.add_argument('--quantize', action='store_true',
+                              help='int8 POS and dependency models on CPU (see quantization.py)')
+    serve_parser.add_argument('--sentence-cache', type=Path, default=None, metavar='PATH',
+                              help='SQLite cache of parsed sentences (see parse_cache.py); texts are '
+                                   'then parsed sentence by sentence, which may change parses at '
+                                   'sentence edges')
+    serve_parser.add_argument('--random-tree-cache', type=Path, metavar='PATH',
+                              default=REPO_DIR / "results" / "run" / "random_trees.json",
+                              help='random-tree expectations per sentence length, shared with '
+                                   'run_analysis (see random_trees.py)')
+
+    analyze_parser = subparsers.add_parser('analyze', help='send a passage or text id to a running server')
+    analyze_parser.add_argument('text', nargs='?', default=None)
+    analyze_parser.add_argument('--language', choices=sorted(LANGUAGE_PERIODS), default=None)
+    analyze_parser.add_argument('--period', choices=list(CORPUS_PERIODS), default=None)
+    analyze_parser.add_argument('--text-id', default=None)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    if args.command == 'analyze':
+        payload = {k: v for k, v in (('text', args.text), ('language', args.language),
+                                     ('period', args.period), ('text_id', args.text_id)) if v is not None}
+        try:
+            result = request_analysis(payload, args.host, args.port)
+        except OSError as e:
+            logger.error("No answer from http://%s:%d: %s", args.host, args.port, e)
+            return 1
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    analysis = load_script('02_nlp_analysis.py', 'nlp_analysis')
+    tracker = analysis.EnhancedComplexityTracker(
+        str(args.corpus), quantize=args.quantize,
+        sentence_cache=SentenceCache(args.sentence_cache) if args.sentence_cache else None,
+        random_tree_cache=str(args.random_tree_cache))
+    if args.sentence_cache:
+        logger.warning(PER_SENTENCE_NOTE)
+    corpus = open_corpus(args.corpus) if args.corpus.exists() else None
+    if corpus is None:
+        logger.warning("Corpus %s not found; only passages with a language are accepted", args.corpus)
+    service = AnalysisService(tracker, corpus, args.max_batch, args.max_wait)
+    service.warm(args.warm)
+    serve(service, args.host, args.port, args.timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
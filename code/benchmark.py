@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the analysis pipeline.
+
+Times each analyzer behind EnhancedComplexityTracker.integrated_analysis,
+_calculate_dependency_depth, the token classifiers, the construction
+matcher, bootstrap_ci and the StatisticalAnalysis tests, on the bundled
+corpus and on scaled copies of it.
+Parses come from a parse cache (see `cache-parses`) or, when a text has no
+cached parse, from a heuristic stub parser, so runs need no model downloads.
+
+Usage:
+    python code/benchmark.py run --output results/benchmarks/baseline.json
+    python code/benchmark.py run --output current.json --scales 1 10
+    python code/benchmark.py run --output synthetic.json --synthetic-tokens 1000000 --scales 1
+    python code/benchmark.py compare results/benchmarks/baseline.json current.json
+    python code/benchmark.py cache-parses --cache-dir data/processed/parses
+    python code/benchmark.py imports
+
+`imports` checks the import-time budget of each subsystem of the
+complexity package (see complexity/__init__.py) in fresh interpreters:
+a subsystem fails if its import exceeds the budget or loads one of
+HEAVY_MODULES, which must wait until a model, test or figure needs them.
+
+Timings are machine-specific: record the baseline on the machine that will
+run the comparison.
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from corpus_reader import open_corpus
+from corpus_routing import CORPUS_PERIODS, period_for_text
+from parsed_docs import ParsedDocument, ParsedSentence, ParsedWord, load_document, save_document
+from synthetic_docs import generate_corpus
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = REPO_DIR / "data" / "raw_texts"
+
+ANALYZERS = [
+    'analyze_analytical_constructions',
+    'analyze_function_words',
+    'analyze_dependency_complexity',
+    'track_clause_transformations',
+    'analyze_information_complexity',
+    'analyze_dependency_distance'
+]
+
+# Closed-class forms for the stub parser, per language
+STUB_LEXICON = {
+    'la': {
+        'ADP': {'in', 'ad', 'ex', 'ab', 'a', 'e', 'de', 'per', 'pro', 'sub', 'apud', 'inter'},
+        'CCONJ': {'et', 'atque', 'ac', 'sed', 'aut', 'nec', 'neque', 'que'},
+        'SCONJ': {'ut', 'cum', 'si', 'quod', 'quia', 'ne', 'dum', 'postquam'},
+        'AUX': {'est', 'sunt', 'erat', 'erant', 'esse', 'fuit', 'sit'},
+        'DET': {'hic', 'haec', 'hoc', 'ille', 'illa', 'illud', 'is', 'ea', 'id'}
+    },
+    'es': {
+        'DET': {'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas'},
+        'ADP': {'de', 'a', 'en', 'por', 'para', 'con', 'sobre', 'bajo', 'sin'},
+        'CCONJ': {'e', 'y', 'o', 'mas', 'ni'},
+        'SCONJ': {'que', 'si', 'como', 'quando', 'cuando'},
+        'AUX': {'he', 'has', 'ha', 'hemos', 'an', 'es', 'son', 'ser', 'fue', 'está', 'están',
+                'va', 'voy', 'vas', 'ir'}
+    }
+}
+
+# Lemmas of the stub parser's auxiliaries (other words use the lowercased form)
+STUB_LEMMAS = {
+    'la': {form: 'sum' for form in STUB_LEXICON['la']['AUX']},
+    'es': {
+        **{form: 'haber' for form in ('he', 'has', 'ha', 'hemos', 'an')},
+        **{form: 'ser' for form in ('es', 'son', 'ser', 'fue')},
+        **{form: 'estar' for form in ('está', 'están')},
+        **{form: 'ir' for form in ('va', 'voy', 'vas', 'ir')}
+    }
+}
+
+# (suffixes, feats) for open-class verb guesses, checked in order
+STUB_VERB_SUFFIXES = {
+    'la': [
+        (('bit', 'bunt', 'bimus'), 'Mood=Ind|Tense=Fut|VerbForm=Fin|Voice=Act'),
+        (('tur', 'ntur', 'mur'), 'Mood=Ind|Tense=Pres|VerbForm=Fin|Voice=Pass'),
+        (('vit', 'verunt', 'xit', 'xerunt'), 'Aspect=Perf|Mood=Ind|Tense=Past|VerbForm=Fin'),
+        (('tis', 'to'), 'Case=Abl|VerbForm=Part|Voice=Pass'),
+        (('tus', 'tum', 'ta'), 'Case=Nom|VerbForm=Part|Voice=Pass'),
+        (('at', 'et', 'it', 'ant', 'ent', 'unt'), 'Mood=Ind|Tense=Pres|VerbForm=Fin|Voice=Act')
+    ],
+    'es': [
+        (('ado', 'ido', 'ada', 'ida', 'ito', 'ita'), 'Gender=Masc|Number=Sing|Tense=Past|VerbForm=Part'),
+        (('ando', 'iendo'), 'VerbForm=Ger'),
+        (('ar', 'er', 'ir'), 'VerbForm=Inf'),
+        (('ó', 'ió', 'aron', 'ieron'), 'Mood=Ind|Tense=Past|VerbForm=Fin')
+    ]
+}
+
+# Import-time budget in seconds per subsystem, and the modules no import may load
+IMPORT_BUDGETS = {'parse': 0.5, 'analyze': 0.5, 'stats': 0.5, 'plot': 0.5}
+HEAVY_MODULES = ['stanza', 'torch', 'scipy', 'matplotlib', 'pandas', 'seaborn']
+
+# Run in a fresh interpreter: argv[1] is the subsystem, the rest are HEAVY_MODULES
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import complexity
+getattr(complexity, sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'loaded': [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+NOUN_DEPRELS = ['nsubj', 'obj', 'nmod', 'obl', 'iobj']
+FUNCTION_DEPRELS = {'DET': 'det', 'ADP': 'case', 'CCONJ': 'cc', 'SCONJ': 'mark', 'AUX': 'aux'}
+
+
+def load_analysis_module():
+    """Import 02_nlp_analysis.py, whose file name is not a valid module name"""
+    path = Path(__file__).with_name('02_nlp_analysis.py')
+    spec = importlib.util.spec_from_file_location('nlp_analysis', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def stub_parse(text: str, language: str) -> ParsedDocument:
+    """
+    Heuristic offline parse for benchmarking only.
+
+    Sentences split on punctuation, UPOS from closed-class tables and verb
+    suffixes, and heads attach content words to the nearest preceding verb,
+    auxiliaries (and an `a` right before a verb) to the following verb, and
+    other function words to the following word. The result has realistic
+    shape and label mix, not linguistically valid trees.
+    """
+    lexicon = STUB_LEXICON[language]
+    lemmas = STUB_LEMMAS[language]
+    sentences = []
+    for chunk in re.split(r'[.;:?!]+', text):
+        tokens = re.findall(r'\w+', chunk)
+        if not tokens:
+            continue
+        words = []
+        for i, token in enumerate(tokens, 1):
+            lower = token.lower()
+            upos = next((tag for tag, forms in lexicon.items() if lower in forms), None)
+            feats = None
+            if upos is None:
+                upos = 'NOUN'
+                for suffixes, verb_feats in STUB_VERB_SUFFIXES[language]:
+                    if lower.endswith(suffixes):
+                        upos, feats = 'VERB', verb_feats
+                        break
+            words.append(ParsedWord(i, token, lemmas.get(lower, lower), upos, feats, 0, 'root'))
+
+        root = next((w for w in words if w.upos == 'VERB'), words[0])
+        next_verbs = []
+        next_verb = None
+        for word in reversed(words):
+            next_verbs.append(next_verb)
+            if word.upos == 'VERB':
+                next_verb = word
+        next_verbs.reverse()
+
+        last_verb = root
+        for word, next_verb in zip(words, next_verbs):
+            if word is root:
+                continue
+            if word.upos == 'AUX' and next_verb is not None:
+                word.head, word.deprel = next_verb.id, 'aux'
+            elif word.lemma == 'a' and next_verb is not None and next_verb.id == word.id + 1:
+                word.head, word.deprel = next_verb.id, 'mark'
+            elif word.upos in FUNCTION_DEPRELS:
+                word.head = word.id + 1 if word.id < len(words) else root.id
+                word.deprel = FUNCTION_DEPRELS[word.upos]
+            else:
+                word.head = last_verb.id
+                word.deprel = 'ccomp' if word.upos == 'VERB' else NOUN_DEPRELS[word.id % len(NOUN_DEPRELS)]
+            if word.upos == 'VERB':
+                last_verb = word
+        sentences.append(ParsedSentence(words))
+    return ParsedDocument(sentences, text)
+
+
+def text_language(text_id: str) -> str:
+    return CORPUS_PERIODS[period_for_text(text_id)]['language']
+
+
+def build_corpus(corpus_dir: Path, parse_cache: Path = None) -> Dict[str, Tuple[ParsedDocument, str]]:
+    """Parsed documents for every text, from the parse cache or the stub parser"""
+    reader = open_corpus(corpus_dir)
+    docs = {}
+    for text_id in reader:
+        language = text_language(text_id)
+        cached = parse_cache / f"{text_id}.json" if parse_cache else None
+        if cached is not None and cached.exists():
+            docs[text_id] = (load_document(cached), language)
+        else:
+            docs[text_id] = (stub_parse(reader.read(text_id), language), language)
+    return docs
+
+
+def scale_corpus(docs: Dict, factor: int) -> Dict:
+    """Repeat the corpus `factor` times under distinct text ids"""
+    if factor == 1:
+        return dict(docs)
+    return {f"{name}__{i}": value for i in range(factor) for name, value in docs.items()}
+
+
+def time_call(fn: Callable, repeat: int) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'repeat': repeat}
+
+
+def benchmark_scale(module, docs: Dict, repeat: int) -> Dict[str, Dict]:
+    """Run every benchmark on one corpus and return timings keyed by name"""
+    tracker = module.EnhancedComplexityTracker()
+    items = list(docs.values())
+    sentences = [(sent, lang) for doc, lang in items for sent in doc.sentences]
+    n_tokens = sum(len(sent.words) for sent, _ in sentences)
+
+    by_upos = {'ADP': [], 'DET': []}
+    for sent, lang in sentences:
+        for word in sent.words:
+            if word.upos in by_upos:
+                by_upos[word.upos].append((word, sent, lang))
+
+    timings = {}
+
+    def record(name, fn, n_items):
+        timings[name] = dict(time_call(fn, repeat), n_items=n_items)
+
+    for analyzer in ANALYZERS:
+        method = getattr(tracker, analyzer)
+        record(analyzer, lambda: [method(doc, lang) for doc, lang in items], n_tokens)
+
+    results = {}
+    def run_integrated():
+        for name, (doc, lang) in docs.items():
+            results[name] = tracker.integrated_analysis(doc, lang)
+    record('integrated_analysis', run_integrated, n_tokens)
+
+    record('_calculate_dependency_depth',
+           lambda: [tracker._calculate_dependency_depth(sent) for sent, _ in sentences],
+           len(sentences))
+    record('DependencyArrays',
+           lambda: [module.DependencyArrays.from_document(doc) for doc, _ in items],
+           len(sentences))
+    record('_classify_preposition',
+           lambda: [tracker._classify_preposition(w, s) for w, s, _ in by_upos['ADP']],
+           len(by_upos['ADP']))
+    record('_classify_article',
+           lambda: [tracker._classify_article(w, s, lang) for w, s, lang in by_upos['DET']],
+           len(by_upos['DET']))
+    record('ConstructionMatcher.match_sentence',
+           lambda: [tracker.constructions.match_sentence(sent) for sent, _ in sentences],
+           len(sentences))
+
+    analysis = module.StatisticalAnalysis(results)
+    depths = [r['dependency_complexity']['average_depth'] for r in results.values()]
+    record('StatisticalAnalysis.__init__', lambda: module.StatisticalAnalysis(results), len(results))
+    record('bootstrap_ci', lambda: analysis.bootstrap_ci(depths), len(depths))
+    for method in ['analyze_dependency_evolution', 'analyze_analytical_shift',
+                   'analyze_article_development']:
+        record(f'StatisticalAnalysis.{method}', getattr(analysis, method), len(results))
+
+    return timings
+
+
+def run_metadata(repeat: int, scales: List[int], parse_source: str) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': date.today().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'repeat': repeat,
+        'scales': scales,
+        'parses': parse_source
+    }
+
+
+def run(args) -> int:
+    module = load_analysis_module()
+    if args.synthetic_tokens:
+        synthetic = generate_corpus(tokens_per_text=args.synthetic_tokens // 16, seed=0)
+        docs = {name: (doc, text_language(name)) for name, doc in synthetic.items()}
+        parse_source = f'synthetic ({args.synthetic_tokens:,} tokens)'
+    else:
+        docs = build_corpus(args.corpus, args.parse_cache)
+        parse_source = 'cache' if args.parse_cache else 'stub'
+    benchmarks = {}
+    for factor in args.scales:
+        scaled = scale_corpus(docs, factor)
+        print(f"Benchmarking {len(scaled)} texts ({factor}x)...")
+        for name, timing in benchmark_scale(module, scaled, args.repeat).items():
+            benchmarks[f"{factor}x/{name}"] = timing
+            print(f"  {name:50s} {timing['median_s']:10.4f}s  ({timing['n_items']:,} items)")
+
+    output = {
+        'metadata': run_metadata(args.repeat, args.scales, parse_source),
+        'benchmarks': benchmarks
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results saved to {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    """Compare two result files; exit status 1 if anything regressed"""
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['benchmarks']
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)['benchmarks']
+
+    regressions = []
+    for name, base in baseline.items():
+        if name not in current:
+            print(f"  {name:55s} missing from current run")
+            continue
+        base_s, cur_s = base['median_s'], current[name]['median_s']
+        ratio = cur_s / base_s if base_s > 0 else float('inf')
+        # Sub-threshold timings are dominated by timer noise
+        if max(base_s, cur_s) < args.min_seconds:
+            status = 'ok (below noise floor)'
+        elif ratio > 1 + args.tolerance:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 / (1 + args.tolerance):
+            status = 'faster'
+        else:
+            status = 'ok'
+        print(f"  {name:55s} {base_s:9.4f}s -> {cur_s:9.4f}s  x{ratio:5.2f}  {status}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} tolerance")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def cache_parses(args) -> int:
+    """Parse the corpus with Stanza once and store the parses for offline runs"""
+    module = load_analysis_module()
+    tracker = module.EnhancedComplexityTracker(str(args.corpus))
+    reader = tracker.open_corpus()
+    args.cache_dir.mkdir(parents=True, exist_ok=True)
+    for text_id in reader:
+        print(f"Parsing {text_id}...")
+        doc = tracker._parse(reader.read(text_id), text_language(text_id))
+        save_document(doc, args.cache_dir / f"{text_id}.json")
+    return 0
+
+
+def imports(args) -> int:
+    """Time each subsystem's import in fresh interpreters; exit status 1 if any is over budget"""
+    unknown = [subsystem for subsystem in args.subsystems if subsystem not in IMPORT_BUDGETS]
+    if unknown:
+        print(f"Unknown subsystem(s): {', '.join(unknown)}; choose from {', '.join(IMPORT_BUDGETS)}")
+        return 2
+    failures = []
+    for subsystem in args.subsystems or IMPORT_BUDGETS:
+        times, loaded = [], set()
+        for _ in range(args.repeat):
+            probe = subprocess.run([sys.executable, '-c', IMPORT_PROBE, subsystem, *HEAVY_MODULES],
+                                   cwd=Path(__file__).resolve().parent, capture_output=True, text=True)
+            if probe.returncode != 0:
+                print(f"  {subsystem:10s} import failed:\n{probe.stderr}")
+                failures.append(subsystem)
+                break
+            result = json.loads(probe.stdout.strip().splitlines()[-1])
+            times.append(result['seconds'])
+            loaded.update(result['loaded'])
+        else:
+            budget = args.budget if args.budget is not None else IMPORT_BUDGETS[subsystem]
+            # The fastest run is the least disturbed by other processes and cold disk caches
+            best = min(times)
+            status = 'ok'
+            if loaded:
+                status = f"LOADS {', '.join(sorted(loaded))}"
+            elif best > budget:
+                status = 'OVER BUDGET'
+            if status != 'ok':
+                failures.append(subsystem)
+            print(f"  {subsystem:10s} {best:7.3f}s (budget {budget:.2f}s)  {status}")
+
+    if failures:
+        print(f"\n{len(failures)} subsystem(s) failed the import budget: {', '.join(failures)}")
+        return 1
+    print("\nAll subsystems within the import budget")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='run the benchmarks and save timings')
+    run_parser.add_argument('--output', type=Path, required=True)
+    run_parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    run_parser.add_argument('--parse-cache', type=Path, default=None,
+                            help='directory of <text_id>.json parses from cache-parses')
+    run_parser.add_argument('--synthetic-tokens', type=int, default=None,
+                            help='benchmark a generated corpus of this size instead (see synthetic_docs)')
+    run_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser('compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument('--tolerance', type=float, default=0.2,
+                                help='allowed slowdown as a fraction (default 0.2)')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.001)
+    compare_parser.set_defaults(func=compare)
+
+    cache_parser = sub.add_parser('cache-parses', help='store Stanza parses for offline runs')
+    cache_parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    cache_parser.add_argument('--cache-dir', type=Path, required=True)
+    cache_parser.set_defaults(func=cache_parses)
+
+    imports_parser = sub.add_parser('imports', help='check the import-time budget of each subsystem')
+    imports_parser.add_argument('subsystems', nargs='*', metavar='subsystem',
+                                help=f"any of {', '.join(IMPORT_BUDGETS)} (default: all)")
+    imports_parser.add_argument('--budget', type=float, default=None,
+                                help='seconds allowed per subsystem (default: IMPORT_BUDGETS)')
+    imports_parser.add_argument('--repeat', type=int, default=3)
+    imports_parser.set_defaults(func=imports)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
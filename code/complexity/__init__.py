@@ -0,0 +1,68 @@
+"""
+The analysis pipeline as one importable package, by subsystem.
+
+    parse    corpus_routing: PipelineRegistry, route_texts (Stanza and torch
+             load with the first pipeline)
+    analyze  02_nlp_analysis.py: EnhancedComplexityTracker
+    stats    period_stats: StatisticalAnalysis, aggregate_results (SciPy
+             loads with the first test)
+    plot     03_create_figures.py: the paper figures (matplotlib loads with
+             the first figure)
+
+Each subsystem is imported on first attribute access, so regenerating
+statistics or figures from cached results never pays for Stanza:
+
+    import complexity
+    output = complexity.stats.StatisticalAnalysis(aggregates=aggregates).run_all_analyses()
+    complexity.plot.create_article_development_figure(article_data, show=False)
+
+The modules stay in code/ under their own names (the numbered scripts are
+what the paper and README run), so code/ must be on sys.path.
+"""
+
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# Subsystem -> module name or numbered script in code/
+SUBSYSTEMS = {
+    'parse': 'corpus_routing',
+    'analyze': '02_nlp_analysis.py',
+    'stats': 'period_stats',
+    'plot': '03_create_figures.py'
+}
+
+__all__ = list(SUBSYSTEMS)
+
+
+def _load(subsystem: str):
+    target = SUBSYSTEMS[subsystem]
+    if not target.endswith('.py'):
+        return importlib.import_module(target)
+    # Numbered scripts are not valid module names; load them once, under the package
+    name = f"{__name__}.{subsystem}"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, CODE_DIR / target)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return sys.modules[name]
+
+
+def __getattr__(name: str):
+    if name not in SUBSYSTEMS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = _load(name)
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Concordance (KWIC) queries over cached parses.
+
+Indexes the parse artifacts written by run_analysis.py
+(<work-dir>/parses/<text_id>.json) or `benchmark.py cache-parses`, so
+counted constructions can be inspected without re-running Stanza. Every
+token of every text goes into one columnar table with an inverted index
+(postings sorted by token position) on form, lemma, UPOS, feats and
+deprel. A query is a node spec in the construction_patterns syntax,
+optionally with a second spec its head must match:
+
+    lemma:haber;upos:AUX                      auxiliary haber
+    VerbForm=Part;Case=Abl     head upos:VERB participles attached to a verb
+    form:a|al;deprel:mark
+
+The answer is the total match count plus KWIC lines: left context, keyword
+and right context within the sentence, with the keyword's head and
+dependents.
+
+Usage:
+    python code/concordance.py build results/run/parses
+    python code/concordance.py query "lemma:haber;upos:AUX" --head "VerbForm=Part"
+    python code/concordance.py serve --port 8765
+        GET /query?q=lemma:haber&head=VerbForm=Part&limit=20&window=5
+"""
+
+import argparse
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from construction_patterns import NodeSpec
+from parsed_docs import load_document
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PARSES = REPO_DIR / "results" / "run" / "parses"
+# Where `build` saves the index of DEFAULT_PARSES
+DEFAULT_INDEX = DEFAULT_PARSES.parent / "concordance.npz"
+
+# Indexed columns; form and lemma are lowercased, as in NodeSpec
+INDEXED_COLUMNS = ['form', 'lemma', 'upos', 'feats', 'deprel']
+
+
+def _node_spec(spec: Union[str, NodeSpec]) -> NodeSpec:
+    if isinstance(spec, NodeSpec):
+        return spec
+    return NodeSpec(spec.strip().lstrip('{').rstrip('}'))
+
+
+class ConcordanceIndex:
+    """
+    All tokens of a corpus as parallel arrays, with postings per column value.
+
+    text: id into text_ids of each token's text
+    sentence: global sentence index; bounds[s]:bounds[s + 1] are its tokens
+    head: global index of each token's head (-1 for the root)
+    display/display_vocab: original-case form ids, for KWIC output
+    columns/vocab: interned indexed columns, as in TokenTable
+    """
+
+    def __init__(self, text_ids: List[str], text: np.ndarray, sentence: np.ndarray,
+                 bounds: np.ndarray, first_sentence: np.ndarray, head: np.ndarray,
+                 display: np.ndarray, display_vocab: List[str],
+                 columns: Dict[str, np.ndarray], vocab: Dict[str, List[str]]):
+        self.text_ids = text_ids
+        self.text = text
+        self.sentence = sentence
+        self.bounds = bounds
+        self.first_sentence = first_sentence
+        self.head = head
+        self.display = display
+        self.display_vocab = display_vocab
+        self.columns = columns
+        self.vocab = vocab
+        self._codes = {column: {value: i for i, value in enumerate(values)}
+                       for column, values in vocab.items()}
+        # Postings: positions sorted by value id; value i owns order[offsets[i]:offsets[i + 1]]
+        self._postings = {}
+        for column, ids in columns.items():
+            order = np.argsort(ids, kind='stable')
+            counts = np.bincount(ids, minlength=len(vocab[column]))
+            self._postings[column] = (order, np.concatenate([[0], np.cumsum(counts)]))
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[str, object]]) -> 'ConcordanceIndex':
+        """Index (text_id, parsed document) pairs in one pass"""
+        lookups = {column: {} for column in INDEXED_COLUMNS}
+        ids = {column: [] for column in INDEXED_COLUMNS}
+        text_ids, first_sentence, bounds = [], [], [0]
+        text, sentence, head, display = [], [], [], []
+        display_lookup = {}
+
+        for text_id, doc in documents:
+            first_sentence.append(len(bounds) - 1)
+            for sent in doc.sentences:
+                start = len(text)
+                for word in sent.words:
+                    text.append(len(text_ids))
+                    sentence.append(len(bounds) - 1)
+                    head.append(start + word.head - 1 if word.head else -1)
+                    display.append(display_lookup.setdefault(word.text or '', len(display_lookup)))
+                    values = (
+                        (word.text or '').lower(),
+                        (word.lemma or word.text or '').lower(),
+                        word.upos or '',
+                        word.feats or '',
+                        word.deprel or ''
+                    )
+                    for column, value in zip(INDEXED_COLUMNS, values):
+                        lookup = lookups[column]
+                        ids[column].append(lookup.setdefault(value, len(lookup)))
+                bounds.append(len(text))
+            text_ids.append(text_id)
+
+        return cls(
+            text_ids,
+            np.array(text, dtype=np.int32),
+            np.array(sentence, dtype=np.int64),
+            np.array(bounds, dtype=np.int64),
+            np.array(first_sentence, dtype=np.int64),
+            np.array(head, dtype=np.int64),
+            np.array(display, dtype=np.int32),
+            list(display_lookup),
+            {column: np.array(ids[column], dtype=np.int32) for column in INDEXED_COLUMNS},
+            {column: list(lookups[column]) for column in INDEXED_COLUMNS}
+        )
+
+    @classmethod
+    def from_parse_dir(cls, parse_dir: Union[str, Path]) -> 'ConcordanceIndex':
+        """Index every <text_id>.json parse in a directory"""
+        paths = sorted(Path(parse_dir).glob('*.json'))
+        logger.info("Indexing %d parses from %s", len(paths), parse_dir)
+        return cls.from_documents((path.stem, load_document(path)) for path in paths)
+
+    def save(self, path: Union[str, Path]):
+        """Write the index as a single .npz (postings are rebuilt on load)"""
+        strings = {'text_ids': self.text_ids, 'display': self.display_vocab, 'vocab': self.vocab}
+        np.savez(
+            path,
+            text=self.text, sentence=self.sentence, bounds=self.bounds,
+            first_sentence=self.first_sentence, head=self.head, display=self.display,
+            strings=np.array(json.dumps(strings, ensure_ascii=False)),
+            **{f"column_{column}": ids for column, ids in self.columns.items()}
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ConcordanceIndex':
+        with np.load(path, allow_pickle=False) as data:
+            strings = json.loads(str(data['strings']))
+            return cls(
+                strings['text_ids'], data['text'], data['sentence'], data['bounds'],
+                data['first_sentence'], data['head'], data['display'], strings['display'],
+                {column: data[f"column_{column}"] for column in INDEXED_COLUMNS},
+                strings['vocab']
+            )
+
+    def _allowed(self, spec: NodeSpec) -> List[Tuple[str, np.ndarray]]:
+        """Per-column boolean tables over the vocabulary, one per constraint"""
+        allowed = []
+        if spec.upos is not None:
+            allowed.append(('upos', spec.upos))
+        for column in ('lemma', 'form', 'deprel'):
+            if column in spec.attrs:
+                allowed.append((column, spec.attrs[column]))
+        tables = []
+        for column, values in allowed:
+            table = np.zeros(len(self.vocab[column]), dtype=bool)
+            codes = [self._codes[column][v] for v in values if v in self._codes[column]]
+            table[codes] = True
+            tables.append((column, table))
+        if spec.features is not None:
+            tables.append(('feats', np.array(
+                [spec.features.matches_feats(feats or None) for feats in self.vocab['feats']], dtype=bool)))
+        return tables
+
+    def _select(self, spec: NodeSpec) -> np.ndarray:
+        """Sorted global indices of tokens matching a spec"""
+        tables = self._allowed(spec)
+        if not tables:
+            return np.arange(len(self))
+
+        # Start from the constraint with the fewest postings, filter by the rest
+        def n_postings(item):
+            column, table = item
+            counts = np.diff(self._postings[column][1])
+            return int(counts[table].sum())
+
+        tables.sort(key=n_postings)
+        column, table = tables[0]
+        order, offsets = self._postings[column]
+        codes = np.flatnonzero(table)
+        candidates = np.sort(np.concatenate(
+            [order[offsets[c]:offsets[c + 1]] for c in codes])) if codes.size else np.array([], dtype=np.int64)
+        for column, table in tables[1:]:
+            candidates = candidates[table[self.columns[column][candidates]]]
+        return candidates
+
+    def find(self, spec: Union[str, NodeSpec], head: Union[str, NodeSpec, None] = None) -> np.ndarray:
+        """Global indices of tokens matching `spec` whose head matches `head`"""
+        matches = self._select(_node_spec(spec))
+        if head is not None:
+            head_ok = np.zeros(len(self) + 1, dtype=bool)
+            head_ok[self._select(_node_spec(head))] = True
+            # Index -1 (root) lands on the extra False slot
+            matches = matches[head_ok[self.head[matches]]]
+        return matches
+
+    def line(self, index: int, window: int = 5) -> Dict:
+        """KWIC line for one token, with its head and dependents"""
+        s = int(self.sentence[index])
+        start, end = int(self.bounds[s]), int(self.bounds[s + 1])
+        text = int(self.text[index])
+        head = int(self.head[index])
+        dependents = start + np.flatnonzero(self.head[start:end] == index)
+        forms = self.display_vocab
+        display = self.display
+        return {
+            'text_id': self.text_ids[text],
+            'sentence': s - int(self.first_sentence[text]),
+            'position': index - start + 1,
+            'left': ' '.join(forms[i] for i in display[max(start, index - window):index]),
+            'keyword': forms[display[index]],
+            'right': ' '.join(forms[i] for i in display[index + 1:min(end, index + 1 + window)]),
+            'lemma': self.vocab['lemma'][self.columns['lemma'][index]],
+            'upos': self.vocab['upos'][self.columns['upos'][index]],
+            'feats': self.vocab['feats'][self.columns['feats'][index]],
+            'deprel': self.vocab['deprel'][self.columns['deprel'][index]],
+            'head': None if head < 0 else {
+                'form': forms[display[head]],
+                'upos': self.vocab['upos'][self.columns['upos'][head]],
+                'deprel': self.vocab['deprel'][self.columns['deprel'][head]]
+            },
+            'dependents': [f"{self.vocab['deprel'][self.columns['deprel'][d]]}:{forms[display[d]]}"
+                           for d in dependents]
+        }
+
+    def kwic(self, spec: Union[str, NodeSpec], head: Union[str, NodeSpec, None] = None,
+             window: int = 5, limit: int = 50, offset: int = 0) -> Dict:
+        """Match count and one page of KWIC lines"""
+        matches = self.find(spec, head)
+        return {
+            'total': int(matches.size),
+            'lines': [self.line(int(i), window) for i in matches[offset:offset + limit]]
+        }
+
+
+def open_index(path: Union[str, Path]) -> ConcordanceIndex:
+    """Load a saved .npz index, or index a directory of parses"""
+    path = Path(path)
+    if path.is_dir():
+        return ConcordanceIndex.from_parse_dir(path)
+    return ConcordanceIndex.load(path)
+
+
+def default_index() -> Path:
+    """The saved index of the default parses, or the parses themselves if none was built"""
+    if not DEFAULT_INDEX.exists():
+        logger.info("No index at %s; indexing %s (save one with `concordance.py build`)",
+                    DEFAULT_INDEX, DEFAULT_PARSES)
+        return DEFAULT_PARSES
+    built = DEFAULT_INDEX.stat().st_mtime
+    if DEFAULT_PARSES.is_dir() and any(path.stat().st_mtime > built for path in DEFAULT_PARSES.glob('*.json')):
+        logger.warning("%s is older than some parses in %s; rerun `concordance.py build`",
+                       DEFAULT_INDEX, DEFAULT_PARSES)
+    return DEFAULT_INDEX
+
+
+def format_line(line: Dict, width: int = 50) -> str:
+    head = line['head']
+    relation = f"{line['deprel']}<-{head['form']}" if head else 'root'
+    location = f"{line['text_id']}:{line['sentence']}"
+    return (f"{location:28s} {line['left'][-width:]:>{width}} [{line['keyword']}] "
+            f"{line['right'][:width]:{width}}  {relation}")
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    index: ConcordanceIndex = None
+
+    def _send(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/stats':
+            self._send(200, {'texts': len(self.index.text_ids), 'tokens': len(self.index)})
+            return
+        if url.path != '/query' or 'q' not in params:
+            self._send(404, {'error': 'use /query?q=<spec>[&head=<spec>&window=&limit=&offset=] or /stats'})
+            return
+        try:
+            result = self.index.kwic(params['q'], params.get('head'),
+                                     window=int(params.get('window', 5)),
+                                     limit=int(params.get('limit', 50)),
+                                     offset=int(params.get('offset', 0)))
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        self._send(200, result)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(index: ConcordanceIndex, host: str = '127.0.0.1', port: int = 8765):
+    """Answer /query and /stats over HTTP until interrupted"""
+    handler = type('QueryHandler', (_QueryHandler,), {'index': index})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info("Serving %d tokens from %d texts on http://%s:%d/query",
+                len(index), len(index.text_ids), host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concordance queries over cached parses")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='index a parse directory into an .npz')
+    build_parser.add_argument('parses', type=Path, nargs='?', default=DEFAULT_PARSES)
+    build_parser.add_argument('--output', type=Path, default=None,
+                              help='index file (default: <parses>/../concordance.npz)')
+
+    query_parser = subparsers.add_parser('query', help='print KWIC lines')
+    query_parser.add_argument('spec')
+    query_parser.add_argument('--head', default=None, help='spec the head must match')
+    query_parser.add_argument('--window', type=int, default=5)
+    query_parser.add_argument('--limit', type=int, default=20)
+    query_parser.add_argument('--offset', type=int, default=0)
+    query_parser.add_argument('--json', action='store_true')
+
+    serve_parser = subparsers.add_parser('serve', help='answer queries over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    for subparser in (query_parser, serve_parser):
+        subparser.add_argument('--index', type=Path, default=None,
+                               help='saved .npz index or parse directory (default: the index '
+                                    '`build` saves, or the parses when there is none)')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    if args.command == 'build':
+        output = args.output or args.parses.parent / 'concordance.npz'
+        index = ConcordanceIndex.from_parse_dir(args.parses)
+        index.save(output)
+        logger.info("Indexed %d tokens from %d texts into %s", len(index), len(index.text_ids), output)
+        return 0
+
+    index = open_index(args.index or default_index())
+    if args.command == 'serve':
+        serve(index, args.host, args.port)
+        return 0
+
+    try:
+        result = index.kwic(args.spec, args.head, args.window, args.limit, args.offset)
+    except ValueError as e:
+        logger.error("%s", e)
+        return 1
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        for line in result['lines']:
+            print(format_line(line))
+        print(f"{result['total']:,} matches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
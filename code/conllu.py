@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Streaming CoNLL-U input and output.
+
+Pre-parsed treebanks (PROIEL, ITTB, Perseus, Old Spanish UD) come as
+CoNLL-U. The reader streams a file line by line and yields sentences as
+ParsedSentence objects, or documents (split at `# newdoc` comments) as
+ParsedDocument objects, so gold parses feed the analyzers without Stanza
+and only one document is held in memory at a time:
+
+    for doc_id, doc in iter_documents('ittb.conllu'):
+        results = tracker.integrated_analysis(doc, 'la')
+
+Multi-word token lines (ids such as 3-4) are skipped, as in
+document_from_dict, and empty nodes (ids such as 5.1) are dropped;
+their component and basic-tree words follow as ordinary lines.
+
+write_document dumps any stanza-like parse in the same format, and
+import_treebank turns a treebank into parse checkpoints that the
+run_analysis stages read like Stanza's own:
+
+    python code/conllu.py import ittb.conllu --period medieval_latin --output results/run/parses
+    python code/conllu.py export results/run/parses --output results/run/corpus.conllu
+    python code/run_analysis.py --conllu medieval_latin=ittb.conllu --stages analyze stats
+"""
+
+import argparse
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from corpus_routing import CORPUS_PERIODS
+from parsed_docs import ParsedDocument, ParsedSentence, ParsedWord, load_document, save_document
+
+logger = logging.getLogger(__name__)
+
+_COMMENT = re.compile(r'#\s*([^=]+?)\s*(?:=\s*(.*?))?\s*$')
+# Characters kept in text ids made from treebank document ids
+_UNSAFE_ID = re.compile(r'[^0-9A-Za-z_.-]+')
+
+
+def _value(field: str) -> Optional[str]:
+    return None if field == '_' else field
+
+
+def iter_sentences(path: Union[str, Path]) -> Iterator[Tuple[Dict[str, str], ParsedSentence]]:
+    """Yield (comments, sentence) per sentence block; comments maps `# key = value` lines"""
+    comments: Dict[str, str] = {}
+    words: List[ParsedWord] = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line:
+                if words:
+                    yield comments, ParsedSentence(words)
+                comments, words = {}, []
+            elif line.startswith('#'):
+                match = _COMMENT.match(line)
+                if match:
+                    comments[match.group(1)] = match.group(2) or ''
+            else:
+                fields = line.split('\t')
+                if len(fields) != 10:
+                    raise ValueError(f"{path}:{line_number}: expected 10 columns, got {len(fields)}")
+                if not fields[0].isdigit():
+                    continue
+                head = fields[6]
+                words.append(ParsedWord(int(fields[0]), fields[1], _value(fields[2]), _value(fields[3]),
+                                        _value(fields[5]), int(head) if head.isdigit() else 0,
+                                        _value(fields[7])))
+    if words:
+        yield comments, ParsedSentence(words)
+
+
+def sentence_text(comments: Dict[str, str], sentence) -> str:
+    """The sentence's `# text`, or its word forms joined by spaces"""
+    return comments.get('text') or ' '.join(word.text for word in sentence.words)
+
+
+def iter_documents(path: Union[str, Path]) -> Iterator[Tuple[str, ParsedDocument]]:
+    """
+    Yield (doc_id, document) per `# newdoc` section, in file order. Files
+    without newdoc markers are one document named after the file.
+    """
+    path = Path(path)
+    doc_id, sentences, texts = path.stem, [], []
+    documents = 0
+    for comments, sentence in iter_sentences(path):
+        if 'newdoc id' in comments or 'newdoc' in comments:
+            if sentences:
+                yield doc_id, ParsedDocument(sentences, ' '.join(texts))
+            documents += 1
+            doc_id = comments.get('newdoc id') or f"{path.stem}_{documents}"
+            sentences, texts = [], []
+        sentences.append(sentence)
+        texts.append(sentence_text(comments, sentence))
+    if sentences:
+        yield doc_id, ParsedDocument(sentences, ' '.join(texts))
+
+
+def write_document(doc, f: TextIO, doc_id: Optional[str] = None):
+    """Write a stanza-like parse as CoNLL-U; sentences get `<doc_id>-<n>` ids"""
+    if doc_id:
+        f.write(f"# newdoc id = {doc_id}\n")
+    for number, sentence in enumerate(doc.sentences, 1):
+        if doc_id:
+            f.write(f"# sent_id = {doc_id}-{number}\n")
+        f.write(f"# text = {' '.join(word.text for word in sentence.words)}\n")
+        for word in sentence.words:
+            f.write(f"{word.id}\t{word.text}\t{word.lemma or '_'}\t{word.upos or '_'}\t_\t"
+                    f"{word.feats or '_'}\t{word.head}\t{word.deprel or '_'}\t_\t_\n")
+        f.write('\n')
+
+
+def save_conllu(doc, path: Union[str, Path], doc_id: Optional[str] = None):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        write_document(doc, f, doc_id)
+
+
+def treebank_files(path: Union[str, Path]) -> List[Path]:
+    """A .conllu file, or the .conllu files under a directory"""
+    path = Path(path)
+    return sorted(path.rglob('*.conllu')) if path.is_dir() else [path]
+
+
+def text_id_for(period_dir: str, doc_id: str) -> str:
+    """Corpus text id of a treebank document, routed to `period_dir`"""
+    return CORPUS_PERIODS[period_dir]['prefix'] + _UNSAFE_ID.sub('_', doc_id).strip('_')
+
+
+def import_treebank(path: Union[str, Path], period_dir: str, parse_dir: Union[str, Path],
+                    resume: bool = False) -> List[str]:
+    """
+    Write each treebank document as a parse checkpoint
+    (<parse_dir>/<text_id>.json); returns the text ids, in file order
+    """
+    parse_dir = Path(parse_dir)
+    parse_dir.mkdir(parents=True, exist_ok=True)
+    text_ids = []
+    for treebank in treebank_files(path):
+        for doc_id, doc in iter_documents(treebank):
+            text_id = text_id_for(period_dir, doc_id)
+            if text_id in text_ids:
+                logger.warning("Duplicate document id %s in %s; later sections replace earlier ones",
+                               doc_id, treebank)
+            else:
+                text_ids.append(text_id)
+            checkpoint = parse_dir / f"{text_id}.json"
+            if resume and checkpoint.exists():
+                continue
+            save_document(doc, checkpoint)
+            logger.debug("Imported %s (%d sentences)", text_id, len(doc.sentences))
+        logger.info("Imported %s", treebank)
+    return text_ids
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CoNLL-U import and export")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help='treebank documents -> parse checkpoints')
+    import_parser.add_argument('treebank', type=Path, help='a .conllu file or a directory of them')
+    import_parser.add_argument('--period', choices=list(CORPUS_PERIODS), required=True)
+    import_parser.add_argument('--output', type=Path,
+                               default=Path(__file__).resolve().parent.parent / "results" / "run" / "parses")
+    export_parser = subparsers.add_parser('export', help='parse checkpoints -> one CoNLL-U file')
+    export_parser.add_argument('parses', type=Path, help='a parse checkpoint or a directory of them')
+    export_parser.add_argument('--output', type=Path, required=True)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    if args.command == 'import':
+        text_ids = import_treebank(args.treebank, args.period, args.output)
+        print(f"{len(text_ids)} documents -> {args.output}")
+        return 0
+
+    paths = sorted(args.parses.glob('*.json')) if args.parses.is_dir() else [args.parses]
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for path in paths:
+            write_document(load_document(path), f, path.stem)
+    print(f"{len(paths)} documents -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Declarative dependency patterns for grammatical constructions.
+
+A small Semgrex-like language: an anchor node followed by constraints on
+its dependents.
+
+    {upos:VERB;VerbForm=Inf}=verb >aux {lemma:ir}=aux >mark {lemma:a}
+
+Node specs are `{...}` with ';'-separated constraints, each either
+`upos:`, `lemma:`, `form:` or `deprel:` (lemma/form compared lowercased) or
+a UD feature `Feature=Value`; alternatives are separated by '|'. `=name`
+labels a node in the match. `>rel` requires a distinct child of the anchor
+with that relation; a bare relation also accepts its subtypes (`>aux`
+matches aux:pass), and a bare `>` accepts any relation. Patterns are
+star-shaped: every relation hangs off the anchor.
+
+All patterns compile into one ConstructionMatcher, which builds each
+sentence's child index once and dispatches words to candidate patterns by
+UPOS, so adding constructions does not add passes over the text.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from feature_index import FeatureQuery
+
+# Constructions whose analytic form replaces a Latin synthetic one, plus
+# the Latin ablative absolute
+CONSTRUCTION_PATTERNS = {
+    # va a amar: the infinitive heads both the auxiliary and the marker
+    'future_tense': "{upos:VERB;VerbForm=Inf}=verb >aux {lemma:ir}=aux >mark {lemma:a}=marker",
+    # ha amado
+    'perfect_tense': "{upos:VERB;VerbForm=Part}=verb >aux {lemma:haber}=aux",
+    # es amado (aux:pass in UD, also accepted as plain aux)
+    'passive_voice': "{upos:VERB;VerbForm=Part}=verb >aux {lemma:ser}=aux",
+    # urbe capta: ablative participle with an ablative subject
+    'ablative_absolute': "{VerbForm=Part;Case=Abl}=participle >nsubj {Case=Abl}=subject"
+}
+
+_TOKEN = re.compile(r'\s*(\{[^}]*\}(?:=\w+)?|>[\w:]*)')
+
+
+class NodeSpec:
+    """Constraints on a single word"""
+
+    def __init__(self, spec: str, name: Optional[str] = None):
+        self.name = name
+        self.attrs = {}
+        features = {}
+        for constraint in filter(None, (c.strip() for c in spec.split(';'))):
+            if ':' in constraint and constraint.split(':', 1)[0] in ('upos', 'lemma', 'form', 'deprel'):
+                key, values = constraint.split(':', 1)
+                values = values.split('|')
+                if key in ('lemma', 'form'):
+                    values = [v.lower() for v in values]
+                self.attrs[key] = frozenset(values)
+            elif '=' in constraint:
+                feature, values = constraint.split('=', 1)
+                features[feature] = values.split('|')
+            else:
+                raise ValueError(f"Bad node constraint '{constraint}'")
+        self.upos = self.attrs.pop('upos', None)
+        self.features = FeatureQuery(features=features) if features else None
+
+    def __call__(self, word) -> bool:
+        if self.upos is not None and word.upos not in self.upos:
+            return False
+        if 'lemma' in self.attrs and (word.lemma or '').lower() not in self.attrs['lemma']:
+            return False
+        if 'form' in self.attrs and (word.text or '').lower() not in self.attrs['form']:
+            return False
+        if 'deprel' in self.attrs and word.deprel not in self.attrs['deprel']:
+            return False
+        return self.features is None or self.features.matches_feats(word.feats)
+
+
+def _relation_matches(relation: Optional[str], deprel: Optional[str]) -> bool:
+    if not relation:
+        return True
+    if deprel == relation:
+        return True
+    # A bare relation also covers its subtypes
+    return ':' not in relation and (deprel or '').startswith(relation + ':')
+
+
+class Pattern:
+    """A compiled pattern: anchor spec plus (relation, child spec) pairs"""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        tokens = _TOKEN.findall(source)
+        if ''.join(tokens).replace(' ', '') != source.replace(' ', ''):
+            raise ValueError(f"Cannot parse pattern '{source}'")
+        if not tokens or not tokens[0].startswith('{'):
+            raise ValueError(f"Pattern '{source}' must start with a node")
+
+        self.anchor = self._node(tokens[0])
+        self.children: List[Tuple[Optional[str], NodeSpec]] = []
+        relation = None
+        for token in tokens[1:]:
+            if token.startswith('>'):
+                relation = token[1:] or None
+            else:
+                self.children.append((relation, self._node(token)))
+
+    @staticmethod
+    def _node(token: str) -> NodeSpec:
+        body, _, name = token.rpartition('}')
+        return NodeSpec(body.lstrip('{'), name.lstrip('=') or None)
+
+    def match(self, word, children: List) -> Optional[Dict[str, object]]:
+        """Bind the pattern at `word`, given its dependents; None if it fails"""
+        if not self.anchor(word):
+            return None
+        bound = {self.anchor.name or 'anchor': word}
+        used = set()
+        for relation, spec in self.children:
+            for child in children:
+                if id(child) not in used and _relation_matches(relation, child.deprel) and spec(child):
+                    used.add(id(child))
+                    bound[spec.name or f"child{len(used)}"] = child
+                    break
+            else:
+                return None
+        return bound
+
+
+class ConstructionMatcher:
+    """Evaluates many patterns in a single pass over each sentence"""
+
+    def __init__(self, patterns: Optional[Dict[str, str]] = None):
+        patterns = CONSTRUCTION_PATTERNS if patterns is None else patterns
+        self.patterns = [Pattern(name, source) for name, source in patterns.items()]
+        # Dispatch on anchor UPOS; anchors without a UPOS constraint go everywhere
+        self._by_upos = defaultdict(list)
+        self._any_upos = []
+        for pattern in self.patterns:
+            if pattern.anchor.upos is None:
+                self._any_upos.append(pattern)
+            else:
+                for upos in pattern.anchor.upos:
+                    self._by_upos[upos].append(pattern)
+
+    def match_sentence(self, sentence) -> List[Tuple[str, Dict[str, object]]]:
+        """All (construction, bound nodes) matches in a sentence"""
+        children = defaultdict(list)
+        for word in sentence.words:
+            if word.head:
+                children[word.head].append(word)
+
+        matches = []
+        for word in sentence.words:
+            candidates = self._by_upos.get(word.upos, ())
+            if self._any_upos:
+                candidates = list(candidates) + self._any_upos
+            for pattern in candidates:
+                if pattern.children and word.id not in children:
+                    continue
+                bound = pattern.match(word, children.get(word.id, ()))
+                if bound is not None:
+                    matches.append((pattern.name, bound))
+        return matches
+
+    def count(self, doc) -> Dict[str, int]:
+        """Matches per construction over a document"""
+        counts = {pattern.name: 0 for pattern in self.patterns}
+        for sentence in doc.sentences:
+            for name, _ in self.match_sentence(sentence):
+                counts[name] += 1
+        return counts
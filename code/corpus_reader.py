@@ -0,0 +1,146 @@
+"""
+Lazy, memory-mapped access to the raw corpus.
+
+Readers index text ids up front but only read a text when it is asked for,
+so memory use follows the texts in flight rather than the corpus size.
+A reader pickles as its path alone, which lets worker processes reopen it
+and read texts by id without the parent sending full strings.
+
+Two layouts are supported:
+- a corpus directory (classical_latin/, medieval_latin/, ... of .txt files)
+- a packed archive written by pack_corpus: one UTF-8 blob of all texts
+  plus a JSON offset index alongside it (<archive>.json)
+"""
+
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+from corpus_routing import CORPUS_PERIODS
+
+
+def _read_mapped(path: Path, offset: int = 0, length: int = -1) -> str:
+    """Decode a byte range of a file through a read-only memory map"""
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size if length < 0 else offset + length
+            return mm[offset:end].decode('utf-8')
+
+
+class CorpusReader:
+    """Lazy reader over a corpus directory of period subdirectories"""
+
+    def __init__(self, corpus_dir: Union[str, Path]):
+        self.corpus_dir = Path(corpus_dir)
+        self.index = self._build_index()
+
+    def _build_index(self) -> Dict[str, Path]:
+        index = {}
+        for period_dir, spec in CORPUS_PERIODS.items():
+            for text_file in sorted((self.corpus_dir / period_dir).glob("*.txt")):
+                index[f"{spec['prefix']}{text_file.stem}"] = text_file
+        return index
+
+    def __getstate__(self):
+        return {'corpus_dir': self.corpus_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state['corpus_dir'])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, text_id: str) -> bool:
+        return text_id in self.index
+
+    def read(self, text_id: str) -> str:
+        """Return the full text of one document"""
+        return _read_mapped(self.index[text_id])
+
+    def size(self, text_id: str) -> int:
+        """Size of a text in bytes, without reading it"""
+        return self.index[text_id].stat().st_size
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Yield (text_id, text) pairs one at a time"""
+        for text_id in self.index:
+            yield text_id, self.read(text_id)
+
+
+class PackedCorpusReader(CorpusReader):
+    """Lazy reader over a packed corpus archive and its offset index"""
+
+    def __init__(self, archive_path: Union[str, Path]):
+        self.archive_path = Path(archive_path)
+        self._mm = None
+        self._file = None
+        with open(self.index_path(self.archive_path), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+
+    @staticmethod
+    def index_path(archive_path: Path) -> Path:
+        return archive_path.with_name(archive_path.name + '.json')
+
+    def __getstate__(self):
+        return {'archive_path': self.archive_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['archive_path'])
+
+    def _mapped(self) -> mmap.mmap:
+        # The archive is mapped once per process, on first read
+        if self._mm is None:
+            self._file = open(self.archive_path, 'rb')
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def read(self, text_id: str) -> str:
+        offset, length = self.index[text_id]
+        if length == 0:
+            return ''
+        return self._mapped()[offset:offset + length].decode('utf-8')
+
+    def size(self, text_id: str) -> int:
+        return self.index[text_id][1]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = self._file = None
+
+
+def pack_corpus(corpus_dir: Union[str, Path], archive_path: Union[str, Path]) -> Path:
+    """
+    Pack a corpus directory into a single archive with an offset index.
+
+    Texts are streamed into the archive one at a time.
+    """
+    archive_path = Path(archive_path)
+    source = CorpusReader(corpus_dir)
+    index = {}
+    offset = 0
+    with open(archive_path, 'wb') as out:
+        for text_id, path in source.index.items():
+            data = path.read_bytes()
+            out.write(data)
+            index[text_id] = [offset, len(data)]
+            offset += len(data)
+    with open(PackedCorpusReader.index_path(archive_path), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return archive_path
+
+
+def open_corpus(path: Union[str, Path]) -> CorpusReader:
+    """Open a corpus directory or a packed archive"""
+    path = Path(path)
+    if path.is_file():
+        return PackedCorpusReader(path)
+    return CorpusReader(path)
@@ -0,0 +1,113 @@
+"""
+Corpus metadata and language/model routing.
+
+Each corpus directory is mapped to a period, a Stanza language code and an
+optional model package, so that the pipeline used for a text is decided by
+where the text came from rather than by substrings in its name.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Corpus directory -> metadata. `prefix` is the text-name prefix used by
+# EnhancedComplexityTracker.load_corpus and StatisticalAnalysis.
+# `package` selects a Stanza treebank model; None uses Stanza's default
+# package for the language (the configuration the published results used).
+CORPUS_PERIODS = {
+    'classical_latin': {
+        'prefix': 'latin_',
+        'period': 'Classical',
+        'language': 'la',
+        'package': None
+    },
+    'medieval_latin': {
+        'prefix': 'medieval_',
+        'period': 'Medieval',
+        'language': 'la',
+        'package': None
+    },
+    'early_spanish': {
+        'prefix': 'spanish_',
+        'period': 'Spanish',
+        'language': 'es',
+        'package': None
+    }
+}
+
+# Treebank packages that suit each period better than the default, for use
+# with the `packages` argument of route_texts / EnhancedComplexityTracker
+SUGGESTED_PACKAGES = {
+    'classical_latin': 'perseus',
+    'medieval_latin': 'ittb',
+    'early_spanish': 'ancora'
+}
+
+PipelineKey = Tuple[str, str]
+
+
+def period_for_text(text_name: str) -> Optional[str]:
+    """Return the corpus directory a text name belongs to, or None"""
+    for period_dir, spec in CORPUS_PERIODS.items():
+        if text_name.startswith(spec['prefix']):
+            return period_dir
+    return None
+
+
+def pipeline_key(period_dir: str, packages: Optional[Dict[str, str]] = None) -> PipelineKey:
+    """Return the (language, package) pair that should parse texts of a period"""
+    spec = CORPUS_PERIODS[period_dir]
+    package = (packages or {}).get(period_dir) or spec['package'] or 'default'
+    return spec['language'], package
+
+
+def route_texts(text_names: List[str],
+                packages: Optional[Dict[str, str]] = None) -> Dict[PipelineKey, List[str]]:
+    """
+    Group texts by the pipeline that should parse them.
+
+    Periods that resolve to the same (language, package) share one group,
+    so each model is loaded once per run.
+    """
+    groups = {}
+    for text_name in text_names:
+        period_dir = period_for_text(text_name)
+        if period_dir is None:
+            raise ValueError(f"No corpus routing for text '{text_name}'")
+        groups.setdefault(pipeline_key(period_dir, packages), []).append(text_name)
+    return groups
+
+
+class PipelineRegistry:
+    """
+    Build each Stanza pipeline lazily, once, and share it across texts.
+
+    quantizer: optional quantization.PipelineQuantizer applied to each
+    pipeline after it loads (pipelines then run on CPU)
+    cache: optional parse_cache.SentenceCache; pipelines then parse only
+    sentences it has not seen and return ParsedDocuments
+    """
+
+    def __init__(self, quantizer=None, cache=None, **pipeline_kwargs):
+        self.quantizer = quantizer
+        self.cache = cache
+        self.pipeline_kwargs = pipeline_kwargs
+        if quantizer is not None:
+            self.pipeline_kwargs.setdefault('use_gpu', False)
+        self._pipelines = {}
+
+    def get(self, language: str, package: Optional[str] = None):
+        """Return the pipeline for a language/package, building it on first use"""
+        key = (language, package or 'default')
+        if key not in self._pipelines:
+            # Imported on first use, so routing and statistics never load Stanza and torch
+            import stanza
+            pipeline = stanza.Pipeline(key[0], package=key[1], **self.pipeline_kwargs)
+            if self.quantizer is not None:
+                self.quantizer.quantize(pipeline, key)
+            if self.cache is not None:
+                pipeline = self.cache.wrap(pipeline, key, quantized=self.quantizer is not None)
+            self._pipelines[key] = pipeline
+        return self._pipelines[key]
+
+    def loaded(self) -> List[PipelineKey]:
+        """Pipelines built so far, in load order"""
+        return list(self._pipelines)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate passage detection across corpus texts (MinHash + LSH).
+
+Corpus texts overlap: split letter files repeat passages, several books
+of one work share formulas, and variant witnesses of one edition repeat
+most of their text. Duplicated passages cost parse time and count twice
+in the period statistics. NearDuplicateFilter finds them before parsing:
+
+- each text is split into sentences (sentence_sampling.split_sentences),
+  and each sentence becomes a set of word shingles (casefolded word
+  n-grams)
+- a MinHash signature (num_perm universal hashes of the shingles,
+  computed for blocks of sentences at once with NumPy) estimates the Jaccard
+  similarity of two sentences by the share of equal signature entries
+- LSH splits signatures into bands; sentences sharing a band are
+  candidates, so only candidate pairs are compared, not all pairs
+- texts are scanned in corpus order; a sentence whose estimated
+  similarity to a sentence of an earlier text reaches `threshold` is a
+  duplicate and is excluded, and a text whose comparable sentences are
+  mostly duplicates (`text_threshold`) is excluded whole, and its
+  sentences are never the source of later duplicates
+
+Repeats within one text (refrains, formulas) belong to the text and are
+kept. Every exclusion is recorded with its source:
+
+    dedup = NearDuplicateFilter(threshold=0.8)
+    decisions = dedup.scan(corpus.items())
+    text = dedup.apply(corpus.read(text_id), decisions[text_id])   # None if excluded
+
+    python code/dedup.py data/raw_texts --output results/dedup.json
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from corpus_reader import open_corpus
+from frequency_index import string_key
+from sentence_sampling import split_sentences
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r'\w+')
+# Mersenne prime modulus of the universal hashes; shingle keys are reduced below it
+_PRIME = np.uint64((1 << 31) - 1)
+# Shingles hashed at once (times num_perm 8-byte values)
+SHINGLE_BLOCK = 1 << 16
+
+
+def shingles(sentence: str, size: int) -> List[str]:
+    """Casefolded word n-grams of a sentence (the whole sentence if it is shorter)"""
+    words = WORD_PATTERN.findall(sentence.casefold())
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class NearDuplicateFilter:
+    """
+    threshold: estimated Jaccard similarity at which a sentence duplicates another
+    num_perm: MinHash signature length; bands must divide it
+    bands: LSH bands (more bands find lower similarities, with more candidates)
+    shingle_size: words per shingle
+    min_words: shorter sentences are never treated as duplicates
+    text_threshold: share of duplicates among a text's comparable (min_words)
+    sentences at which the whole text is excluded
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 3, min_words: int = 6, text_threshold: float = 0.9,
+                 seed: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.text_threshold = text_threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, units: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        MinHash signatures of sentences, shape (sentences, num_perm), and a
+        mask of the sentences long enough to be compared
+        """
+        keys, starts = [], []
+        eligible = np.zeros(len(units), dtype=bool)
+        for i, unit in enumerate(units):
+            unit_shingles = shingles(unit, self.shingle_size)
+            eligible[i] = len(WORD_PATTERN.findall(unit)) >= self.min_words
+            starts.append(len(keys))
+            keys.extend(string_key(s) for s in unit_shingles or [''])
+        if not units:
+            return np.zeros((0, self.num_perm), dtype=np.uint32), eligible
+        keys = np.asarray(keys, dtype=np.uint64) % _PRIME
+        starts.append(keys.size)
+        result = np.empty((len(units), self.num_perm), dtype=np.uint32)
+        # (num_perm, shingles) hash values, minimized per sentence, for
+        # blocks of sentences so memory stays bounded on long texts
+        first = 0
+        while first < len(units):
+            last = max(first + 1, int(np.searchsorted(starts, starts[first] + SHINGLE_BLOCK, side='right')) - 1)
+            last = min(last, len(units))
+            block = keys[starts[first]:starts[last]]
+            hashes = (self._a * block + self._b) % _PRIME
+            offsets = np.asarray(starts[first:last]) - starts[first]
+            result[first:last] = np.minimum.reduceat(hashes, offsets, axis=1).T
+            first = last
+        return result, eligible
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, rows.tobytes()) for band, rows in enumerate(signature.reshape(self.bands, -1))]
+
+    def scan(self, texts: Iterable[Tuple[str, str]]) -> Dict[str, Dict]:
+        """
+        Scan (text_id, text) pairs in order; returns per-text decisions:
+        sentence count, duplicates (sentence index, source text, source
+        sentence, similarity), and the action ('keep', 'filter' or 'exclude')
+        """
+        buckets: Dict[Tuple[int, bytes], List[Tuple[str, int]]] = {}
+        signatures: Dict[str, np.ndarray] = {}
+        decisions = {}
+        for text_id, text in texts:
+            units = split_sentences(text)
+            text_signatures, eligible = self.signatures(units)
+            duplicates = []
+            # Sentences become sources only once the text is known to be kept
+            pending = []
+            for index in np.flatnonzero(eligible).tolist():
+                signature = text_signatures[index]
+                band_keys = self._band_keys(signature)
+                match = self._best_match(text_id, signature, band_keys, buckets, signatures)
+                if match is not None:
+                    source, source_index, similarity = match
+                    duplicates.append({'sentence': index, 'source': source,
+                                       'source_sentence': source_index, 'similarity': similarity})
+                    continue
+                pending.extend((key, index) for key in band_keys)
+
+            removed, compared = len(duplicates), int(eligible.sum())
+            if compared and removed >= self.text_threshold * compared:
+                action = 'exclude'
+            else:
+                action = 'filter' if removed else 'keep'
+            if action != 'exclude':
+                for key, index in pending:
+                    buckets.setdefault(key, []).append((text_id, index))
+                signatures[text_id] = text_signatures
+            decisions[text_id] = {'sentences': len(units), 'compared': compared, 'removed': removed,
+                                  'action': action, 'duplicates': duplicates}
+            if removed:
+                sources = sorted({d['source'] for d in duplicates})
+                logger.info("%s: %d of %d sentences duplicate %s -> %s", text_id, removed,
+                            len(units), ', '.join(sources), action)
+        return decisions
+
+    def _best_match(self, text_id: str, signature: np.ndarray, band_keys,
+                    buckets, signatures) -> Optional[Tuple[str, int, float]]:
+        candidates = {candidate for key in band_keys for candidate in buckets.get(key, ())
+                      if candidate[0] != text_id}
+        best = None
+        for source, source_index in candidates:
+            similarity = float(np.mean(signatures[source][source_index] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[2]):
+                best = (source, source_index, similarity)
+        return best
+
+    @staticmethod
+    def apply(text: str, decision: Optional[Dict]) -> Optional[str]:
+        """The text without its duplicate sentences, or None if the text is excluded"""
+        if not decision or decision['action'] == 'keep':
+            return text
+        if decision['action'] == 'exclude':
+            return None
+        removed = {duplicate['sentence'] for duplicate in decision['duplicates']}
+        return ' '.join(unit for i, unit in enumerate(split_sentences(text)) if i not in removed)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Near-duplicate sentences across corpus texts")
+    parser.add_argument('corpus', type=Path, help='corpus directory or packed archive')
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--text-threshold', type=float, default=0.9)
+    parser.add_argument('--output', type=Path, default=None, help='write the decisions as JSON')
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    dedup = NearDuplicateFilter(args.threshold, text_threshold=args.text_threshold)
+    decisions = dedup.scan(open_corpus(args.corpus).items())
+    for text_id, decision in decisions.items():
+        print(f"{text_id:40s} {decision['removed']:6d}/{decision['sentences']:<6d} {decision['action']}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(decisions, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
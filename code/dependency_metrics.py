@@ -0,0 +1,237 @@
+"""
+Dependency-distance and tree-shape measures over NumPy arrays.
+
+DependencyArrays turns a parsed document into flat per-arc and
+per-sentence arrays (distance, direction, embedding depth). The engine
+derives its statistics from those arrays with vectorized operations:
+
+- mean dependency distance and its histogram
+- normalized distance: observed total distance over its expectation when
+  the words of each tree are randomly reordered (random linear
+  arrangement, expected distance (n + 1) / 3 per arc), with a sampled
+  null distribution for a z-score
+- crossing arcs and non-projective sentences
+- head direction: share of head-final arcs, overall and per relation
+- optionally, distance and depth relative to random projective and
+  non-projective trees of the same lengths (see random_trees)
+
+Sampling is batched: sentences are grouped by length and every
+permutation for a group is drawn in one call.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from random_trees import RandomTreeBaseline
+from token_table import TokenTable
+
+# Cap on elements in one broadcast block (pairwise arc comparisons, samples)
+BLOCK_ELEMENTS = 4_000_000
+
+
+class DependencyArrays:
+    """
+    Arcs and sentences of a document as arrays.
+
+    sentence_start/sentence_length: token offsets of each sentence
+    head: global head index of each token (-1 for roots)
+    dependent/governor: global indices of each non-root arc's endpoints
+    distance: |dependent - head| of each arc (positions within the sentence)
+    arc_sentence: sentence index of each arc
+    depth: depth of each token (roots are 0); sentence_depth: max per sentence
+    """
+
+    def __init__(self, table: TokenTable):
+        self.table = table
+        bounds = table.sentence_bounds()
+        self.sentence_start = bounds[:-1]
+        self.sentence_length = np.diff(bounds)
+        token_start = self.sentence_start[table.sentence] if len(table) else np.zeros(0, dtype=np.int64)
+        self.head = np.where(table.head > 0, token_start + table.head - 1, -1)
+
+        arcs = self.head >= 0
+        self.dependent = np.flatnonzero(arcs)
+        self.governor = self.head[arcs]
+        self.arc_sentence = table.sentence[arcs]
+        self.distance = np.abs(table.position[arcs] - table.head[arcs])
+
+        # Pointer jumping: every token climbs one level per iteration
+        self.depth = np.zeros(len(table), dtype=np.int64)
+        current = self.head.copy()
+        while True:
+            active = current >= 0
+            if not active.any():
+                break
+            self.depth[active] += 1
+            current[active] = self.head[current[active]]
+        self.sentence_depth = (np.maximum.reduceat(self.depth, self.sentence_start)
+                               if len(table) else np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def from_document(cls, doc) -> 'DependencyArrays':
+        return cls(doc if isinstance(doc, TokenTable) else TokenTable.from_document(doc))
+
+    def __len__(self) -> int:
+        return len(self.sentence_length)
+
+
+def crossing_counts(arrays: DependencyArrays) -> np.ndarray:
+    """
+    Crossing arc pairs per sentence. Arcs (a, b) and (c, d), with a < b and
+    c < d, cross when a < c < b < d. Sentences are padded to a common arc
+    count in length-sorted blocks and compared pairwise by broadcasting.
+    """
+    n_sentences = len(arrays)
+    counts = np.zeros(n_sentences, dtype=np.int64)
+    if arrays.dependent.size == 0:
+        return counts
+    lo = np.minimum(arrays.dependent, arrays.governor)
+    hi = np.maximum(arrays.dependent, arrays.governor)
+    arc_counts = np.bincount(arrays.arc_sentence, minlength=n_sentences)
+    arc_starts = np.concatenate([[0], np.cumsum(arc_counts)])
+    # Rank of each arc within its sentence (arcs are already grouped by sentence)
+    rank = np.arange(arrays.dependent.size) - arc_starts[arrays.arc_sentence]
+
+    order = np.argsort(arc_counts, kind='stable')
+    order = order[arc_counts[order] > 1]
+    i = 0
+    while i < order.size:
+        # Grow the block while the padded pairwise array stays under the cap
+        j = i + 1
+        while j < order.size and (j - i + 1) * int(arc_counts[order[j]]) ** 2 <= BLOCK_ELEMENTS:
+            j += 1
+        block = order[i:j]
+        width = int(arc_counts[order[j - 1]])
+        row_of = np.full(n_sentences, -1)
+        row_of[block] = np.arange(block.size)
+        in_block = row_of[arrays.arc_sentence] >= 0
+        rows = row_of[arrays.arc_sentence[in_block]]
+        lo_pad = np.full((block.size, width), -1, dtype=np.int64)
+        hi_pad = np.full((block.size, width), -1, dtype=np.int64)
+        lo_pad[rows, rank[in_block]] = lo[in_block]
+        hi_pad[rows, rank[in_block]] = hi[in_block]
+        # Padding (-1, -1) never satisfies a < c < b < d against a real arc
+        a, b = lo_pad[:, :, None], hi_pad[:, :, None]
+        c, d = lo_pad[:, None, :], hi_pad[:, None, :]
+        counts[block] = ((a < c) & (c < b) & (b < d)).sum(axis=(1, 2))
+        i = j
+    return counts
+
+
+def random_arrangement_distances(lengths: np.ndarray, arrays: DependencyArrays,
+                                 samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Total dependency distance of the corpus under `samples` random
+    reorderings of every sentence's words, shape (samples,). Sentences of
+    equal length share one batched permutation draw.
+    """
+    totals = np.zeros(samples)
+    if arrays.dependent.size == 0:
+        return totals
+    start = arrays.sentence_start[arrays.arc_sentence]
+    dep_local = arrays.dependent - start
+    gov_local = arrays.governor - start
+    arc_length = lengths[arrays.arc_sentence]
+    for n in np.unique(arc_length):
+        n = int(n)
+        sentences = np.flatnonzero(lengths == n)
+        row_of = np.full(len(lengths), -1)
+        row_of[sentences] = np.arange(sentences.size)
+        arcs = np.flatnonzero(arc_length == n)
+        rows = row_of[arrays.arc_sentence[arcs]]
+        step = max(1, BLOCK_ELEMENTS // max(1, sentences.size * n))
+        for first in range(0, samples, step):
+            k = min(step, samples - first)
+            # positions[s, r, w]: new position of word w of sentence r in sample s
+            positions = rng.random((k, sentences.size, n)).argsort(axis=2)
+            moved = np.abs(positions[:, rows, dep_local[arcs]] - positions[:, rows, gov_local[arcs]])
+            totals[first:first + k] += moved.sum(axis=1)
+    return totals
+
+
+class DependencyDistanceEngine:
+    """
+    samples: random reorderings drawn for the null distribution (0 to skip)
+    seed: RNG seed for the sampled baseline
+    tree_baseline: random-tree expectations to compare with (None to skip);
+    its per-length cache is shared by every document analyzed, and with a
+    cache_path it persists, so only lengths never seen before are simulated
+    """
+
+    def __init__(self, samples: int = 100, seed: int = 0,
+                 tree_baseline: Optional[RandomTreeBaseline] = None):
+        self.samples = samples
+        self.seed = seed
+        self.tree_baseline = tree_baseline
+
+    def arrays(self, doc) -> DependencyArrays:
+        return doc if isinstance(doc, DependencyArrays) else DependencyArrays.from_document(doc)
+
+    def analyze(self, doc) -> Dict:
+        """Every measure for one document"""
+        arrays = self.arrays(doc)
+        results = {'sentences': len(arrays), 'arcs': int(arrays.distance.size)}
+        if arrays.distance.size == 0:
+            return results
+        results.update(self.distance_measures(arrays))
+        results.update(self.depth_measures(arrays))
+        results.update(self.crossing_measures(arrays))
+        results.update(self.direction_measures(arrays))
+        results['baseline'] = self.random_baseline(arrays)
+        if self.tree_baseline is not None:
+            results['baseline']['random_trees'] = self.tree_baseline.compare(arrays)
+        return results
+
+    def distance_measures(self, arrays: DependencyArrays) -> Dict:
+        return {
+            'mean_distance': float(arrays.distance.mean()),
+            'median_distance': float(np.median(arrays.distance)),
+            'distance_histogram': np.bincount(arrays.distance).tolist()
+        }
+
+    def depth_measures(self, arrays: DependencyArrays) -> Dict:
+        return {
+            'mean_depth': float(arrays.sentence_depth.mean()),
+            'max_depth': int(arrays.sentence_depth.max()),
+            'mean_token_depth': float(arrays.depth.mean())
+        }
+
+    def crossing_measures(self, arrays: DependencyArrays) -> Dict:
+        crossings = crossing_counts(arrays)
+        return {
+            'crossing_arcs': int(crossings.sum()),
+            'crossings_per_arc': float(crossings.sum() / arrays.distance.size),
+            'non_projective_sentences': int(np.count_nonzero(crossings)),
+            'non_projective_ratio': float(np.count_nonzero(crossings) / len(arrays))
+        }
+
+    def direction_measures(self, arrays: DependencyArrays) -> Dict:
+        """Share of arcs whose head follows the dependent (head-final)"""
+        head_final = arrays.governor > arrays.dependent
+        deprels = arrays.table.deprel[arrays.dependent]
+        totals = np.bincount(deprels, minlength=len(arrays.table.vocab['deprel']))
+        finals = np.bincount(deprels, weights=head_final, minlength=totals.size)
+        by_deprel = {arrays.table.vocab['deprel'][i]: float(finals[i] / totals[i])
+                     for i in np.flatnonzero(totals)}
+        return {'head_final_ratio': float(head_final.mean()), 'head_final_by_deprel': by_deprel}
+
+    def random_baseline(self, arrays: DependencyArrays, samples: Optional[int] = None) -> Dict:
+        """Observed distance against random reorderings of the same trees"""
+        samples = self.samples if samples is None else samples
+        observed = float(arrays.distance.sum())
+        # E|pi(i) - pi(j)| = (n + 1) / 3 for a uniform random permutation of n words
+        expected = float(((arrays.sentence_length[arrays.arc_sentence] + 1) / 3).sum())
+        baseline = {
+            'expected_mean_distance': expected / arrays.distance.size,
+            'normalized_distance': observed / expected if expected else 0.0
+        }
+        if samples:
+            rng = np.random.default_rng(self.seed)
+            totals = random_arrangement_distances(arrays.sentence_length, arrays, samples, rng)
+            spread = float(totals.std())
+            baseline.update(
+                sampled_mean_distance=float(totals.mean() / arrays.distance.size),
+                z_score=(observed - float(totals.mean())) / spread if spread else 0.0
+            )
+        return {'random_arrangement': baseline}
@@ -0,0 +1,145 @@
+"""
+Interned morphological features with precompiled bitmask queries.
+
+Each distinct UD feats string (e.g. 'Case=Abl|Number=Plur|VerbForm=Part')
+is parsed once into a bitmask with one bit per Feature=Value pair. Queries
+such as "verbs with Tense=Fut and Voice=Pass" compile to per-feature masks,
+and their answer is cached per distinct feats string, so testing a word
+costs a dictionary lookup. Values match exactly: Tense=Pqp is not
+Tense=Past, and VerbForm=Part does not match VerbForm=PartFut.
+
+    FUTURE_PASSIVE = feature_query('VERB', Tense='Fut', Voice='Pass')
+    PERFECT = feature_query('VERB', Tense=('Perf', 'Pqp')) | feature_query('VERB', Aspect='Perf', Tense='Past')
+    FUTURE_PASSIVE(word)               # one word
+    FUTURE_PASSIVE.select(token_table) # boolean array over a TokenTable
+"""
+
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+FeatureValues = Union[str, Iterable[str]]
+
+
+class FeatureIndex:
+    """Bit assignments for Feature=Value pairs and the mask of each feats string"""
+
+    def __init__(self):
+        self._bits = {}
+        self._masks = {}
+
+    @staticmethod
+    def parse(feats: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+        """Split a feats string into (feature, value) pairs; multi-values split on ','"""
+        if not feats or feats == '_':
+            return ()
+        pairs = []
+        for item in feats.split('|'):
+            feature, _, values = item.partition('=')
+            pairs.extend((feature, value) for value in values.split(','))
+        return tuple(pairs)
+
+    def bit(self, feature: str, value: str) -> int:
+        """Bit for one Feature=Value pair, allocated on first use"""
+        key = (feature, value)
+        if key not in self._bits:
+            self._bits[key] = 1 << len(self._bits)
+        return self._bits[key]
+
+    def mask(self, feats: Optional[str]) -> int:
+        """Bitmask of a feats string, parsed once and cached"""
+        mask = self._masks.get(feats)
+        if mask is None:
+            mask = 0
+            for feature, value in self.parse(feats):
+                mask |= self.bit(feature, value)
+            self._masks[feats] = mask
+        return mask
+
+    def __len__(self) -> int:
+        """Number of distinct feats strings seen"""
+        return len(self._masks)
+
+
+# Shared by every query unless one is given explicitly
+FEATURES = FeatureIndex()
+
+
+class FeatureQuery:
+    """
+    Conjunction of UPOS and feature constraints. Each feature must carry one
+    of its listed values; upos=None accepts any tag.
+    """
+
+    def __init__(self, upos: Optional[FeatureValues] = None,
+                 features: Optional[Dict[str, FeatureValues]] = None,
+                 index: FeatureIndex = FEATURES):
+        self.index = index
+        self.upos = frozenset([upos] if isinstance(upos, str) else upos) if upos else None
+        self.features = {
+            feature: (values,) if isinstance(values, str) else tuple(values)
+            for feature, values in (features or {}).items()
+        }
+        self._required = [
+            sum(index.bit(feature, value) for value in values)
+            for feature, values in self.features.items()
+        ]
+        self._cache = {}
+
+    def matches_feats(self, feats: Optional[str]) -> bool:
+        """Whether a feats string satisfies every feature constraint (cached)"""
+        result = self._cache.get(feats)
+        if result is None:
+            mask = self.index.mask(feats)
+            result = all(mask & required for required in self._required)
+            self._cache[feats] = result
+        return result
+
+    def __call__(self, word) -> bool:
+        if self.upos is not None and word.upos not in self.upos:
+            return False
+        return self.matches_feats(word.feats)
+
+    def __or__(self, other) -> 'AnyQuery':
+        return AnyQuery([self, other])
+
+    def select(self, table) -> np.ndarray:
+        """Boolean mask over a TokenTable's words"""
+        feats_ok = np.array([self.matches_feats(f or None) for f in table.vocab['feats']], dtype=bool)
+        selected = feats_ok[table.feats]
+        if self.upos is not None:
+            upos_ok = np.array([u in self.upos for u in table.vocab['upos']], dtype=bool)
+            selected &= upos_ok[table.upos]
+        return selected
+
+    def __repr__(self) -> str:
+        constraints = ' & '.join(f"{f}={'|'.join(v)}" for f, v in self.features.items())
+        upos = '|'.join(sorted(self.upos)) if self.upos else '*'
+        return f"FeatureQuery({upos}: {constraints or 'any'})"
+
+
+class AnyQuery:
+    """Disjunction of queries"""
+
+    def __init__(self, queries):
+        self.queries = list(queries)
+
+    def __call__(self, word) -> bool:
+        return any(query(word) for query in self.queries)
+
+    def __or__(self, other) -> 'AnyQuery':
+        return AnyQuery(self.queries + [other])
+
+    def select(self, table) -> np.ndarray:
+        selected = np.zeros(len(table), dtype=bool)
+        for query in self.queries:
+            selected |= query.select(table)
+        return selected
+
+    def __repr__(self) -> str:
+        return ' | '.join(repr(query) for query in self.queries)
+
+
+def feature_query(upos: Optional[FeatureValues] = None, **features: FeatureValues) -> FeatureQuery:
+    """Declarative query: feature_query('VERB', Tense='Fut', Voice='Pass')"""
+    return FeatureQuery(upos, features)
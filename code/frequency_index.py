@@ -0,0 +1,250 @@
+"""
+Lemma, form and UPOS n-gram frequencies with per-text and per-period slices.
+
+Every string is hashed once to a stable 64-bit key (BLAKE2b, so keys agree
+across processes and runs), and an n-gram's key is a polynomial hash of
+its token keys. Each distribution is stored as sorted uint64 keys with
+int64 counts, plus the token keys of each n-gram so results can be
+decoded. N-grams never cross sentence boundaries.
+
+Texts are indexed one at a time and kept separately, so adding a text is
+an incremental update and any slice (a text, a period, a set of texts) is
+a merge of sorted arrays rather than a rescan of the corpus:
+
+    index = FrequencyIndex()
+    index.add('latin_caesar', doc)
+    index.period_frequencies('lemma', ('ille',))   # per million, per period
+    index.counts(period='medieval_latin').top('lemma', n=2, k=20)
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from corpus_routing import period_for_text
+from token_table import TokenTable
+
+LAYERS = ['lemma', 'form', 'upos']
+MAX_N = 4
+
+# Odd 64-bit multiplier for combining token keys into n-gram keys
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def string_key(value: str) -> int:
+    """Stable 64-bit key of a string"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def ngram_key(parts: np.ndarray) -> np.ndarray:
+    """Keys of n-grams given their token keys, shape (count, n)"""
+    keys = parts[:, 0].copy()
+    with np.errstate(over='ignore'):
+        for j in range(1, parts.shape[1]):
+            keys = keys * _MULTIPLIER + parts[:, j]
+    return keys
+
+
+def _merge_tables(tables: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+    """Sum (keys, counts, parts) tables into one table with sorted unique keys"""
+    tables = [t for t in tables if t[0].size]
+    if not tables:
+        return None
+    if len(tables) == 1:
+        return tables[0]
+    keys = np.concatenate([t[0] for t in tables])
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([t[1] for t in tables]),
+                         minlength=unique.size).astype(np.int64)
+    parts = np.concatenate([t[2] for t in tables])[first]
+    return unique, counts, parts
+
+
+class NgramCounts:
+    """
+    Frequency distributions for every (layer, n).
+
+    tables: (layer, n) -> (sorted keys, counts, token keys per n-gram)
+    labels: layer -> token key -> string
+    sources: counts to sum; their tables are merged on first use, so a
+    slice only pays for the distributions actually queried
+    """
+
+    def __init__(self, tables: Optional[Dict] = None, labels: Optional[Dict[str, Dict[int, str]]] = None,
+                 sources: Optional[List['NgramCounts']] = None):
+        self.tables = tables or {}
+        self.labels = labels or {layer: {} for layer in LAYERS}
+        self._sources = sources or []
+
+    @classmethod
+    def from_document(cls, doc, max_n: int = MAX_N) -> 'NgramCounts':
+        """Count every n-gram up to max_n in a parsed document"""
+        table = doc if isinstance(doc, TokenTable) else TokenTable.from_document(doc)
+        tables, labels = {}, {}
+        for layer in LAYERS:
+            vocab = table.vocab[layer]
+            vocab_keys = np.array([string_key(v) for v in vocab], dtype=np.uint64)
+            labels[layer] = dict(zip(vocab_keys.tolist(), vocab))
+            token_keys = vocab_keys[table.columns[layer]]
+            for n in range(1, max_n + 1):
+                if len(table) < n:
+                    break
+                starts = np.flatnonzero(table.sentence[:len(table) - n + 1] == table.sentence[n - 1:])
+                parts = np.stack([token_keys[starts + j] for j in range(n)], axis=1)
+                keys = ngram_key(parts)
+                unique, first, counts = np.unique(keys, return_index=True, return_counts=True)
+                tables[(layer, n)] = (unique, counts.astype(np.int64), parts[first])
+        return cls(tables, labels)
+
+    @classmethod
+    def merged(cls, counts: Iterable['NgramCounts']) -> 'NgramCounts':
+        counts = list(counts)
+        labels = {layer: {} for layer in LAYERS}
+        for c in counts:
+            for layer, mapping in c.labels.items():
+                labels[layer].update(mapping)
+        return cls({}, labels, counts)
+
+    def keys(self) -> List[Tuple[str, int]]:
+        """The (layer, n) distributions present"""
+        return sorted(set(self.tables) | {k for c in self._sources for k in c.keys()})
+
+    def table(self, layer: str, n: int = 1):
+        """(keys, counts, parts) of one distribution, or None if empty"""
+        key = (layer, n)
+        if key not in self.tables and self._sources:
+            self.tables[key] = _merge_tables(
+                [t for t in (c.table(layer, n) for c in self._sources) if t is not None])
+        return self.tables.get(key)
+
+    def __add__(self, other: 'NgramCounts') -> 'NgramCounts':
+        return NgramCounts.merged([self, other])
+
+    def total(self, layer: str, n: int = 1) -> int:
+        table = self.table(layer, n)
+        return int(table[1].sum()) if table else 0
+
+    def types(self, layer: str, n: int = 1) -> int:
+        table = self.table(layer, n)
+        return int(table[0].size) if table else 0
+
+    def count(self, layer: str, gram: Union[str, Sequence[str]]) -> int:
+        """Occurrences of one n-gram (a string or a sequence of strings)"""
+        gram = (gram,) if isinstance(gram, str) else tuple(gram)
+        if layer in ('lemma', 'form'):
+            gram = tuple(g.lower() for g in gram)
+        table = self.table(layer, len(gram))
+        if table is None:
+            return 0
+        parts = np.array([[string_key(g) for g in gram]], dtype=np.uint64)
+        key = ngram_key(parts)[0]
+        i = np.searchsorted(table[0], key)
+        return int(table[1][i]) if i < table[0].size and table[0][i] == key else 0
+
+    def frequency(self, layer: str, gram: Union[str, Sequence[str]]) -> float:
+        """Occurrences per million n-grams of the same length"""
+        n = 1 if isinstance(gram, str) else len(gram)
+        total = self.total(layer, n)
+        return self.count(layer, gram) * 1e6 / total if total else 0.0
+
+    def top(self, layer: str, n: int = 1, k: int = 20) -> List[Tuple[Tuple[str, ...], int]]:
+        """The k most frequent n-grams, decoded"""
+        table = self.table(layer, n)
+        if table is None:
+            return []
+        keys, counts, parts = table
+        order = np.argsort(-counts, kind='stable')[:k]
+        labels = self.labels[layer]
+        return [(tuple(labels.get(p, '?') for p in parts[i].tolist()), int(counts[i])) for i in order]
+
+    def to_arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        arrays = {}
+        for layer, n in self.keys():
+            table = self.table(layer, n)
+            if table is None:
+                continue
+            keys, counts, parts = table
+            arrays[f"{prefix}{layer}_{n}_keys"] = keys
+            arrays[f"{prefix}{layer}_{n}_counts"] = counts
+            arrays[f"{prefix}{layer}_{n}_parts"] = parts
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data, labels: Dict, prefix: str = '') -> 'NgramCounts':
+        tables = {}
+        for name in data.files:
+            if name.startswith(prefix) and name.endswith('_keys'):
+                layer, n = name[len(prefix):-len('_keys')].rsplit('_', 1)
+                stem = name[:-len('_keys')]
+                tables[(layer, int(n))] = (data[name], data[f"{stem}_counts"], data[f"{stem}_parts"])
+        return cls(tables, labels)
+
+
+class FrequencyIndex:
+    """Per-text NgramCounts with period and corpus slices"""
+
+    def __init__(self, max_n: int = MAX_N):
+        self.max_n = max_n
+        self.texts: Dict[str, NgramCounts] = {}
+        self._merged = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __contains__(self, text_id: str) -> bool:
+        return text_id in self.texts
+
+    def add(self, text_id: str, doc):
+        """Index (or re-index) one parsed text"""
+        self.texts[text_id] = NgramCounts.from_document(doc, self.max_n)
+        self._merged.clear()
+
+    def merge(self, other: 'FrequencyIndex'):
+        """Take over the texts of another index, e.g. one built by a worker"""
+        self.texts.update(other.texts)
+        self._merged.clear()
+
+    def counts(self, texts: Optional[Iterable[str]] = None, period: Optional[str] = None) -> NgramCounts:
+        """Merged counts over some texts, one period, or the whole corpus"""
+        selected = sorted(self.texts if texts is None else texts)
+        if period is not None:
+            selected = [t for t in selected if period_for_text(t) == period]
+        cache_key = tuple(selected)
+        if cache_key not in self._merged:
+            self._merged[cache_key] = NgramCounts.merged(self.texts[t] for t in selected)
+        return self._merged[cache_key]
+
+    def periods(self) -> List[str]:
+        return sorted({period_for_text(t) for t in self.texts})
+
+    def period_frequencies(self, layer: str, gram: Union[str, Sequence[str]]) -> Dict[str, float]:
+        """Per-million frequency of an n-gram in each period"""
+        return {period: self.counts(period=period).frequency(layer, gram) for period in self.periods()}
+
+    def save(self, path: Union[str, Path]):
+        """Write every text's tables and labels to one .npz"""
+        text_ids = sorted(self.texts)
+        arrays = {}
+        labels = {layer: {} for layer in LAYERS}
+        for i, text_id in enumerate(text_ids):
+            counts = self.texts[text_id]
+            arrays.update(counts.to_arrays(f"t{i}_"))
+            for layer, mapping in counts.labels.items():
+                labels[layer].update(mapping)
+        meta = {'max_n': self.max_n, 'text_ids': text_ids,
+                'labels': {layer: {str(k): v for k, v in m.items()} for layer, m in labels.items()}}
+        np.savez(path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'FrequencyIndex':
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            labels = {layer: {int(k): v for k, v in m.items()} for layer, m in meta['labels'].items()}
+            index = cls(meta['max_n'])
+            for i, text_id in enumerate(meta['text_ids']):
+                # Labels are shared; each text only needs to decode its own keys
+                index.texts[text_id] = NgramCounts.from_arrays(data, labels, f"t{i}_")
+        return index
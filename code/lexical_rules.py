@@ -0,0 +1,116 @@
+"""
+Memoized lexical classification of function words.
+
+Rule tables are frozensets of lowercased forms. Each distinct spelling is
+lowercased and interned once, and the context-independent part of each
+decision is cached per (spelling, upos, language), so over a corpus
+nearly every token costs one dictionary hit. A cached decision is either
+final ('semantic', 'definiteness', ...) or names the one context test it
+still needs: a dependent of the word, or a sibling under the same head,
+with a given relation. Only those tokens scan their sentence.
+"""
+
+import sys
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Preposition rules
+CASE_PREPOSITIONS = frozenset({'de'})                      # de + nmod: genitive replacement
+SPATIAL_PREPOSITIONS = frozenset({'en', 'sobre', 'bajo'})
+GRAMMATICAL_PREPOSITIONS = frozenset({'a', 'para', 'por'})  # + iobj: dative replacement
+LATIN_PREPOSITIONS = frozenset({'in', 'ad', 'ex', 'ab', 'cum'})
+
+# Spanish article rules
+DEFINITE_ARTICLES = frozenset({'el', 'la', 'los', 'las'})
+INDEFINITE_ARTICLES = frozenset({'un', 'una', 'unos', 'unas'})
+CORE_ARGUMENTS = frozenset({'nsubj', 'obj'})
+
+
+class Decision(NamedTuple):
+    """
+    A cached classification: `default`, unless the context test holds.
+
+    scope: None (final), 'child' (a dependent of the word) or 'sibling'
+    (a word sharing its head)
+    deprels: relations that satisfy the test
+    result: the classification when it does
+    """
+    default: str
+    scope: Optional[str] = None
+    deprels: frozenset = frozenset()
+    result: Optional[str] = None
+
+
+def preposition_decision(form: str) -> Decision:
+    if form in CASE_PREPOSITIONS:
+        # Without an nmod dependent 'de' falls through to 'other'
+        return Decision('other', 'child', frozenset({'nmod'}), 'case_replacement')
+    if form in SPATIAL_PREPOSITIONS:
+        return Decision('semantic')
+    if form in GRAMMATICAL_PREPOSITIONS:
+        return Decision('semantic', 'child', frozenset({'iobj'}), 'case_replacement')
+    # Latin (mostly semantic since it has a case system)
+    if form in LATIN_PREPOSITIONS:
+        return Decision('semantic')
+    return Decision('other')
+
+
+def article_decision(form: str, language: str) -> Decision:
+    # Latin has no articles; its DET tags are not counted as articles
+    if language == 'la':
+        return Decision('not_article')
+    if language == 'es':
+        if form in DEFINITE_ARTICLES:
+            # Marking case role when a core argument shares the article's head
+            return Decision('definiteness', 'sibling', CORE_ARGUMENTS, 'case_marking')
+        if form in INDEFINITE_ARTICLES:
+            return Decision('definiteness')
+    return Decision('other')
+
+
+class LexicalClassifier:
+    """Interned forms and cached decisions, keyed on (spelling, upos, language)"""
+
+    def __init__(self):
+        self._forms: Dict[str, str] = {}
+        self._prepositions: Dict[Tuple[str, Optional[str], Optional[str]], Decision] = {}
+        self._articles: Dict[Tuple[str, Optional[str], Optional[str]], Decision] = {}
+
+    def form(self, text: Optional[str]) -> str:
+        """Lowercased form, interned once per distinct spelling"""
+        form = self._forms.get(text)
+        if form is None:
+            form = self._forms[text] = sys.intern((text or '').lower())
+        return form
+
+    @staticmethod
+    def _resolve(decision: Decision, word, sentence) -> str:
+        """Apply a decision's context test, if it has one"""
+        if decision.scope is None:
+            return decision.default
+        head = word.id if decision.scope == 'child' else word.head
+        deprels = decision.deprels
+        for other in sentence.words:
+            if other.head == head and other.deprel in deprels:
+                return decision.result
+        return decision.default
+
+    def classify_preposition(self, word, sentence, language: Optional[str] = None) -> str:
+        key = (word.text, word.upos, language)
+        decision = self._prepositions.get(key)
+        if decision is None:
+            decision = self._prepositions[key] = preposition_decision(self.form(word.text))
+        if decision.scope is None:
+            return decision.default
+        return self._resolve(decision, word, sentence)
+
+    def classify_article(self, word, sentence, language: str) -> str:
+        key = (word.text, word.upos, language)
+        decision = self._articles.get(key)
+        if decision is None:
+            decision = self._articles[key] = article_decision(self.form(word.text), language)
+        if decision.scope is None:
+            return decision.default
+        return self._resolve(decision, word, sentence)
+
+    def cache_size(self) -> int:
+        return len(self._prepositions) + len(self._articles)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Parse-free lexical metrics for screening large corpora.
+
+Function-word counts (articles, prepositions, conjunctions) mostly depend
+on closed-class forms, so they can be estimated without Stanza. The
+scanner tokenizes with one compiled regular expression (words and
+punctuation marks, roughly as Stanza counts words). It counts the
+lowercased tokens with a Counter and classifies only the distinct forms,
+using closed-class tables per language:
+
+- Spanish contractions (del, al) expand to preposition + article, as
+  Stanza's multi-word tokens do
+- Latin -que is counted as a coordinating conjunction on its host word,
+  except in words where it is not an enclitic (atque, quoque, quinque,
+  plerique, quicumque, ...)
+- preposition and article classes take the context-free default of the
+  rules in lexical_rules; the context tests need a parse ('de' + nmod,
+  articles beside core arguments), so those tokens fall to the default
+
+The result has the shape of analyze_function_words, so article rates and
+period statistics can be computed from it directly. Forms that are
+ambiguous without a parse (Spanish la/los/las as clitic pronouns, Latin
+cum as conjunction) are counted by their usual class. `agreement`
+measures the error against full Stanza-based counts on a sample of
+parsed texts:
+
+    python code/lexical_scan.py scan data/raw_texts --output results/lexical_scan.json
+    python code/lexical_scan.py agree --parses results/run/parses --sample 50
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from corpus_reader import open_corpus
+from corpus_routing import CORPUS_PERIODS, period_for_text
+from lexical_rules import article_decision, preposition_decision
+from parsed_docs import load_document
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Closed-class forms by UPOS (lowercased)
+CLOSED_CLASSES = {
+    'la': {
+        'ADP': frozenset({'a', 'ab', 'abs', 'ad', 'adversus', 'ante', 'apud', 'circa', 'circum',
+                          'contra', 'cum', 'de', 'e', 'erga', 'ex', 'extra', 'in', 'infra', 'inter',
+                          'intra', 'iuxta', 'ob', 'per', 'post', 'prae', 'praeter', 'pro', 'prope',
+                          'propter', 'secundum', 'sine', 'sub', 'super', 'supra', 'trans', 'ultra'}),
+        'CCONJ': frozenset({'et', 'atque', 'ac', 'sed', 'aut', 'vel', 'nec', 'neque', 'at', 'sive',
+                            'seu', 'verum', 'nam', 'que'}),
+        'SCONJ': frozenset({'ut', 'uti', 'ne', 'si', 'nisi', 'quia', 'quoniam', 'quamquam', 'quamvis',
+                            'etsi', 'dum', 'donec', 'postquam', 'priusquam', 'antequam', 'quasi',
+                            'tamquam', 'quando'}),
+        'DET': frozenset()
+    },
+    'es': {
+        'ADP': frozenset({'a', 'ante', 'bajo', 'cabe', 'con', 'contra', 'de', 'desde', 'durante', 'en',
+                          'entre', 'hacia', 'hasta', 'mediante', 'para', 'por', 'según', 'sin', 'so',
+                          'sobre', 'tras', 'pora', 'fasta', 'fata'}),
+        'CCONJ': frozenset({'y', 'e', 'o', 'u', 'ni', 'pero', 'mas', 'sino', 'empero'}),
+        'SCONJ': frozenset({'que', 'porque', 'si', 'aunque', 'cuando', 'mientras', 'pues', 'ca',
+                            'maguer'}),
+        'DET': frozenset({'el', 'la', 'los', 'las', 'ell', 'elos', 'un', 'una', 'unos', 'unas',
+                          'este', 'esta', 'estos', 'estas', 'ese', 'esa', 'esos', 'esas',
+                          'aquel', 'aquella', 'aquellos', 'aquellas', 'aqueste', 'aquesta',
+                          'su', 'sus', 'mi', 'mis', 'tu', 'tus', 'nuestro', 'nuestra', 'nuestros',
+                          'nuestras', 'vuestro', 'vuestra', 'vuestros', 'vuestras', 'cada',
+                          'algún', 'alguna', 'algunos', 'algunas', 'ningún', 'ninguna'})
+    }
+}
+
+# Spanish contractions Stanza splits into two words
+CONTRACTIONS = {'es': {'del': ('de', 'el'), 'al': ('a', 'el')}}
+
+# Latin words ending in -que where it is not the enclitic conjunction; every
+# form of plerusque (plerique, pleraque, ...) and of the -cumque relatives is
+# also excluded, by QUE_PREFIXES and QUE_SUFFIXES
+QUE_WORDS = frozenset({
+    'que', 'atque', 'neque', 'quoque', 'itaque', 'usque', 'denique', 'undique', 'ubique', 'utique',
+    'plerumque', 'quisque', 'quaeque', 'quodque', 'quidque', 'quicque', 'quique', 'cuique',
+    'cuiusque', 'quemque', 'quamque', 'quaque', 'quosque', 'quasque', 'quorumque',
+    'quibusque', 'uterque', 'utraque', 'utrumque', 'utriusque', 'utrique', 'utramque', 'utroque',
+    'quicumque', 'quacumque', 'quocumque', 'undecumque', 'ubicumque', 'unusquisque', 'cumque',
+    'absque', 'adusque', 'namque', 'susque', 'quandoque', 'uteque', 'ubiquaque',
+    'quinque', 'aeque', 'inique', 'antique', 'oblique', 'quousque', 'usquequaque'
+})
+QUE_PREFIXES = ('pler',)
+QUE_SUFFIXES = ('cumque',)
+
+
+def is_enclitic_que(form: str) -> bool:
+    """Whether a lowercased Latin word ends in the enclitic conjunction -que"""
+    return (form.endswith('que') and form not in QUE_WORDS
+            and not form.startswith(QUE_PREFIXES) and not form.endswith(QUE_SUFFIXES))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and punctuation tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalScanner:
+    """Function-word counts from closed-class tables, without parsing"""
+
+    def __init__(self):
+        self._classes = {
+            language: {form: upos for upos, forms in classes.items() for form in forms}
+            for language, classes in CLOSED_CLASSES.items()
+        }
+
+    def form_counts(self, text: str, language: str) -> Counter:
+        """Word counts after splitting contractions and enclitics"""
+        counts = Counter(tokenize(text))
+        for form, parts in CONTRACTIONS.get(language, {}).items():
+            n = counts.pop(form, 0)
+            if n:
+                for part in parts:
+                    counts[part] += n
+        if language == 'la':
+            enclitics = sum(n for form, n in counts.items() if is_enclitic_que(form))
+            if enclitics:
+                counts['que'] += enclitics
+        return counts
+
+    def function_words(self, text: str, language: str) -> Dict:
+        """analyze_function_words-shaped counts of one text"""
+        metrics = {
+            'prepositions': {
+                'case_replacement': defaultdict(int),
+                'semantic': defaultdict(int),
+                'grammaticalized': defaultdict(int),
+                'other': defaultdict(int)
+            },
+            'articles': {
+                'definiteness': defaultdict(int),
+                'case_marking': defaultdict(int),
+                'other': defaultdict(int)
+            },
+            'conjunctions': {
+                'coordination': defaultdict(int),
+                'subordination': defaultdict(int)
+            },
+            'total_by_type': defaultdict(int),
+            'word_count': 0
+        }
+        classes = self._classes.get(language, {})
+        counts = self.form_counts(text, language)
+        metrics['word_count'] = sum(counts.values())
+        for form, n in counts.items():
+            upos = classes.get(form)
+            if upos == 'ADP':
+                metrics['prepositions'][preposition_decision(form).default][form] += n
+                metrics['total_by_type']['prepositions'] += n
+            elif upos == 'DET':
+                art_type = article_decision(form, language).default
+                if art_type != 'not_article':
+                    metrics['articles'][art_type][form] += n
+                    metrics['total_by_type']['articles'] += n
+            elif upos in ('CCONJ', 'SCONJ'):
+                conj_type = 'coordination' if upos == 'CCONJ' else 'subordination'
+                metrics['conjunctions'][conj_type][form] += n
+                metrics['total_by_type']['conjunctions'] += n
+        return metrics
+
+
+def summary_counts(function_words: Dict) -> Dict[str, float]:
+    """Totals compared between the fast and the full analysis"""
+    articles = sum(sum(forms.values()) for forms in function_words['articles'].values())
+    words = function_words['word_count']
+    return {
+        'word_count': words,
+        'articles': articles,
+        'article_rate': articles / words * 1000 if words else 0.0,
+        'prepositions': sum(sum(forms.values()) for forms in function_words['prepositions'].values()),
+        'coordination': sum(function_words['conjunctions']['coordination'].values()),
+        'subordination': sum(function_words['conjunctions']['subordination'].values())
+    }
+
+
+def agreement(pairs: Dict[str, tuple]) -> Dict:
+    """
+    Per-text and overall agreement of (fast, full) summary counts: relative
+    error of each total, and the correlation of per-text values across texts
+    """
+    texts = {}
+    for text_id, (fast, full) in pairs.items():
+        texts[text_id] = {
+            measure: {'fast': fast[measure], 'full': full[measure],
+                      'relative_error': (fast[measure] - full[measure]) / full[measure] if full[measure] else None}
+            for measure in full
+        }
+    overall = {}
+    for measure in (next(iter(pairs.values()))[1] if pairs else {}):
+        fast = np.array([pair[0][measure] for pair in pairs.values()], dtype=np.float64)
+        full = np.array([pair[1][measure] for pair in pairs.values()], dtype=np.float64)
+        errors = np.abs(fast - full)[full > 0] / full[full > 0]
+        overall[measure] = {
+            'mean_abs_relative_error': float(errors.mean()) if errors.size else None,
+            'max_abs_relative_error': float(errors.max()) if errors.size else None,
+            'correlation': (float(np.corrcoef(fast, full)[0, 1])
+                            if len(pairs) > 2 and fast.std() > 0 and full.std() > 0 else None)
+        }
+    return {'texts': texts, 'overall': overall}
+
+
+def scan_corpus(corpus, text_ids: Iterable[str], scanner: Optional[LexicalScanner] = None) -> Dict:
+    scanner = scanner or LexicalScanner()
+    results = {}
+    for text_id in text_ids:
+        language = CORPUS_PERIODS[period_for_text(text_id)]['language']
+        results[text_id] = scanner.function_words(corpus.read(text_id), language)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Parse-free function-word counts")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = subparsers.add_parser('scan', help='count function words in a corpus')
+    scan_parser.add_argument('corpus', type=Path, help='corpus directory or packed archive')
+    scan_parser.add_argument('--output', type=Path, default=None)
+
+    agree_parser = subparsers.add_parser('agree', help='compare with Stanza-based counts on saved parses')
+    agree_parser.add_argument('--parses', type=Path,
+                              default=Path(__file__).resolve().parent.parent / "results" / "run" / "parses")
+    agree_parser.add_argument('--sample', type=int, default=None, help='number of parsed texts to compare')
+    agree_parser.add_argument('--seed', type=int, default=0)
+    agree_parser.add_argument('--output', type=Path, default=None)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+    scanner = LexicalScanner()
+
+    if args.command == 'scan':
+        corpus = open_corpus(args.corpus)
+        start = time.perf_counter()
+        results = scan_corpus(corpus, list(corpus), scanner)
+        seconds = time.perf_counter() - start
+        words = sum(r['word_count'] for r in results.values())
+        logger.info("Scanned %d texts, %d words in %.3fs (%.0f words/s)",
+                    len(results), words, seconds, words / seconds if seconds else 0.0)
+        summaries = {text_id: summary_counts(r) for text_id, r in results.items()}
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False)
+        for text_id, summary in summaries.items():
+            print(f"{text_id:40s} {summary['word_count']:8d} words  "
+                  f"{summary['article_rate']:7.2f} articles/1000  "
+                  f"{summary['prepositions']:6d} ADP  {summary['coordination']:6d} CCONJ  "
+                  f"{summary['subordination']:6d} SCONJ")
+        return 0
+
+    from run_analysis import load_script
+    tracker = load_script('02_nlp_analysis.py', 'nlp_analysis').EnhancedComplexityTracker()
+    paths = sorted(p for p in args.parses.glob('*.json') if period_for_text(p.stem) is not None)
+    if args.sample is not None and args.sample < len(paths):
+        paths = sorted(random.Random(args.seed).sample(paths, args.sample))
+    if not paths:
+        logger.error("No parses found in %s", args.parses)
+        return 1
+    pairs = {}
+    for path in paths:
+        language = CORPUS_PERIODS[period_for_text(path.stem)]['language']
+        doc = load_document(path)
+        fast = summary_counts(scanner.function_words(doc.text, language))
+        full = summary_counts(tracker.analyze_function_words(doc, language))
+        pairs[path.stem] = (fast, full)
+    report = agreement(pairs)
+    print(f"{'measure':14s} {'mean |err|':>10s} {'max |err|':>10s} {'r':>7s}   ({len(pairs)} texts)")
+    for measure, values in report['overall'].items():
+        cells = [f"{values[k]:10.4f}" if values[k] is not None else f"{'-':>10s}"
+                 for k in ('mean_abs_relative_error', 'max_abs_relative_error')]
+        r = f"{values['correlation']:7.4f}" if values['correlation'] is not None else f"{'-':>7s}"
+        print(f"{measure:14s} {cells[0]} {cells[1]} {r}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
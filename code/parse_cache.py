@@ -0,0 +1,180 @@
+"""
+Content-addressed cache of parsed sentences.
+
+Formulaic sentences recur across texts and editions (legal formulas,
+epic epithets, liturgical phrases), and a revised edition changes only a
+few percent of its sentences. With a SentenceCache, pipelines split each
+text into sentences (sentence_sampling.split_sentences), look every
+sentence up by a hash of its normalized text and the pipeline's model
+version, and send only unseen sentences through Stanza. A sentence that
+recurs within one batch is parsed once.
+
+The model version covers the language, package, Stanza version, int8
+quantization and the size and modification time of every model file, so
+parses from other models are never reused. Entries live in one SQLite
+file, safe to share between the worker processes of a run and the
+threads of the analysis server:
+
+    registry = PipelineRegistry(cache=SentenceCache('results/run/sentence_cache.sqlite'))
+    doc = registry.get('la').bulk_process(texts)[0]     # a ParsedDocument
+    registry.cache.hit_rate
+
+Sentences are parsed one at a time rather than in the context of the
+whole text, so Stanza's own sentence segmentation may differ from a
+whole-text parse at the edges; each cached unit keeps every sentence
+Stanza found in it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+from parsed_docs import ParsedDocument, document_from_dict, document_to_dict
+from sentence_sampling import split_sentences
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+# Logged once by each run that parses through a cache
+PER_SENTENCE_NOTE = ("Sentence cache on: texts are split into sentences that Stanza parses one at a time, "
+                     "so parses may differ at sentence edges from whole-text parses without the cache")
+
+
+def normalize_sentence(sentence: str) -> str:
+    """NFC, with whitespace runs collapsed; case and punctuation affect parses and are kept"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', sentence)).strip()
+
+
+def model_version(pipeline, key: Tuple[str, str], quantized: bool = False) -> str:
+    """Identity of the models a pipeline parses with"""
+    import stanza
+    parts = [key[0], key[1], stanza.__version__, 'int8' if quantized else 'fp32']
+    for name, processor in sorted(getattr(pipeline, 'processors', {}).items()):
+        config = getattr(processor, 'config', None) or {}
+        model_file = config.get('model_path')
+        if model_file and os.path.exists(model_file):
+            stat = os.stat(model_file)
+            parts.append(f"{name}:{model_file}:{stat.st_size}:{stat.st_mtime_ns}")
+    return '|'.join(parts)
+
+
+class SentenceCache:
+    """
+    Parsed sentences keyed by (model version, normalized text), with
+    lookup and hit counts for this process
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.lookups = 0
+        self.hits = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS sentences (key BLOB PRIMARY KEY, sentences TEXT NOT NULL)')
+        return self._connection
+
+    @staticmethod
+    def key(version: str, sentence: str) -> bytes:
+        return hashlib.blake2b(f"{version}\x00{normalize_sentence(sentence)}".encode('utf-8'),
+                               digest_size=16).digest()
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, List[List[Dict]]]:
+        """Cached parses (document_to_dict layout) of the keys present"""
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, sentences FROM sentences WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((key, json.loads(sentences)) for key, sentences in rows)
+        return found
+
+    def put_many(self, entries: Dict[bytes, List[List[Dict]]]):
+        rows = [(key, json.dumps(sentences, ensure_ascii=False)) for key, sentences in entries.items()]
+        with self._lock, self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO sentences (key, sentences) VALUES (?, ?)', rows)
+
+    def record(self, lookups: int, hits: int):
+        with self._lock:
+            self.lookups += lookups
+            self.hits += hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {'lookups': self.lookups, 'hits': self.hits, 'hit_rate': self.hit_rate}
+
+    def wrap(self, pipeline, key: Tuple[str, str], quantized: bool = False) -> 'CachedPipeline':
+        return CachedPipeline(pipeline, self, model_version(pipeline, key, quantized))
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class CachedPipeline:
+    """A Stanza pipeline that parses only the sentences its cache has not seen"""
+
+    def __init__(self, pipeline, cache: SentenceCache, version: str):
+        self.pipeline = pipeline
+        self.cache = cache
+        self.version = version
+
+    def __getattr__(self, name):
+        # processors, config, ... of the wrapped pipeline
+        return getattr(self.pipeline, name)
+
+    def __call__(self, text) -> ParsedDocument:
+        return self.bulk_process([text])[0]
+
+    def bulk_process(self, texts) -> List[ParsedDocument]:
+        texts = [text if isinstance(text, str) else text.text for text in texts]
+        units = [split_sentences(text) for text in texts]
+        keys = [[self.cache.key(self.version, unit) for unit in text_units] for text_units in units]
+        found = self.cache.get_many(key for text_keys in keys for key in text_keys)
+
+        # Unseen sentences, each parsed once however often it recurs
+        missing = {}
+        for text_units, text_keys in zip(units, keys):
+            for unit, key in zip(text_units, text_keys):
+                if key not in found and key not in missing:
+                    missing[key] = unit
+        if missing:
+            parsed = self.pipeline.bulk_process(list(missing.values()))
+            entries = {key: document_to_dict(doc) for key, doc in zip(missing, parsed)}
+            self.cache.put_many(entries)
+            found.update(entries)
+
+        lookups = sum(len(text_keys) for text_keys in keys)
+        self.cache.record(lookups, lookups - len(missing))
+        logger.debug("Sentence cache: %d of %d sentences reused", lookups - len(missing), lookups)
+        return [ParsedDocument([sentence for key in text_keys
+                                for sentence in document_from_dict(found[key]).sentences], text)
+                for text, text_keys in zip(texts, keys)]
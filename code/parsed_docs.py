@@ -0,0 +1,91 @@
+"""
+Lightweight parsed-document objects with the attributes the analyzers use.
+
+They mirror the parts of stanza's Document/Sentence/Word API read by
+EnhancedComplexityTracker (sentences, words, id, text, lemma, upos, feats,
+head, deprel, sent), so parses loaded from disk or produced offline can be
+analyzed without Stanza or its models.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+class ParsedWord:
+    __slots__ = ('id', 'text', 'lemma', 'upos', 'feats', 'head', 'deprel', 'sent')
+
+    def __init__(self, id: int, text: str, lemma: Optional[str], upos: str,
+                 feats: Optional[str], head: int, deprel: str):
+        self.id = id
+        self.text = text
+        self.lemma = lemma
+        self.upos = upos
+        self.feats = feats
+        self.head = head
+        self.deprel = deprel
+        self.sent = None
+
+
+class ParsedSentence:
+    __slots__ = ('words',)
+
+    def __init__(self, words: List[ParsedWord]):
+        self.words = words
+        for word in words:
+            word.sent = self
+
+
+class ParsedDocument:
+    __slots__ = ('sentences', 'text')
+
+    def __init__(self, sentences: List[ParsedSentence], text: str = ''):
+        self.sentences = sentences
+        self.text = text
+
+
+def document_from_dict(sentences: List[List[Dict]], text: str = '') -> ParsedDocument:
+    """
+    Build a document from stanza's Document.to_dict() layout.
+
+    Multi-word token entries (ids spanning several words) are skipped; their
+    component words follow them as separate entries.
+    """
+    parsed = []
+    for sent in sentences:
+        words = []
+        for entry in sent:
+            word_id = entry['id']
+            if isinstance(word_id, (list, tuple)):
+                if len(word_id) != 1:
+                    continue
+                word_id = word_id[0]
+            words.append(ParsedWord(
+                int(word_id), entry['text'], entry.get('lemma'), entry.get('upos'),
+                entry.get('feats'), int(entry.get('head', 0)), entry.get('deprel')
+            ))
+        parsed.append(ParsedSentence(words))
+    return ParsedDocument(parsed, text)
+
+
+def document_to_dict(doc) -> List[List[Dict]]:
+    """Dump any stanza-like document to the to_dict() layout"""
+    return [
+        [{'id': w.id, 'text': w.text, 'lemma': w.lemma, 'upos': w.upos,
+          'feats': w.feats, 'head': w.head, 'deprel': w.deprel}
+         for w in sent.words]
+        for sent in doc.sentences
+    ]
+
+
+def save_document(doc, path: Union[str, Path]):
+    """Write a parse to JSON, keeping the original text alongside it"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'text': doc.text, 'sentences': document_to_dict(doc)}, f, ensure_ascii=False)
+
+
+def load_document(path: Union[str, Path]) -> ParsedDocument:
+    """Read a parse written by save_document"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return document_from_dict(data['sentences'], data.get('text', ''))
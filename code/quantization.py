@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Dynamic int8 quantization of Stanza's neural models for CPU inference.
+
+The POS and dependency models dominate the cost of every nlp(text) call.
+PipelineQuantizer replaces their Linear and LSTM layers with dynamically
+quantized int8 versions (weights stored as int8, activations quantized on
+the fly), after the pipeline has loaded on CPU. Tokenization is left in
+full precision, so quantized and full-precision parses share tokens and
+can be compared word by word.
+
+Quantized models are cached on disk, keyed by the model file and the
+Stanza and torch versions. A cached model is loaded as is, without
+quantizing again, so later runs skip that work and use the same int8
+weights as the accuracy check that measured them. The cache holds
+pickled modules; keep it among trusted files:
+
+    registry = PipelineRegistry(quantizer=PipelineQuantizer())
+    EnhancedComplexityTracker(quantize=True)          # the same, via the tracker
+    python code/run_analysis.py --quantize ...
+
+The check parses texts both ways and reports UPOS/feats/head/deprel
+agreement (and LAS, head and deprel together) against the full-precision
+parse, with the time each took:
+
+    python code/quantization.py check --corpus data/raw_texts --output results/quantization.json
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from corpus_reader import open_corpus
+from corpus_routing import PipelineRegistry, period_for_text, pipeline_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE = Path(__file__).resolve().parent.parent / "results" / "run" / "quantized"
+# Processors whose models are quantized; tokenize stays in full precision
+QUANTIZED_PROCESSORS = ('pos', 'depparse')
+MEASURES = ['upos', 'feats', 'head', 'deprel', 'las']
+
+
+def _model_file(processor) -> Optional[str]:
+    config = getattr(processor, 'config', None) or {}
+    return config.get('model_path')
+
+
+class PipelineQuantizer:
+    """
+    cache_dir: where quantized modules are kept (None disables the cache)
+    processors: pipeline processors whose models are quantized
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = DEFAULT_CACHE,
+                 processors: Iterable[str] = QUANTIZED_PROCESSORS):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.processors = tuple(processors)
+        # Pipeline key -> processors actually quantized
+        self.quantized: Dict[Tuple[str, str], List[str]] = {}
+
+    def cache_path(self, key: Tuple[str, str], name: str, processor) -> Optional[Path]:
+        """Cache file for one processor's model, or None when it cannot be keyed"""
+        import stanza
+        import torch
+        model_file = _model_file(processor)
+        if self.cache_dir is None or not model_file or not os.path.exists(model_file):
+            return None
+        stat = os.stat(model_file)
+        identity = f"{model_file}|{stat.st_size}|{stat.st_mtime_ns}|{stanza.__version__}|{torch.__version__}"
+        digest = hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+        return self.cache_dir / f"{key[0]}_{key[1]}_{name}_{digest}.pt"
+
+    def quantize(self, pipeline, key: Tuple[str, str]) -> List[str]:
+        """Quantize a loaded pipeline's models in place; returns the processors quantized"""
+        import torch
+        quantized = []
+        for name in self.processors:
+            processor = getattr(pipeline, 'processors', {}).get(name)
+            if processor is None:
+                logger.warning("Keeping %s %s in full precision: not in the pipeline", key, name)
+                continue
+            # POS and depparse processors hold their Trainer as `trainer`
+            # (`_trainer`), and the trainer holds the network as `model`
+            trainer = getattr(processor, 'trainer', None) or getattr(processor, '_trainer', None)
+            module = getattr(trainer, 'model', None)
+            if not isinstance(module, torch.nn.Module):
+                logger.warning("Keeping %s %s in full precision: no model found on the processor", key, name)
+                continue
+            try:
+                trainer.model = self._quantize_module(module, self.cache_path(key, name, processor))
+            except (RuntimeError, AttributeError, TypeError) as e:
+                logger.warning("Keeping %s %s in full precision: %s", key, name, e)
+                continue
+            quantized.append(name)
+        self.quantized[key] = quantized
+        if quantized:
+            logger.info("Quantized %s (%s) to int8: %s", key[0], key[1], ', '.join(quantized))
+        else:
+            logger.warning("Quantized nothing in %s (%s); parses stay in full precision", key[0], key[1])
+        return quantized
+
+    @staticmethod
+    def _quantize_module(module, cache_path: Optional[Path]):
+        import torch
+        if cache_path is not None and cache_path.exists():
+            # Whole quantized modules are cached, so a hit skips quantize_dynamic
+            try:
+                cached = torch.load(cache_path, map_location='cpu', weights_only=False)
+            except TypeError:
+                # torch < 1.13 has no weights_only and always unpickles
+                cached = torch.load(cache_path, map_location='cpu')
+            if isinstance(cached, torch.nn.Module):
+                logger.debug("Loaded quantized model from %s", cache_path)
+                return cached.eval()
+            logger.info("%s holds weights only (older cache layout); quantizing again", cache_path)
+        module = torch.ao.quantization.quantize_dynamic(
+            module.cpu().eval(), {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+        if cache_path is None:
+            return module
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        torch.save(module, tmp_path)
+        tmp_path.replace(cache_path)
+        logger.debug("Cached quantized model in %s", cache_path)
+        return module
+
+
+def agreement_counts(reference, candidate) -> Dict[str, int]:
+    """
+    Word-level matches of a candidate parse against a reference parse of
+    the same text. Sentences whose words differ in number are not aligned
+    and are counted separately.
+    """
+    counts = dict.fromkeys(MEASURES, 0)
+    counts.update(words=0, sentences=0, misaligned_sentences=0)
+    for ref_sent, cand_sent in zip(reference.sentences, candidate.sentences):
+        counts['sentences'] += 1
+        if len(ref_sent.words) != len(cand_sent.words):
+            counts['misaligned_sentences'] += 1
+            continue
+        for ref, cand in zip(ref_sent.words, cand_sent.words):
+            counts['words'] += 1
+            counts['upos'] += ref.upos == cand.upos
+            counts['feats'] += ref.feats == cand.feats
+            counts['head'] += ref.head == cand.head
+            counts['deprel'] += ref.deprel == cand.deprel
+            counts['las'] += ref.head == cand.head and ref.deprel == cand.deprel
+    counts['misaligned_sentences'] += abs(len(reference.sentences) - len(candidate.sentences))
+    return counts
+
+
+def agreement_rates(counts: Dict[str, int]) -> Dict[str, float]:
+    words = counts['words']
+    return {measure: counts[measure] / words if words else 0.0 for measure in MEASURES}
+
+
+def accuracy_check(corpus, text_ids: List[str], packages: Optional[Dict[str, str]] = None,
+                   quantizer: Optional[PipelineQuantizer] = None) -> Dict:
+    """
+    Parse texts with full-precision and quantized pipelines and report
+    agreement and parse time per pipeline and overall
+    """
+    quantizer = quantizer or PipelineQuantizer()
+    full = PipelineRegistry(use_gpu=False)
+    quantized = PipelineRegistry(quantizer=quantizer, use_gpu=False)
+    groups: Dict[str, Dict] = {}
+    for text_id in text_ids:
+        key = pipeline_key(period_for_text(text_id), packages)
+        text = corpus.read(text_id)
+        reference_nlp, candidate_nlp = full.get(*key), quantized.get(*key)
+        start = time.perf_counter()
+        reference = reference_nlp(text)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        candidate = candidate_nlp(text)
+        int8_seconds = time.perf_counter() - start
+
+        counts = agreement_counts(reference, candidate)
+        logger.info("%s: %d words, LAS agreement %.4f, %.2fs -> %.2fs", text_id, counts['words'],
+                    agreement_rates(counts)['las'], full_seconds, int8_seconds)
+        for group_name in (f"{key[0]}/{key[1]}", 'all'):
+            group = groups.setdefault(group_name, {'texts': 0, 'full_seconds': 0.0, 'int8_seconds': 0.0,
+                                                   'counts': dict.fromkeys(counts, 0)})
+            group['texts'] += 1
+            # Processors running in int8; empty means both parses were full precision
+            if group_name != 'all':
+                group['quantized'] = quantizer.quantized.get(key, [])
+            group['full_seconds'] += full_seconds
+            group['int8_seconds'] += int8_seconds
+            for name, value in counts.items():
+                group['counts'][name] += value
+
+    if 'all' in groups:
+        groups['all'] = groups.pop('all')
+    for group in groups.values():
+        group['agreement'] = agreement_rates(group['counts'])
+        group['speedup'] = group['full_seconds'] / group['int8_seconds'] if group['int8_seconds'] else 0.0
+    return groups
+
+
+def format_report(groups: Dict) -> str:
+    lines = [f"{'pipeline':16s} {'texts':>5s} {'words':>8s} " + ' '.join(f"{m:>7s}" for m in MEASURES)
+             + f" {'speedup':>8s}"]
+    for name, group in groups.items():
+        agreement = group['agreement']
+        lines.append(f"{name:16s} {group['texts']:5d} {group['counts']['words']:8d} "
+                     + ' '.join(f"{agreement[m]:7.4f}" for m in MEASURES)
+                     + f" {group['speedup']:7.2f}x")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="int8 Stanza models and their accuracy check")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check', help='compare quantized and full-precision parses')
+    check_parser.add_argument('--corpus', type=Path,
+                              default=Path(__file__).resolve().parent.parent / "data" / "raw_texts")
+    check_parser.add_argument('--texts', nargs='+', default=None, metavar='PATTERN',
+                              help='only texts whose id matches a glob')
+    check_parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE)
+    check_parser.add_argument('--output', type=Path, default=None, help='write the report as JSON')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    corpus = open_corpus(args.corpus)
+    text_ids = [t for t in corpus if not args.texts or any(fnmatch.fnmatchcase(t, p) for p in args.texts)]
+    groups = accuracy_check(corpus, text_ids, quantizer=PipelineQuantizer(args.cache_dir))
+    print(format_report(groups))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(groups, f, indent=2)
+    unquantized = [name for name, group in groups.items() if name != 'all' and not group['quantized']]
+    if unquantized:
+        logger.error("Nothing was quantized for %s; the report compares full precision with itself",
+                     ', '.join(unquantized))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Random-tree baselines for dependency distance and depth.
+
+Sentence length alone drives distance and depth, so observed values are
+compared with random trees of the same length. For each length n, a batch
+of uniformly random rooted labeled trees (n^(n-1) of them) is decoded
+from random codes, all trees of the batch at once. Each tree is then
+linearized two ways:
+
+    non_projective  words in label order: free word order, crossings allowed
+    projective      a random projective order: every head and its
+                    dependents' subtrees are shuffled as contiguous blocks
+
+Both linearizations share tree shapes, so their expected depths are the
+same. Expected totals are cached per length (in memory and optionally in
+a JSON file shared by the processes of a run); only the lengths that
+occur are simulated, and a corpus is compared with one lookup per
+distinct length.
+
+    baseline = RandomTreeBaseline(cache_path='results/run/random_trees.json')
+    baseline.compare(DependencyArrays.from_document(doc))
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+ORDERS = ['projective', 'non_projective']
+
+
+def random_rooted_trees(n: int, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Parent arrays (samples, n) of uniformly random rooted labeled trees,
+    -1 for the root. Decodes a random code in [0, n)^(n-1): each step
+    removes the smallest node without remaining children and attaches it
+    to the next code entry; the last node left is the root.
+
+    The smallest leaf is found in linear time per tree, for all trees at
+    once: a pointer scans upward for childless nodes, and a code entry
+    that loses its last child below the pointer is the next leaf itself.
+    """
+    parents = np.full((samples, n), -1, dtype=np.int64)
+    if n == 1:
+        return parents
+    code = rng.integers(0, n, size=(samples, n - 1))
+    rows = np.arange(samples)
+    # Remaining children of each node
+    pending = np.zeros((samples, n), dtype=np.int64)
+    np.add.at(pending, (np.repeat(rows, n - 1), code.ravel()), 1)
+    pointer = (pending == 0).argmax(axis=1)
+    leaf = pointer.copy()
+    for step in range(n - 1):
+        head = code[:, step]
+        parents[rows, leaf] = head
+        if step == n - 2:
+            break
+        pending[rows, head] -= 1
+        released = (pending[rows, head] == 0) & (head < pointer)
+        # Nodes above the pointer are all still in the tree
+        scanning = np.flatnonzero(~released)
+        pointer[scanning] += 1
+        while scanning.size:
+            scanning = scanning[pending[scanning, pointer[scanning]] != 0]
+            pointer[scanning] += 1
+        leaf = np.where(released, head, pointer)
+    return parents
+
+
+def _global_parents(parents: np.ndarray) -> np.ndarray:
+    """Flattened parent arrays with indices into the flattened batch"""
+    samples, n = parents.shape
+    base = np.repeat(np.arange(samples) * n, n)
+    flat = parents.ravel()
+    return np.where(flat >= 0, base + flat, -1)
+
+
+def _path_sums(parent: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """
+    Sum of `weight` over each node and all its ancestors, by pointer
+    doubling: after k rounds every node has summed its 2^k nearest path
+    nodes, so trees of depth d take log2(d) rounds
+    """
+    total = weight.copy()
+    ancestor = parent.copy()
+    active = np.flatnonzero(ancestor >= 0)
+    while active.size:
+        jump = ancestor[active]
+        total[active] += total[jump]
+        ancestor[active] = ancestor[jump]
+        active = active[ancestor[active] >= 0]
+    return total
+
+
+def tree_depths(parents: np.ndarray) -> np.ndarray:
+    """Depth of every node (root 0)"""
+    flat = _global_parents(parents)
+    return _path_sums(flat, (flat >= 0).astype(np.int64)).reshape(parents.shape)
+
+
+def projective_positions(parents: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Positions (samples, n) of a random projective order of each tree.
+
+    Every node's subtree is a contiguous block; within a head's block the
+    head and its children's blocks appear in random order. Offsets come
+    from segmented sums over subtree sizes, and absolute positions from
+    summing offsets along the path to the root.
+    """
+    samples, n = parents.shape
+    rows = np.repeat(np.arange(samples), n)
+    flat_parent = parents.ravel()
+    has_parent = flat_parent >= 0
+
+    depths = tree_depths(parents).ravel()
+    sizes = np.ones(samples * n, dtype=np.int64)
+    # Nodes grouped by depth once, so each level touches only its own nodes
+    by_depth = np.argsort(depths, kind='stable')
+    level_start = np.searchsorted(depths[by_depth], np.arange(int(depths.max()) + 2))
+    for depth in range(int(depths.max()), 0, -1):
+        level = by_depth[level_start[depth]:level_start[depth + 1]]
+        np.add.at(sizes, rows[level] * n + flat_parent[level], sizes[level])
+
+    # Random slot keys for each node among its siblings, and for each head among its children
+    child_key = rng.random(samples * n)
+    head_key = rng.random(samples * n)
+
+    children = np.flatnonzero(has_parent)
+    group = rows[children] * n + flat_parent[children]
+    order = children[np.lexsort((child_key[children], group))]
+    group_sorted = rows[order] * n + flat_parent[order]
+    # Exclusive cumulative size of earlier siblings, restarting at each group
+    cumulative = np.cumsum(sizes[order]) - sizes[order]
+    group_first = np.r_[True, group_sorted[1:] != group_sorted[:-1]]
+    cumulative -= np.maximum.accumulate(np.where(group_first, cumulative, 0))
+
+    offset = np.zeros(samples * n, dtype=np.int64)
+    offset[order] = cumulative + (head_key[group_sorted] < child_key[order])
+    own = np.zeros(samples * n, dtype=np.int64)
+    before_head = child_key[children] < head_key[group]
+    np.add.at(own, group[before_head], sizes[children[before_head]])
+
+    # Block start = sum of offsets from the node up to the root
+    start = _path_sums(_global_parents(parents), offset)
+    return (start + own).reshape(samples, n)
+
+
+def arc_distances(parents: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Total |head - dependent| distance of each tree"""
+    rows = np.arange(parents.shape[0])[:, None]
+    head_positions = positions[rows, np.maximum(parents, 0)]
+    return np.where(parents >= 0, np.abs(positions - head_positions), 0).sum(axis=1)
+
+
+class RandomTreeBaseline:
+    """
+    samples: random trees drawn per sentence length
+    seed: base RNG seed; each length gets its own stream, so results do not
+    depend on the order lengths are requested in
+    cache_path: optional JSON file keeping expectations across runs
+    """
+
+    def __init__(self, samples: int = 200, seed: int = 0,
+                 cache_path: Optional[Union[str, Path]] = None):
+        self.samples = samples
+        self.seed = seed
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: Dict[int, Dict] = {}
+        self._load()
+
+    def _load(self):
+        """Merge expectations stored by this or other processes into the cache"""
+        if not (self.cache_path and self.cache_path.exists()):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if stored.get('samples') == self.samples and stored.get('seed') == self.seed:
+            for n, value in stored['lengths'].items():
+                self._cache.setdefault(int(n), value)
+
+    def expected(self, n: int) -> Dict:
+        """Expected total distance and maximum depth of random trees of n words"""
+        if n not in self._cache:
+            rng = np.random.default_rng([self.seed, n])
+            parents = random_rooted_trees(n, self.samples, rng)
+            depth = tree_depths(parents).max(axis=1)
+            positions = {
+                'non_projective': np.broadcast_to(np.arange(n), parents.shape),
+                'projective': projective_positions(parents, rng)
+            }
+            self._cache[n] = {
+                order: {'distance': float(arc_distances(parents, positions[order]).mean()),
+                        'depth': float(depth.mean())}
+                for order in ORDERS
+            }
+        return self._cache[n]
+
+    def table(self, lengths) -> Tuple[np.ndarray, Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Expected totals for the distinct sentence lengths given: the sorted
+        lengths and, per order and measure, an array aligned with them.
+        Only lengths not yet cached are simulated.
+        """
+        unique = np.unique(np.asarray(lengths, dtype=np.int64))
+        missing = [n for n in unique.tolist() if n > 0 and n not in self._cache]
+        if missing:
+            # Another worker may have stored them since this process started
+            self._load()
+            missing = [n for n in missing if n not in self._cache]
+        tables = {order: {'distance': np.zeros(unique.size), 'depth': np.zeros(unique.size)}
+                  for order in ORDERS}
+        for i, n in enumerate(unique.tolist()):
+            if n <= 0:
+                continue
+            for order, values in self.expected(n).items():
+                for measure, value in values.items():
+                    tables[order][measure][i] = value
+        if missing:
+            self.save()
+        return unique, tables
+
+    def compare(self, arrays) -> Dict:
+        """Observed distance and depth of a document relative to random trees"""
+        lengths = arrays.sentence_length
+        if lengths.size == 0:
+            return {}
+        unique, tables = self.table(lengths)
+        rows = np.searchsorted(unique, lengths)
+        observed_distance = float(arrays.distance.sum())
+        observed_depth = float(arrays.sentence_depth.sum())
+        results = {}
+        for order in ORDERS:
+            expected_distance = float(tables[order]['distance'][rows].sum())
+            expected_depth = float(tables[order]['depth'][rows].sum())
+            results[order] = {
+                'expected_mean_distance': expected_distance / max(1, arrays.distance.size),
+                'distance_ratio': observed_distance / expected_distance if expected_distance else 0.0,
+                'expected_mean_depth': expected_depth / lengths.size,
+                'depth_ratio': observed_depth / expected_depth if expected_depth else 0.0
+            }
+        return results
+
+    def save(self):
+        """
+        Write cached expectations, if a cache file was given. Entries other
+        processes stored meanwhile are merged in first; with the same
+        samples and seed they are the values this process would compute.
+        """
+        if not self.cache_path:
+            return
+        self._load()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'samples': self.samples, 'seed': self.seed,
+                       'lengths': {str(n): value for n, value in sorted(self._cache.items())}}, f)
+        tmp_path.replace(self.cache_path)
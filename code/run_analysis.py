@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for the analysis pipeline.
+
+Stages (run in this order, any subset):
+    parse        Stanza parses -> <work-dir>/parses/<text_id>.json
+    analyze      integrated_analysis -> <work-dir>/analysis/<text_id>.json
+                 (random-tree expectations cached in <work-dir>/random_trees.json)
+    frequencies  lemma/form/UPOS n-gram counts -> <work-dir>/frequencies.npz
+    stats        period aggregates -> <work-dir>/aggregates.json, then
+                 StatisticalAnalysis -> <work-dir>/stats.json, stats.txt
+    figures      figures from stats.json -> <figures-dir>
+
+Every text is checkpointed as soon as it completes; --resume skips texts
+whose checkpoint already exists, so a crashed run continues where it
+stopped. With --workers above 1, texts run on a process pool sized and
+fed by the resource scheduler (CPU budget, memory ceiling; see scheduler).
+
+Usage:
+    python code/run_analysis.py --corpus data/raw_texts
+    python code/run_analysis.py --stages parse analyze --periods medieval_latin --workers 4
+    python code/run_analysis.py --resume --log-level DEBUG
+    python code/run_analysis.py --workers 4 --cpus 8 --memory-limit 12G
+    python code/run_analysis.py --stages stats figures --work-dir results/run
+    python code/run_analysis.py --stages stats --merge-aggregates other_run/aggregates.json
+    python code/run_analysis.py --conllu medieval_latin=treebanks/ittb --stages analyze stats
+
+--conllu imports pre-parsed CoNLL-U treebanks as parse checkpoints (see
+conllu); their documents join the selected texts and skip the parse stage.
+"""
+
+import argparse
+import fnmatch
+import importlib.util
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aggregates import CorpusAggregates
+from corpus_reader import open_corpus
+from conllu import import_treebank
+from corpus_routing import CORPUS_PERIODS, period_for_text, pipeline_key, route_texts
+from dedup import NearDuplicateFilter
+from frequency_index import FrequencyIndex
+from parse_cache import PER_SENTENCE_NOTE, SentenceCache
+from parsed_docs import load_document, save_document
+from period_stats import StatisticalAnalysis, aggregate_results
+from scheduler import WORKER_MEMORY, ResourceScheduler, count_tokens, parse_memory
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+STAGES = ['parse', 'analyze', 'frequencies', 'stats', 'figures']
+# Approximate size of one token in a saved parse (form, lemma, tags, feats, head)
+PARSE_BYTES_PER_TOKEN = 150
+
+
+def load_script(filename: str, module_name: str):
+    """Import a numbered pipeline script, whose file name is not a valid module name"""
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).with_name(filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def to_json(value):
+    """Convert analysis output (numpy scalars/arrays, tuples) to JSON types"""
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_checkpoint(data, path: Path):
+    """Write JSON atomically, so an interrupted write never looks complete"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(to_json(data), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def select_texts(text_ids: List[str], patterns: Optional[List[str]],
+                 periods: Optional[List[str]]) -> List[str]:
+    """Restrict a run to texts matching any id pattern and any listed period"""
+    selected = []
+    for text_id in text_ids:
+        if periods and period_for_text(text_id) not in periods:
+            continue
+        if patterns and not any(fnmatch.fnmatchcase(text_id, p) for p in patterns):
+            continue
+        selected.append(text_id)
+    return selected
+
+
+def parse_tokens(path: Path) -> int:
+    """Token count of a saved parse, estimated from its file size"""
+    return path.stat().st_size // PARSE_BYTES_PER_TOKEN
+
+
+def pending(text_ids: List[str], checkpoint_dir: Path, resume: bool) -> List[str]:
+    if not resume:
+        return list(text_ids)
+    todo = [t for t in text_ids if not (checkpoint_dir / f"{t}.json").exists()]
+    if len(todo) < len(text_ids):
+        logger.info("Resuming: %d of %d texts already done", len(text_ids) - len(todo), len(text_ids))
+    return todo
+
+
+# Worker-process state: one tracker per process, built by _init_worker
+_worker = {}
+
+
+def _init_worker(corpus_path: str, packages: Dict[str, str], log_level: int, quantize: bool = False,
+                 sentence_cache: Optional[str] = None, random_tree_cache: Optional[str] = None):
+    logging.basicConfig(level=log_level, format="%(levelname)s [%(process)d] %(message)s")
+    analysis = load_script('02_nlp_analysis.py', 'nlp_analysis')
+    _worker['tracker'] = analysis.EnhancedComplexityTracker(
+        corpus_path, packages, quantize=quantize,
+        sentence_cache=SentenceCache(sentence_cache) if sentence_cache else None,
+        random_tree_cache=random_tree_cache)
+    _worker['corpus'] = open_corpus(corpus_path)
+
+
+def _parse_text(text_id: str, parse_dir: str) -> Tuple[int, int]:
+    """Parse and save one text; returns its sentence cache lookups and hits"""
+    tracker, corpus = _worker['tracker'], _worker['corpus']
+    language, package = pipeline_key(period_for_text(text_id), tracker.packages)
+    cache = tracker.sentence_cache
+    before = (cache.lookups, cache.hits) if cache is not None else (0, 0)
+    doc = tracker.pipelines.get(language, package)(corpus.read(text_id))
+    save_document(doc, Path(parse_dir) / f"{text_id}.json")
+    if cache is None:
+        return 0, 0
+    return cache.lookups - before[0], cache.hits - before[1]
+
+
+def _analyze_text(text_id: str, parse_dir: str, analysis_dir: str) -> str:
+    doc = load_document(Path(parse_dir) / f"{text_id}.json")
+    language = CORPUS_PERIODS[period_for_text(text_id)]['language']
+    results = _worker['tracker'].integrated_analysis(doc, language)
+    write_checkpoint(results, Path(analysis_dir) / f"{text_id}.json")
+    return text_id
+
+
+def _analyze_corpus_text(text_id: str, sampler=None, deduplication: Optional[Dict] = None) -> Dict:
+    """Parse and analyze one corpus text (EnhancedComplexityTracker.analyze_full_corpus workers)"""
+    tracker, corpus = _worker['tracker'], _worker['corpus']
+    language, package = pipeline_key(period_for_text(text_id), tracker.packages)
+    nlp = tracker.pipelines.get(language, package)
+    text = NearDuplicateFilter.apply(corpus.read(text_id), (deduplication or {}).get(text_id))
+    if sampler is not None:
+        return tracker.sampled_analysis(text, language, sampler, text_id, nlp)
+    doc = nlp(text)
+    return tracker.integrated_analysis(doc, language)
+
+
+def _run_per_text(task, label: str, text_ids: List[str], task_args: tuple, args,
+                  cost: Optional[Callable[[str], int]] = None,
+                  on_result: Optional[Callable[[str, object], None]] = None) -> int:
+    """
+    Run a per-text task in-process or on a worker pool; returns failure count.
+    Pool runs go through the resource scheduler, with `cost` giving each
+    text's token count. `on_result` receives each successful task's result.
+    """
+    # Workers share random-tree expectations through one file per work dir
+    init_args = (str(args.corpus), args.packages, logging.getLogger().level, args.quantize,
+                 str(args.sentence_cache) if args.sentence_cache else None,
+                 str(args.work_dir / 'random_trees.json'))
+    failures = 0
+    if args.workers <= 1:
+        _init_worker(*init_args)
+        for text_id in text_ids:
+            logger.info("%s %s...", label, text_id)
+            try:
+                result = task(text_id, *task_args)
+            except Exception as e:
+                logger.error("Failed on %s: %s", text_id, e)
+                failures += 1
+                continue
+            if on_result is not None:
+                on_result(text_id, result)
+        return failures
+
+    scheduler = ResourceScheduler(args.cpus, args.memory_limit, args.workers, args.worker_memory)
+    costs = {text_id: cost(text_id) if cost else 1 for text_id in text_ids}
+    for text_id, result, error in scheduler.run(task, costs, task_args, _init_worker, init_args):
+        if error is None:
+            logger.info("%s %s done", label, text_id)
+            if on_result is not None:
+                on_result(text_id, result)
+        else:
+            logger.error("Failed on %s: %s", text_id, error)
+            failures += 1
+    return failures
+
+
+def stage_parse(text_ids: List[str], args) -> int:
+    parse_dir = args.work_dir / 'parses'
+    parse_dir.mkdir(parents=True, exist_ok=True)
+    # Treebank documents arrive parsed
+    todo = pending([t for t in text_ids if t not in args.treebank_ids], parse_dir, args.resume)
+    # Order by pipeline so in-process runs load each model once, before moving on
+    ordered = [t for group in route_texts(todo, args.packages).values() for t in group]
+    corpus = open_corpus(args.corpus)
+    cache_counts = np.zeros(2, dtype=np.int64)
+    if args.sentence_cache and ordered:
+        logger.warning(PER_SENTENCE_NOTE)
+
+    def count_reuse(text_id: str, counts: Tuple[int, int]):
+        cache_counts[:] += counts
+
+    failures = _run_per_text(_parse_text, 'Parsing', ordered, (str(parse_dir),), args,
+                             cost=lambda text_id: count_tokens(corpus.read(text_id)),
+                             on_result=count_reuse)
+    if args.sentence_cache:
+        lookups, hits = cache_counts.tolist()
+        logger.info("Sentence cache: %d of %d sentences reused (%.1f%%)",
+                    hits, lookups, 100 * hits / lookups if lookups else 0.0)
+    return failures
+
+
+def stage_analyze(text_ids: List[str], args) -> int:
+    parse_dir = args.work_dir / 'parses'
+    analysis_dir = args.work_dir / 'analysis'
+    analysis_dir.mkdir(parents=True, exist_ok=True)
+    missing = [t for t in text_ids if not (parse_dir / f"{t}.json").exists()]
+    if missing:
+        logger.warning("No parse for %d texts (run the parse stage): %s", len(missing), missing)
+    parsed = [t for t in text_ids if t not in missing]
+    todo = pending(parsed, analysis_dir, args.resume)
+    return _run_per_text(_analyze_text, 'Analyzing', todo, (str(parse_dir), str(analysis_dir)), args,
+                         cost=lambda text_id: parse_tokens(parse_dir / f"{text_id}.json")) + len(missing)
+
+
+def stage_frequencies(text_ids: List[str], args) -> int:
+    parse_dir = args.work_dir / 'parses'
+    index_path = args.work_dir / 'frequencies.npz'
+    index = FrequencyIndex.load(index_path) if index_path.exists() else FrequencyIndex()
+    parsed = [t for t in text_ids if (parse_dir / f"{t}.json").exists()]
+    # Texts already in the index are kept; with --resume they are not recounted
+    todo = [t for t in parsed if not (args.resume and t in index)]
+    if not todo:
+        logger.info("Frequency index is up to date (%d texts)", len(index))
+        return 0
+    for text_id in todo:
+        logger.info("Counting %s...", text_id)
+        index.add(text_id, load_document(parse_dir / f"{text_id}.json"))
+    tmp_path = args.work_dir / 'frequencies.tmp.npz'
+    index.save(tmp_path)
+    os.replace(tmp_path, index_path)
+    logger.info("Frequency index covers %d texts", len(index))
+    return 0
+
+
+def stage_stats(text_ids: List[str], args) -> int:
+    analysis_dir = args.work_dir / 'analysis'
+    # Texts are folded into period aggregates one at a time, never all held at once
+    aggregates = aggregate_results({})
+    for text_id in text_ids:
+        path = analysis_dir / f"{text_id}.json"
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                aggregate_results({text_id: json.load(f)}, aggregates)
+    aggregates.save(args.work_dir / 'aggregates.json')
+    for path in args.merge_aggregates:
+        logger.info("Merging aggregates from %s", path)
+        aggregates.merge(CorpusAggregates.load(path))
+    logger.info("Running statistics on %d analyzed texts", aggregates.texts)
+    try:
+        output = StatisticalAnalysis(aggregates=aggregates).run_all_analyses()
+    except Exception as e:
+        logger.error("Statistics failed (does every period have texts?): %s", e)
+        return 1
+    write_checkpoint(output['raw_results'], args.work_dir / 'stats.json')
+    (args.work_dir / 'stats.txt').write_text(output['formatted_output'], encoding='utf-8')
+    print(output['formatted_output'])
+    return 0
+
+
+def stage_figures(text_ids: List[str], args) -> int:
+    stats_path = args.work_dir / 'stats.json'
+    if not stats_path.exists():
+        logger.error("%s not found; run the stats stage first", stats_path)
+        return 1
+    figures = load_script('03_create_figures.py', 'create_figures')
+    with open(stats_path, 'r', encoding='utf-8') as f:
+        raw_results = json.load(f)
+    article_data, construction_data = figures.figure_data_from_analysis(raw_results)
+    figures.create_article_development_figure(article_data, args.figures_dir, show=False)
+    figures.create_construction_shift_figure(construction_data, args.figures_dir, show=False)
+    return 0
+
+
+STAGE_FUNCTIONS = {
+    'parse': stage_parse,
+    'analyze': stage_analyze,
+    'frequencies': stage_frequencies,
+    'stats': stage_stats,
+    'figures': stage_figures
+}
+
+
+def _package_override(value: str):
+    period_dir, _, package = value.partition('=')
+    if period_dir not in CORPUS_PERIODS or not package:
+        raise argparse.ArgumentTypeError(f"expected <period_dir>=<package>, got '{value}'")
+    return period_dir, package
+
+
+def _treebank(value: str):
+    period_dir, _, path = value.partition('=')
+    if period_dir not in CORPUS_PERIODS or not path:
+        raise argparse.ArgumentTypeError(f"expected <period_dir>=<path>, got '{value}'")
+    return period_dir, Path(path)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Latin-Spanish complexity analysis pipeline")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--corpus', type=Path, default=REPO_DIR / "data" / "raw_texts",
+                        help='corpus directory or packed archive')
+    parser.add_argument('--work-dir', type=Path, default=REPO_DIR / "results" / "run",
+                        help='checkpoints, parses and statistics')
+    parser.add_argument('--figures-dir', type=Path, default=None,
+                        help='figure output (default: <work-dir>/figures)')
+    parser.add_argument('--texts', nargs='+', default=None, metavar='PATTERN',
+                        help='only texts whose id matches a glob, e.g. "medieval_*"')
+    parser.add_argument('--periods', nargs='+', choices=list(CORPUS_PERIODS), default=None)
+    parser.add_argument('--package', type=_package_override, action='append', default=[],
+                        dest='packages', metavar='PERIOD=PACKAGE',
+                        help='Stanza package for a period, e.g. medieval_latin=ittb')
+    parser.add_argument('--conllu', type=_treebank, action='append', default=[],
+                        metavar='PERIOD=PATH',
+                        help='pre-parsed CoNLL-U file or directory for a period, used instead of Stanza')
+    parser.add_argument('--sentence-cache', type=Path, default=None, metavar='PATH',
+                        help='SQLite cache of parsed sentences shared across texts and runs '
+                             '(e.g. results/run/sentence_cache.sqlite; see parse_cache.py). Texts are '
+                             'then parsed sentence by sentence, so parses may differ at sentence '
+                             'edges from a run without the cache')
+    parser.add_argument('--quantize', action='store_true',
+                        help='parse with int8 POS and dependency models (CPU; see quantization.py)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes; above 1, the most the scheduler may start')
+    parser.add_argument('--cpus', type=int, default=None,
+                        help='CPU budget split into torch threads per worker (default: all cores)')
+    parser.add_argument('--memory-limit', type=parse_memory, default=None, metavar='SIZE',
+                        help='memory ceiling for admitting texts, e.g. 12G (default: 80%% of available)')
+    parser.add_argument('--worker-memory', type=parse_memory, default=WORKER_MEMORY, metavar='SIZE',
+                        help='resident memory of one worker with its pipelines (default: 2G)')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip texts that already have a checkpoint')
+    parser.add_argument('--merge-aggregates', nargs='+', type=Path, default=[], metavar='PATH',
+                        help='aggregates.json of other runs (over other texts) to include in the stats')
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    args.packages = dict(args.packages)
+    args.figures_dir = args.figures_dir or args.work_dir / 'figures'
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s %(message)s")
+
+    args.work_dir.mkdir(parents=True, exist_ok=True)
+    args.treebank_ids = set()
+    for period_dir, path in args.conllu:
+        args.treebank_ids.update(import_treebank(path, period_dir, args.work_dir / 'parses', args.resume))
+    text_ids = select_texts(list(open_corpus(args.corpus)) + sorted(args.treebank_ids),
+                            args.texts, args.periods)
+    logger.info("%d texts selected", len(text_ids))
+
+    failures = 0
+    for stage in STAGES:
+        if stage in args.stages:
+            logger.info("== %s ==", stage)
+            failures += STAGE_FUNCTIONS[stage](text_ids, args)
+    if failures:
+        logger.warning("%d failure(s); rerun with --resume to retry them", failures)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
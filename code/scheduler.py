@@ -0,0 +1,163 @@
+"""
+Resource-aware scheduling of per-text work on a process pool.
+
+Corpus texts range from a few hundred to tens of thousands of tokens, and
+Stanza's time and memory grow with length. A plain pool oversubscribes
+cores (every worker's torch starts one intra-op thread per core) and can
+run out of memory when several long texts land together. The scheduler:
+
+- estimates each text's memory from its token count
+- sizes the pool from a CPU budget and a memory ceiling, and divides the
+  CPU budget into torch threads per worker, so workers x threads <= cpus
+- submits texts longest first, admitting the longest pending text that
+  keeps the estimated memory in flight under the ceiling; a text too large
+  for the ceiling on its own runs alone
+
+    scheduler = ResourceScheduler(cpus=8, memory_limit=parse_memory('12G'))
+    for text_id, result, error in scheduler.run(task, token_counts,
+                                                initializer=init, initargs=(...)):
+        ...
+
+The memory model is deliberately simple: a fixed cost per worker (its
+loaded pipelines) plus a cost per token of the text being processed. Both
+are conservative defaults and can be tuned per machine.
+"""
+
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024 ** 3
+# Resident memory of a worker with its Stanza pipelines loaded
+WORKER_MEMORY = 2 * GIB
+# Peak working memory per token while a text is parsed and analyzed
+BYTES_PER_TOKEN = 96 * 1024
+# Share of available memory used when no ceiling is given
+DEFAULT_MEMORY_SHARE = 0.8
+
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': GIB, 'T': 1024 ** 4}
+
+
+def parse_memory(value: str) -> int:
+    """Bytes from a size such as '12G', '800M' or '1073741824'"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"expected a size such as 12G or 800M, got '{value}'")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def available_memory() -> int:
+    """Memory available to new processes, from /proc/meminfo where present"""
+    try:
+        with open('/proc/meminfo', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
+def count_tokens(text: str) -> int:
+    """Whitespace token count, the cost estimate's input"""
+    return len(text.split())
+
+
+def limit_threads(threads: int):
+    """Cap BLAS/OpenMP and torch intra-op threads in this process"""
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable before torch starts parallel work
+        pass
+
+
+def _init_scheduled_worker(threads: int, initializer: Optional[Callable], initargs: tuple):
+    limit_threads(threads)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class ResourceScheduler:
+    """
+    cpus: CPU budget shared by all workers (default: every core)
+    memory_limit: memory ceiling in bytes (default: a share of available memory)
+    max_workers: optional cap on the pool size
+    """
+
+    def __init__(self, cpus: Optional[int] = None, memory_limit: Optional[int] = None,
+                 max_workers: Optional[int] = None, worker_memory: int = WORKER_MEMORY,
+                 bytes_per_token: int = BYTES_PER_TOKEN):
+        self.cpus = max(1, cpus or os.cpu_count() or 1)
+        self.memory_limit = memory_limit or int(available_memory() * DEFAULT_MEMORY_SHARE)
+        self.max_workers = max_workers
+        self.worker_memory = worker_memory
+        self.bytes_per_token = bytes_per_token
+
+    def text_memory(self, tokens: int) -> int:
+        return tokens * self.bytes_per_token
+
+    def plan(self, costs: Dict[str, int]) -> Tuple[int, int]:
+        """Worker count and torch threads per worker for texts with these token counts"""
+        workers = min(self.cpus, self.max_workers or self.cpus, max(1, len(costs)))
+        if costs:
+            # Every worker should have room for a median-length text
+            median = sorted(costs.values())[len(costs) // 2]
+            per_worker = self.worker_memory + self.text_memory(median)
+            workers = min(workers, self.memory_limit // per_worker)
+        workers = max(1, int(workers))
+        return workers, max(1, self.cpus // workers)
+
+    def run(self, task: Callable, costs: Dict[str, int], task_args: tuple = (),
+            initializer: Optional[Callable] = None,
+            initargs: tuple = ()) -> Iterator[Tuple[str, object, Optional[Exception]]]:
+        """
+        Run task(text_id, *task_args) for every text in `costs` (text id ->
+        token count), yielding (text_id, result, error) as texts finish
+        """
+        workers, threads = self.plan(costs)
+        budget = self.memory_limit - workers * self.worker_memory
+        logger.info("Scheduling %d texts on %d workers x %d threads, %.1f GiB for texts",
+                    len(costs), workers, threads, max(budget, 0) / GIB)
+        pending = sorted(costs, key=costs.get, reverse=True)
+        in_flight = {}
+        used = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scheduled_worker,
+                                 initargs=(threads, initializer, initargs)) as pool:
+            while pending or in_flight:
+                while pending and len(in_flight) < workers:
+                    if not in_flight and self.text_memory(costs[pending[0]]) > budget:
+                        # Oversized texts run alone, as soon as the pool is idle
+                        text_id = pending[0]
+                        logger.warning("%s (%d tokens) exceeds the memory ceiling; running it alone",
+                                       text_id, costs[text_id])
+                    else:
+                        text_id = next((t for t in pending
+                                        if used + self.text_memory(costs[t]) <= budget), None)
+                        if text_id is None:
+                            break
+                    pending.remove(text_id)
+                    memory = self.text_memory(costs[text_id])
+                    used += memory
+                    in_flight[pool.submit(task, text_id, *task_args)] = (text_id, memory)
+                    logger.debug("Admitted %s (%d tokens, %.2f GiB in flight)",
+                                 text_id, costs[text_id], used / GIB)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    text_id, memory = in_flight.pop(future)
+                    used -= memory
+                    try:
+                        yield text_id, future.result(), None
+                    except Exception as e:
+                        yield text_id, None, e
@@ -0,0 +1,154 @@
+"""
+Adaptive sentence sampling: estimate per-text metrics from a parsed
+random subset of a text's sentences.
+
+Per-text metrics such as average embedding depth (depth summed over
+sentences / sentences) and article rate (articles / words) are ratios of
+sentence-level totals, so they can be estimated from a simple random
+sample of sentences. The sampler splits a text into sentences, parses them
+in random batches without replacement and keeps a running ratio estimate
+per metric with a normal-approximation confidence interval (linearized
+variance with finite population correction). Sampling stops as soon as
+every metric's interval half-width is within `precision` of its estimate,
+or when the text is exhausted:
+
+    sampler = AdaptiveSampler(precision=0.02)
+    docs, report = sampler.sample(text_id, split_sentences(text), parse, measure)
+    report['fraction']           # share of sentences parsed
+    report['weight']             # 1 / fraction: scales sample counts to the text
+
+`parse` turns a list of sentence strings into parsed documents and
+`measure` reduces one document to {metric: (numerator, denominator)}.
+"""
+
+import logging
+import math
+import re
+from statistics import NormalDist
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from frequency_index import string_key
+
+logger = logging.getLogger(__name__)
+
+# Sentence-final punctuation (optionally followed by closing quotes or
+# brackets) and blank lines delimit sampling units
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])["\'»”)\]]*\s+|\n\s*\n')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sampling units of a raw text, in text order"""
+    return [unit.strip() for unit in SENTENCE_BOUNDARY.split(text) if unit and unit.strip()]
+
+
+class RatioEstimate:
+    """
+    Running ratio sum(x) / sum(y) over sampled units, with the sums of
+    squares and cross products its variance needs
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = 0.0
+        self.sxx = self.syy = self.sxy = 0.0
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.syy += y * y
+        self.sxy += x * y
+
+    @property
+    def estimate(self) -> float:
+        return self.sx / self.sy if self.sy else math.nan
+
+    def half_width(self, population: int, z: float) -> float:
+        """Confidence interval half-width for a sample of n out of `population` units"""
+        if self.n >= population:
+            return 0.0
+        if self.n < 2 or not self.sy:
+            return math.inf
+        ratio = self.estimate
+        residual = max(0.0, (self.sxx - 2 * ratio * self.sxy + ratio * ratio * self.syy) / (self.n - 1))
+        mean_y = self.sy / self.n
+        return z * math.sqrt((1 - self.n / population) * residual / self.n) / mean_y
+
+    def relative_half_width(self, population: int, z: float) -> float:
+        half_width = self.half_width(population, z)
+        if half_width == 0:
+            return 0.0
+        estimate = self.estimate
+        return half_width / abs(estimate) if estimate else math.inf
+
+    def summary(self, population: int, z: float) -> Dict:
+        estimate, half_width = self.estimate, self.half_width(population, z)
+        return {'estimate': estimate, 'ci': [estimate - half_width, estimate + half_width],
+                'relative_half_width': self.relative_half_width(population, z), 'units': self.n}
+
+
+class AdaptiveSampler:
+    """
+    precision: target CI half-width relative to the estimate (0.02 = ±2%)
+    confidence: CI coverage
+    batch_size: sentences parsed per batch
+    min_sentences: sentences parsed before the stopping rule applies
+    seed: sampling seed; combined with the text id so each text's sample
+    does not depend on the order texts are processed in
+    """
+
+    def __init__(self, precision: float = 0.02, confidence: float = 0.95, batch_size: int = 32,
+                 min_sentences: int = 30, seed: int = 0):
+        self.precision = precision
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_sentences = min_sentences
+        self.seed = seed
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf((1 + self.confidence) / 2)
+
+    def converged(self, estimates: Dict[str, RatioEstimate], population: int) -> bool:
+        return all(estimate.relative_half_width(population, self.z) <= self.precision
+                   for estimate in estimates.values())
+
+    def sample(self, text_id: str, units: Sequence[str], parse: Callable[[List[str]], List],
+               measure: Callable[[object], Dict[str, Tuple[float, float]]]) -> Tuple[List, Dict]:
+        """
+        Parse random batches of `units` until the estimates converge; returns
+        the parsed documents in text order and a report of the estimates
+        and the fraction of units parsed
+        """
+        population = len(units)
+        order = np.random.default_rng([self.seed, string_key(text_id)]).permutation(population)
+        estimates: Dict[str, RatioEstimate] = {}
+        parsed = {}
+        converged = population == 0
+        for start in range(0, population, self.batch_size):
+            batch = order[start:start + self.batch_size].tolist()
+            for index, doc in zip(batch, parse([units[i] for i in batch])):
+                parsed[index] = doc
+                for name, (x, y) in measure(doc).items():
+                    estimates.setdefault(name, RatioEstimate()).add(x, y)
+            if len(parsed) >= min(self.min_sentences, population) and self.converged(estimates, population):
+                converged = True
+                break
+
+        z = self.z
+        report = {
+            'sentences': population,
+            'parsed': len(parsed),
+            'fraction': len(parsed) / population if population else 1.0,
+            'weight': population / len(parsed) if parsed else 1.0,
+            'converged': converged,
+            'precision': self.precision,
+            'confidence': self.confidence,
+            'estimates': {name: estimate.summary(population, z) for name, estimate in estimates.items()}
+        }
+        logger.info("%s: parsed %d of %d sentences (%.1f%%)", text_id, len(parsed), population,
+                    100 * report['fraction'])
+        return [parsed[index] for index in sorted(parsed)], report
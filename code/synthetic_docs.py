@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Synthetic UD-style parsed documents for scale and load testing.
+
+Generates stanza-compatible documents (see parsed_docs) with controllable
+sentence-length distribution, arc locality (and so tree depth) and a
+per-period UPOS/feats mix, without Stanza, models or network access. All
+sampling is done in bulk with NumPy; only the final word objects are built
+in Python, so a million tokens take seconds.
+
+Documents go straight into EnhancedComplexityTracker.integrated_analysis,
+and the resulting dicts into StatisticalAnalysis and the figure functions.
+
+Usage:
+    python code/synthetic_docs.py --tokens 1000000 --output /tmp/synthetic_parses
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from corpus_routing import CORPUS_PERIODS
+from parsed_docs import ParsedDocument, ParsedSentence, ParsedWord, save_document
+
+# Per-period token profiles. `upos` gives tag probabilities; `forms` the
+# closed-class forms; `lemmas` the lemma of each inflected closed-class form
+# (other words use their form); `feats` (feats string, weight) pairs per tag;
+# `deprels` candidate relations per tag for non-root words; `aux_complements`
+# maps an auxiliary lemma to the VerbForm of the verb it heads, the relation
+# it attaches with, and the marker word between them, if any.
+LATIN_PROFILE = {
+    'language': 'la',
+    'mean_sentence_length': 21.0,
+    'upos': {
+        'NOUN': 0.25, 'VERB': 0.16, 'ADJ': 0.09, 'PRON': 0.08, 'ADP': 0.07,
+        'CCONJ': 0.06, 'SCONJ': 0.03, 'ADV': 0.06, 'AUX': 0.03, 'DET': 0.04,
+        'PROPN': 0.03, 'PUNCT': 0.10
+    },
+    'forms': {
+        'ADP': ['in', 'ad', 'ex', 'ab', 'cum', 'de', 'per', 'pro'],
+        'CCONJ': ['et', 'atque', 'sed', 'neque', 'aut', 'que'],
+        'SCONJ': ['ut', 'cum', 'si', 'quod', 'quia', 'ne'],
+        'AUX': ['est', 'sunt', 'erat', 'esse', 'fuit', 'sit'],
+        'DET': ['hic', 'ille', 'is', 'idem', 'ipse'],
+        'PRON': ['qui', 'se', 'quae', 'ego', 'nos'],
+        'PUNCT': [',', '.', ';', ':']
+    },
+    'lemmas': {form: 'sum' for form in ['est', 'sunt', 'erat', 'esse', 'fuit', 'sit']},
+    'feats': {
+        'VERB': [
+            ('Aspect=Imp|Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin|Voice=Act', 0.28),
+            ('Aspect=Perf|Mood=Ind|Number=Sing|Person=3|Tense=Past|VerbForm=Fin|Voice=Act', 0.18),
+            ('Aspect=Imp|Mood=Ind|Number=Plur|Person=3|Tense=Fut|VerbForm=Fin|Voice=Act', 0.05),
+            ('Aspect=Imp|Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin|Voice=Pass', 0.10),
+            ('Aspect=Perf|Mood=Sub|Number=Sing|Person=3|Tense=Pqp|VerbForm=Fin|Voice=Act', 0.05),
+            ('Aspect=Imp|Mood=Sub|Number=Sing|Person=3|Tense=Past|VerbForm=Fin|Voice=Act', 0.08),
+            ('Aspect=Perf|Case=Abl|Gender=Masc|Number=Plur|Tense=Past|VerbForm=Part|Voice=Pass', 0.05),
+            ('Aspect=Perf|Case=Nom|Gender=Masc|Number=Sing|Tense=Past|VerbForm=Part|Voice=Pass', 0.09),
+            ('Aspect=Imp|Tense=Pres|VerbForm=Inf|Voice=Act', 0.12)
+        ],
+        'NOUN': [
+            ('Case=Nom|Gender=Masc|Number=Sing', 0.20), ('Case=Acc|Gender=Fem|Number=Sing', 0.22),
+            ('Case=Gen|Gender=Masc|Number=Plur', 0.15), ('Case=Abl|Gender=Neut|Number=Sing', 0.20),
+            ('Case=Dat|Gender=Masc|Number=Sing', 0.08), ('Case=Acc|Gender=Neut|Number=Plur', 0.15)
+        ],
+        'ADJ': [
+            ('Case=Nom|Degree=Pos|Gender=Masc|Number=Sing', 0.35),
+            ('Case=Abl|Degree=Pos|Gender=Fem|Number=Sing', 0.35),
+            ('Case=Acc|Degree=Pos|Gender=Neut|Number=Plur', 0.30)
+        ],
+        'AUX': [('Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin', 1.0)]
+    },
+    'deprels': {
+        'NOUN': ['nsubj', 'obj', 'obl', 'nmod', 'iobj'],
+        'PROPN': ['nsubj', 'obj', 'obl', 'nmod'],
+        'PRON': ['nsubj', 'obj', 'obl'],
+        'VERB': ['ccomp', 'advcl', 'acl:relcl', 'conj', 'xcomp'],
+        'ADJ': ['amod'], 'ADV': ['advmod'], 'ADP': ['case'], 'DET': ['det'],
+        'CCONJ': ['cc'], 'SCONJ': ['mark'], 'AUX': ['aux', 'cop'], 'PUNCT': ['punct']
+    },
+    # amatus est
+    'aux_complements': {'sum': ('Part', 'aux:pass', None)}
+}
+
+MEDIEVAL_LATIN_PROFILE = dict(
+    LATIN_PROFILE,
+    mean_sentence_length=24.0,
+    upos=dict(LATIN_PROFILE['upos'], ADP=0.09, DET=0.05, NOUN=0.23, ADJ=0.07)
+)
+
+SPANISH_PROFILE = {
+    'language': 'es',
+    'mean_sentence_length': 17.0,
+    'upos': {
+        'NOUN': 0.19, 'VERB': 0.12, 'ADJ': 0.05, 'PRON': 0.07, 'ADP': 0.13,
+        'CCONJ': 0.06, 'SCONJ': 0.04, 'ADV': 0.05, 'AUX': 0.04, 'DET': 0.12,
+        'PROPN': 0.03, 'PUNCT': 0.10
+    },
+    'forms': {
+        'ADP': ['de', 'a', 'en', 'por', 'con', 'para', 'sobre', 'sin'],
+        'CCONJ': ['e', 'y', 'o', 'mas', 'ni'],
+        'SCONJ': ['que', 'si', 'como', 'quando'],
+        'AUX': ['ha', 'he', 'han', 'es', 'son', 'fue', 'ser', 'está', 'va'],
+        'DET': ['el', 'la', 'los', 'las', 'un', 'una', 'su', 'este'],
+        'PRON': ['que', 'se', 'lo', 'le', 'él'],
+        'PUNCT': [',', '.', ';', ':']
+    },
+    'lemmas': {
+        'ha': 'haber', 'he': 'haber', 'han': 'haber', 'es': 'ser', 'son': 'ser',
+        'fue': 'ser', 'ser': 'ser', 'está': 'estar', 'va': 'ir'
+    },
+    'feats': {
+        'VERB': [
+            ('Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin', 0.30),
+            ('Mood=Ind|Number=Sing|Person=3|Tense=Past|VerbForm=Fin', 0.20),
+            ('Mood=Ind|Number=Plur|Person=3|Tense=Fut|VerbForm=Fin', 0.04),
+            ('Mood=Cnd|Number=Sing|Person=3|VerbForm=Fin', 0.03),
+            ('Gender=Masc|Number=Sing|Tense=Past|VerbForm=Part', 0.18),
+            ('VerbForm=Inf', 0.18),
+            ('VerbForm=Ger', 0.07)
+        ],
+        'NOUN': [('Gender=Masc|Number=Sing', 0.45), ('Gender=Fem|Number=Sing', 0.35),
+                 ('Gender=Masc|Number=Plur', 0.20)],
+        'ADJ': [('Gender=Masc|Number=Sing', 0.6), ('Gender=Fem|Number=Plur', 0.4)],
+        'DET': [('Definite=Def|Gender=Masc|Number=Sing|PronType=Art', 0.6),
+                ('Definite=Ind|Gender=Fem|Number=Sing|PronType=Art', 0.4)],
+        'AUX': [('Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin', 1.0)]
+    },
+    'deprels': LATIN_PROFILE['deprels'],
+    # ha amado, es amado, está amando, va a amar
+    'aux_complements': {
+        'haber': ('Part', 'aux', None), 'ser': ('Part', 'aux:pass', None),
+        'estar': ('Ger', 'aux', None), 'ir': ('Inf', 'aux', 'a')
+    }
+}
+
+PERIOD_PROFILES = {
+    'classical_latin': LATIN_PROFILE,
+    'medieval_latin': MEDIEVAL_LATIN_PROFILE,
+    'early_spanish': SPANISH_PROFILE
+}
+
+# Share of auxiliaries that head an analytic construction: the auxiliary (and
+# its marker) attach to the participle/infinitive/gerund right after it
+AUX_COMPLEMENT_RATE = 0.7
+
+OPEN_CLASS_VOCAB = 5000
+
+
+class SyntheticDocumentGenerator:
+    """
+    Bulk generator of parsed documents for one period profile.
+
+    mean_sentence_length / length_sigma: lognormal sentence-length
+    distribution (sigma on the log scale); max_sentence_length clips it.
+    locality: probability parameter of the geometric head-distance
+    distribution. Words attach towards the root, so higher locality gives
+    shorter arcs and deeper trees; low locality gives flat trees.
+    """
+
+    def __init__(self, profile: Dict, mean_sentence_length: Optional[float] = None,
+                 length_sigma: float = 0.55, max_sentence_length: int = 150,
+                 locality: float = 0.55, seed: Optional[int] = None):
+        self.profile = profile
+        self.language = profile['language']
+        self.mean_sentence_length = mean_sentence_length or profile['mean_sentence_length']
+        self.length_sigma = length_sigma
+        self.max_sentence_length = max_sentence_length
+        self.locality = locality
+        self.rng = np.random.default_rng(seed)
+
+        self.tags = list(profile['upos'])
+        probs = np.array([profile['upos'][t] for t in self.tags], dtype=float)
+        self.tag_probs = probs / probs.sum()
+        self.verb_tag = self.tags.index('VERB')
+        self.aux_tag = self.tags.index('AUX')
+
+        # Open-class forms are synthetic stems; closed-class forms are real
+        self.forms = {}
+        self.open_tags = set()
+        for i, tag in enumerate(self.tags):
+            forms = profile['forms'].get(tag)
+            if forms is None:
+                forms = [f"{tag.lower()}{k}" for k in range(OPEN_CLASS_VOCAB)]
+                self.open_tags.add(i)
+            self.forms[i] = np.array(forms, dtype=object)
+
+        self.feats = {}
+        for tag, table in profile['feats'].items():
+            weights = np.array([w for _, w in table], dtype=float)
+            self.feats[self.tags.index(tag)] = (
+                np.array([f for f, _ in table], dtype=object), weights / weights.sum()
+            )
+        self.deprels = {self.tags.index(tag): np.array(rels, dtype=object)
+                        for tag, rels in profile['deprels'].items()}
+        self.lemmas = profile.get('lemmas', {})
+
+        # Auxiliary form index -> (complement feats, aux relation, marker)
+        verb_feats = self.feats[self.verb_tag][0]
+        self.complements = {}
+        for k, form in enumerate(self.forms[self.aux_tag]):
+            spec = profile.get('aux_complements', {}).get(self.lemmas.get(form, form))
+            if spec is None:
+                continue
+            verb_form, relation, marker = spec
+            feats = np.array([f for f in verb_feats if f'VerbForm={verb_form}' in f.split('|')],
+                             dtype=object)
+            if len(feats):
+                self.complements[k] = (feats, relation, marker)
+
+    def _sample_lengths(self, n_sentences: int) -> np.ndarray:
+        mu = np.log(self.mean_sentence_length) - self.length_sigma ** 2 / 2
+        lengths = np.rint(self.rng.lognormal(mu, self.length_sigma, n_sentences)).astype(np.int64)
+        return np.clip(lengths, 1, self.max_sentence_length)
+
+    def _pick(self, choices: np.ndarray, mask: np.ndarray, out: np.ndarray, p=None):
+        count = int(mask.sum())
+        if count:
+            out[mask] = choices[self.rng.choice(len(choices), size=count, p=p)]
+
+    def _attach_complements(self, upos, forms, form_idx, feats, deprels, head_pos, pos, is_root):
+        """
+        Turn the word after most auxiliaries (after the marker, for
+        auxiliaries that take one) into the verb the auxiliary heads, and
+        attach the auxiliary and marker to it. The verb takes over the
+        auxiliary's head when the root lies behind the auxiliary, so the
+        structure stays a tree. Arrays are updated in place.
+        """
+        rng = self.rng
+        total = len(upos)
+        aux = np.flatnonzero(upos == self.aux_tag)
+        aux = aux[rng.random(len(aux)) < AUX_COMPLEMENT_RATE]
+        aux = aux[np.isin(form_idx[aux], list(self.complements))]
+        marked = np.array([k for k, spec in self.complements.items() if spec[2]], dtype=np.int64)
+        span = np.where(np.isin(form_idx[aux], marked), 2, 1)
+        # Auxiliary, marker and verb in one sentence, none of them the root
+        ok = aux + span < total
+        aux, span = aux[ok], span[ok]
+        for offset in (1, 2):
+            idx = np.minimum(aux + offset, total - 1)
+            ok = (offset > span) | ((pos[idx] == pos[aux] + offset) & ~is_root[idx])
+            aux, span = aux[ok], span[ok]
+        # Drop auxiliaries whose spans overlap (ha es amado)
+        clash = aux[1:] <= aux[:-1] + span[:-1]
+        ok = np.ones(len(aux), dtype=bool)
+        ok[:-1] &= ~clash
+        ok[1:] &= ~clash
+        aux, span = aux[ok], span[ok]
+
+        verb = aux + span
+        behind = head_pos[aux] < pos[aux]
+        head_pos[verb[behind]] = head_pos[aux[behind]]
+        head_pos[aux] = pos[verb]
+        upos[verb] = self.verb_tag
+        forms[verb] = self.forms[self.verb_tag][rng.integers(0, OPEN_CLASS_VOCAB, len(verb))]
+        verb_deprels = self.deprels[self.verb_tag]
+        deprels[verb] = verb_deprels[rng.integers(0, len(verb_deprels), len(verb))]
+        for k, (choices, relation, marker) in self.complements.items():
+            mask = form_idx[aux] == k
+            feats[verb[mask]] = choices[rng.integers(0, len(choices), int(mask.sum()))]
+            deprels[aux[mask]] = relation
+            if marker:
+                head_pos[aux[mask] + 1] = pos[verb[mask]]
+                upos[aux[mask] + 1] = self.tags.index('ADP')
+                forms[aux[mask] + 1] = marker
+                feats[aux[mask] + 1] = None
+                deprels[aux[mask] + 1] = 'mark'
+
+    def generate(self, n_tokens: int) -> ParsedDocument:
+        """Generate one document of roughly n_tokens words"""
+        rng = self.rng
+        n_sentences = max(1, int(round(n_tokens / self.mean_sentence_length)))
+        lengths = self._sample_lengths(n_sentences)
+        total = int(lengths.sum())
+        starts = np.cumsum(lengths) - lengths
+        sent_idx = np.repeat(np.arange(n_sentences), lengths)
+        pos = np.arange(total) - starts[sent_idx]
+
+        # Root position per sentence; every other word moves a geometric
+        # distance towards the root, which keeps the structure a tree
+        root_pos = (rng.random(n_sentences) * lengths).astype(np.int64)[sent_idx]
+        is_root = pos == root_pos
+        step = rng.geometric(self.locality, total)
+        head_pos = np.where(pos < root_pos, np.minimum(pos + step, root_pos),
+                            np.maximum(pos - step, root_pos))
+        upos = rng.choice(len(self.tags), size=total, p=self.tag_probs)
+        upos[is_root] = self.verb_tag
+
+        forms = np.empty(total, dtype=object)
+        form_idx = np.zeros(total, dtype=np.int64)
+        for tag, choices in self.forms.items():
+            mask = upos == tag
+            count = int(mask.sum())
+            if not count:
+                continue
+            if tag in self.open_tags:
+                # Zipfian reuse of open-class stems
+                idx = np.minimum(rng.zipf(1.4, count) - 1, OPEN_CLASS_VOCAB - 1)
+            else:
+                idx = rng.integers(0, len(choices), count)
+            forms[mask] = choices[idx]
+            form_idx[mask] = idx
+
+        feats = np.full(total, None, dtype=object)
+        for tag, (choices, probs) in self.feats.items():
+            self._pick(choices, upos == tag, feats, probs)
+
+        deprels = np.full(total, 'dep', dtype=object)
+        for tag, choices in self.deprels.items():
+            self._pick(choices, upos == tag, deprels)
+        deprels[is_root] = 'root'
+
+        self._attach_complements(upos, forms, form_idx, feats, deprels, head_pos, pos, is_root)
+        heads = head_pos + 1
+        heads[is_root] = 0
+        lemmas = [self.lemmas.get(form, form) for form in forms.tolist()]
+
+        ids = (pos + 1).tolist()
+        heads = heads.tolist()
+        tag_names = np.array(self.tags, dtype=object)[upos].tolist()
+        forms = forms.tolist()
+        feats = feats.tolist()
+        deprels = deprels.tolist()
+
+        sentences = []
+        for start, length in zip(starts.tolist(), lengths.tolist()):
+            end = start + length
+            sentences.append(ParsedSentence([
+                ParsedWord(ids[i], forms[i], lemmas[i], tag_names[i], feats[i], heads[i], deprels[i])
+                for i in range(start, end)
+            ]))
+        return ParsedDocument(sentences, ' '.join(forms))
+
+
+def generate_corpus(tokens_per_text: int = 5000, texts_per_period: Optional[Dict[str, int]] = None,
+                    seed: int = 0, **generator_kwargs) -> Dict[str, ParsedDocument]:
+    """
+    Generate a corpus keyed by text name, using the corpus_routing prefixes
+    so StatisticalAnalysis assigns each text to its period.
+
+    texts_per_period: corpus directory -> text count (default: the bundled
+    corpus's 7/5/4 split).
+    """
+    texts_per_period = texts_per_period or {
+        'classical_latin': 7, 'medieval_latin': 5, 'early_spanish': 4
+    }
+    seeds = np.random.SeedSequence(seed).spawn(len(texts_per_period))
+    corpus = {}
+    for (period_dir, n_texts), period_seed in zip(texts_per_period.items(), seeds):
+        generator = SyntheticDocumentGenerator(PERIOD_PROFILES[period_dir],
+                                               seed=period_seed, **generator_kwargs)
+        prefix = CORPUS_PERIODS[period_dir]['prefix']
+        for i in range(n_texts):
+            corpus[f"{prefix}synthetic_{i:04d}"] = generator.generate(tokens_per_text)
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic parsed documents")
+    parser.add_argument('--tokens', type=int, default=1_000_000, help='total tokens across the corpus')
+    parser.add_argument('--texts-per-period', type=int, default=10)
+    parser.add_argument('--locality', type=float, default=0.55)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, required=True,
+                        help='directory for <text_id>.json parses (usable as a parse cache)')
+    args = parser.parse_args(argv)
+
+    n_texts = args.texts_per_period * len(PERIOD_PROFILES)
+    corpus = generate_corpus(
+        tokens_per_text=args.tokens // n_texts,
+        texts_per_period={period: args.texts_per_period for period in PERIOD_PROFILES},
+        seed=args.seed, locality=args.locality
+    )
+    args.output.mkdir(parents=True, exist_ok=True)
+    for text_id, doc in corpus.items():
+        save_document(doc, args.output / f"{text_id}.json")
+    print(f"Wrote {len(corpus)} synthetic documents to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Columnar token table for parsed documents.
+
+One pass over a document's words interns every string attribute to a small
+integer id and stores one NumPy array per attribute, so corpus-level
+measures can be computed with vectorized operations instead of walking
+word objects.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+STRING_COLUMNS = ['form', 'lemma', 'upos', 'feats', 'deprel']
+
+
+class TokenTable:
+    """
+    Word attributes of a document as parallel arrays.
+
+    sentence: sentence index of each word
+    position: 1-based word id within its sentence
+    head: 1-based head id within the sentence (0 for the root)
+    form/lemma/upos/feats/deprel: ids into self.vocab[<column>]; forms and
+    lemmas are lowercased, missing values are interned as ''
+    """
+
+    def __init__(self, sentence: np.ndarray, position: np.ndarray, head: np.ndarray,
+                 columns: Dict[str, np.ndarray], vocab: Dict[str, List[str]]):
+        self.sentence = sentence
+        self.position = position
+        self.head = head
+        self.columns = columns
+        self.vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def __getattr__(self, name):
+        # Expose string columns as attributes (table.form, table.upos, ...)
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_document(cls, doc) -> 'TokenTable':
+        """Build a table from any stanza-like document"""
+        lookups = {column: {} for column in STRING_COLUMNS}
+        ids = {column: [] for column in STRING_COLUMNS}
+        sentence, position, head = [], [], []
+
+        for sent_index, sent in enumerate(doc.sentences):
+            for word in sent.words:
+                sentence.append(sent_index)
+                position.append(word.id)
+                head.append(word.head)
+                values = (
+                    (word.text or '').lower(),
+                    (word.lemma or word.text or '').lower(),
+                    word.upos or '',
+                    word.feats or '',
+                    word.deprel or ''
+                )
+                for column, value in zip(STRING_COLUMNS, values):
+                    lookup = lookups[column]
+                    ids[column].append(lookup.setdefault(value, len(lookup)))
+
+        return cls(
+            np.array(sentence, dtype=np.int64),
+            np.array(position, dtype=np.int64),
+            np.array(head, dtype=np.int64),
+            {column: np.array(ids[column], dtype=np.int64) for column in STRING_COLUMNS},
+            {column: list(lookups[column]) for column in STRING_COLUMNS}
+        )
+
+    def strings(self, column: str) -> np.ndarray:
+        """Decoded values of a string column, as an object array"""
+        return np.array(self.vocab[column], dtype=object)[self.columns[column]]
+
+    def code(self, column: str, value: str) -> int:
+        """Id of a value in a column's vocabulary, or -1 if it never occurs"""
+        try:
+            return self.vocab[column].index(value)
+        except ValueError:
+            return -1
+
+    def sentence_bounds(self) -> np.ndarray:
+        """Start offsets of each sentence, plus a final end offset"""
+        counts = np.bincount(self.sentence, minlength=int(self.sentence.max()) + 1 if len(self) else 0)
+        return np.concatenate([[0], np.cumsum(counts)])
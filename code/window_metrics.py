@@ -0,0 +1,104 @@
+"""
+Sliding-window metric profiles within a text.
+
+A SentenceProfile holds one count per sentence for each quantity behind
+the windowed metrics (tokens, articles, dependency arcs and their summed
+distance, embedding depth, analytic and synthetic constructions). Prefix
+sums over those arrays are taken once, so the totals of every window of
+any size are differences of two prefix sums: each window size costs O(n)
+and many sizes can be profiled in one run.
+
+Windows are counted in sentences, or in tokens rounded out to whole
+sentences (the shortest run of sentences reaching the token count).
+Each metric is a ratio of window totals:
+
+    article_rate          articles per 1000 tokens
+    dependency_distance   mean |head - dependent| over non-root arcs
+    embedding_depth       mean maximum depth per sentence
+    analytic_ratio        analytic / (analytic + synthetic) constructions
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+
+COUNTS = ['tokens', 'articles', 'arcs', 'distance', 'depth', 'analytic', 'synthetic']
+
+# metric -> (numerator, denominator, scale)
+METRICS = {
+    'article_rate': ('articles', 'tokens', 1000.0),
+    'dependency_distance': ('distance', 'arcs', 1.0),
+    'embedding_depth': ('depth', 'sentences', 1.0),
+    'analytic_ratio': ('analytic', 'constructions', 1.0)
+}
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Elementwise ratio, NaN where the denominator is zero"""
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator * scale, denominator, out=out, where=denominator > 0)
+    return out
+
+
+class SentenceProfile:
+    """Per-sentence counts of a text, with prefix sums for window totals"""
+
+    def __init__(self, counts: Dict[str, np.ndarray]):
+        self.counts = {name: np.asarray(counts[name], dtype=np.float64) for name in COUNTS}
+        self.counts['sentences'] = np.ones(len(self.counts['tokens']))
+        self.counts['constructions'] = self.counts['analytic'] + self.counts['synthetic']
+        self._prefix = {name: np.concatenate([[0.0], np.cumsum(values)])
+                        for name, values in self.counts.items()}
+
+    def __len__(self) -> int:
+        return len(self.counts['tokens'])
+
+    def window_bounds(self, size: int, unit: str = 'sentences', step: int = 1):
+        """Start and end sentence indices of every complete window"""
+        if size < 1 or step < 1:
+            raise ValueError("window size and step must be positive")
+        n = len(self)
+        if unit == 'sentences':
+            starts = np.arange(0, max(n - size + 1, 0), step)
+            return starts, starts + size
+        if unit == 'tokens':
+            tokens = self._prefix['tokens']
+            starts = np.arange(0, n, step)
+            # First sentence boundary at which the window reaches `size` tokens
+            ends = np.searchsorted(tokens, tokens[starts] + size, side='left')
+            complete = ends <= n
+            return starts[complete], ends[complete]
+        raise ValueError(f"unit must be 'sentences' or 'tokens', got '{unit}'")
+
+    def totals(self, starts: np.ndarray, ends: np.ndarray) -> Dict[str, np.ndarray]:
+        """Summed counts of each window"""
+        return {name: prefix[ends] - prefix[starts] for name, prefix in self._prefix.items()}
+
+    def windows(self, size: int, unit: str = 'sentences', step: int = 1) -> Dict[str, np.ndarray]:
+        """Every metric over sliding windows, with each window's sentence span"""
+        starts, ends = self.window_bounds(size, unit, step)
+        totals = self.totals(starts, ends)
+        result = {'start': starts, 'end': ends, 'tokens': totals['tokens']}
+        for metric, (numerator, denominator, scale) in METRICS.items():
+            result[metric] = _ratio(totals[numerator], totals[denominator], scale)
+        return result
+
+    def profiles(self, sizes: Iterable[int], unit: str = 'sentences', step: int = 1) -> Dict[int, Dict]:
+        """Windows for several sizes in one run"""
+        return {size: self.windows(size, unit, step) for size in sizes}
+
+
+def summarize(windows: Dict[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    """Spread of each metric across the windows of one size"""
+    summary = {}
+    for metric in METRICS:
+        values = windows[metric][~np.isnan(windows[metric])]
+        if values.size:
+            summary[metric] = {
+                'mean': float(values.mean()),
+                'std': float(values.std()),
+                'min': float(values.min()),
+                'max': float(values.max()),
+                'windows': int(values.size)
+            }
+    return summary